@@ -0,0 +1 @@
+from compress.api import compress, decompress, load_dictionary, train_dictionary
@@ -0,0 +1,7 @@
+# coding: utf-8
+
+import sys
+
+from compress.cli import main
+
+sys.exit(main())
@@ -0,0 +1,325 @@
+# coding: utf-8
+
+import asyncio
+from collections import deque
+import threading
+
+from compress.algorithms import ALGORITHMS_BY_ID
+from compress.stream import StreamCompressor, StreamDecompressor, BLOCK_HEADER, BLOCK_STORED, DEFAULT_BLOCK_SIZE, \
+    HEADER
+
+# Number of blocks being compressed or decompressed at the same time by default, one is processed while the next one is
+# read from the source
+DEFAULT_WINDOW = 2
+
+# Codecs keep their state in the instance, each thread of the executors decompresses with its own
+_thread_codecs = threading.local()
+
+
+def _get_thread_codec(method):
+    codecs = _thread_codecs.__dict__.setdefault("codecs", {})
+
+    try:
+        return codecs[method]
+    except KeyError:
+        pass
+
+    try:
+        codec = ALGORITHMS_BY_ID[method]()
+    except KeyError:
+        raise IOError("Unknown compression method {}.".format(method))
+
+    codecs[method] = codec
+    return codec
+
+
+class AsyncStreamReader(object):
+    """ Reads exact amounts of bytes from an asyncio.StreamReader (or anything with a read coroutine) or from an async
+    iterable of bytes chunks.
+
+    Parameters
+    ----------
+    source
+        Where to read the bytes from.
+    """
+
+    def __init__(self, source):
+        self.__source = source if hasattr(source, "read") else None
+        self.__chunks = None if self.__source is not None else source.__aiter__()
+        self.__buffer = bytearray()
+
+    async def read(self, size):
+        """ Reads size bytes, less bytes are returned only when the end of the source is reached.
+
+        Parameters
+        ----------
+        size : int
+            Number of bytes to read.
+
+        Returns
+        -------
+        bytes
+            The bytes read.
+        """
+
+        while len(self.__buffer) < size:
+            if self.__source is not None:
+                chunk = await self.__source.read(size - len(self.__buffer))
+            else:
+                try:
+                    chunk = await self.__chunks.__anext__()
+                except StopAsyncIteration:
+                    chunk = b""
+
+            if not chunk:
+                break
+
+            self.__buffer += chunk
+
+        data = bytes(self.__buffer[:size])
+        del self.__buffer[:size]
+        return data
+
+    async def read_exactly(self, size):
+        """ Same as read but raises an IOError when the source ends too early. """
+
+        data = await self.read(size)
+
+        if len(data) != size:
+            raise IOError("Truncated stream, expected {} bytes but got {}.".format(size, len(data)))
+
+        return data
+
+
+class AsyncCompressor(object):
+    """ Compresses an asynchronous stream block by block, into the same container as StreamCompressor.
+
+    Attributes
+    ----------
+    algorithm : Codec
+        The algorithm used to compress each block, it can be shared with other compressors.
+
+    block_size : int
+        Size of the uncompressed blocks.
+
+    executor : concurrent.futures.Executor
+        Where the blocks are compressed, the default executor of the event loop (a thread pool) when None.
+
+    window : int
+        Maximum number of blocks being compressed at the same time.
+
+    bytes_in : int
+        Number of bytes read by the last compression.
+
+    bytes_out : int
+        Number of bytes produced by the last compression.
+
+    Notes
+    -----
+    Compressing a block is CPU-bound, it is done by the executor so the event loop keeps serving other tasks. The
+    source is only read when the consumer asks for more output and fewer than window blocks are being compressed, so a
+    slow consumer (like a client with a slow connection) slows the reading down instead of filling the memory, and the
+    memory used by a stream is bounded by window blocks.
+    """
+
+    def __init__(self, algorithm, block_size=DEFAULT_BLOCK_SIZE, executor=None, window=DEFAULT_WINDOW):
+
+        if window <= 0:
+            raise ValueError("The window must be positive.")
+
+        self.algorithm = algorithm
+        self.block_size = block_size
+        self.executor = executor
+        self.window = window
+        self.__framing = StreamCompressor(algorithm, block_size)
+
+    @property
+    def bytes_in(self):
+        return self.__framing.bytes_in
+
+    @property
+    def bytes_out(self):
+        return self.__framing.bytes_out
+
+    def __compress_block(self, block):
+        # Codec.compress can be called from several threads, it starts with the method chosen for the block
+        data = self.algorithm.compress(block)
+        return BLOCK_HEADER.pack(data[0], len(block), len(data) - 1) + memoryview(data)[1:]
+
+    async def __read_blocks(self, source):
+        reader = AsyncStreamReader(source)
+
+        while True:
+            block = await reader.read(self.block_size)
+
+            if not block:
+                return
+
+            yield block
+
+    async def compress(self, source):
+        """ Compresses the source lazily.
+
+        Parameters
+        ----------
+        source
+            An asyncio.StreamReader (or anything with a read coroutine) or an async iterable of bytes chunks.
+
+        Yields
+        ------
+        bytes
+            Pieces of the container, to be written in order.
+        """
+
+        loop = asyncio.get_running_loop()
+        pending = deque()
+
+        yield self.__framing.start()
+
+        try:
+            async for block in self.__read_blocks(source):
+                pending.append(loop.run_in_executor(self.executor, self.__compress_block, block))
+
+                if len(pending) >= self.window:
+                    frame = await pending.popleft()
+                    self.__framing.add_frame(frame)
+                    yield frame
+
+            while pending:
+                frame = await pending.popleft()
+                self.__framing.add_frame(frame)
+                yield frame
+        finally:
+            # When the consumer gives up, the blocks being compressed are not waited for
+            for future in pending:
+                future.cancel()
+
+        yield self.__framing.finish()
+
+    async def compress_to(self, source, writer):
+        """ Compresses the source into an asyncio.StreamWriter, waiting for it to drain after each piece.
+
+        Returns
+        -------
+        float
+            The compression rate, it can be negative when the input was not compressible.
+        """
+
+        async for piece in self.compress(source):
+            writer.write(piece)
+            await writer.drain()
+
+        if not self.bytes_in:
+            return 0
+
+        return 100 - self.bytes_out * 100 / self.bytes_in
+
+
+class AsyncDecompressor(object):
+    """ Decompresses an asynchronous stream created by StreamCompressor or AsyncCompressor block by block.
+
+    Attributes
+    ----------
+    executor : concurrent.futures.Executor
+        Where the blocks are decompressed, the default executor of the event loop (a thread pool) when None.
+
+    window : int
+        Maximum number of blocks being decompressed at the same time.
+
+    bytes_out : int
+        Number of bytes produced by the last decompression.
+
+    Notes
+    -----
+    Like AsyncCompressor, the blocks are decompressed by the executor and the source is only read as fast as the
+    output is consumed. Each thread of the executor decompresses the blocks with its own codecs, the dictionaries they
+    reference must be loaded (see compress.utils.dictionaries).
+    """
+
+    def __init__(self, executor=None, window=DEFAULT_WINDOW):
+
+        if window <= 0:
+            raise ValueError("The window must be positive.")
+
+        self.executor = executor
+        self.window = window
+        self.bytes_out = 0
+
+    @staticmethod
+    def decompress_block(method, payload, size):
+        """ Decompresses the payload of a single block, see StreamDecompressor.decompress_block. """
+
+        if method == BLOCK_STORED:
+            block = payload
+        else:
+            block = _get_thread_codec(method).decompress_block(payload)
+
+        if len(block) != size:
+            raise IOError("Corrupted block, expected {} bytes but got {}.".format(size, len(block)))
+
+        return block
+
+    @staticmethod
+    async def read_frames(reader):
+        """ Reads the blocks of a container until the end of the stream, see StreamDecompressor.read_frames. """
+
+        while True:
+            method, size, payload_size = BLOCK_HEADER.unpack(await reader.read_exactly(BLOCK_HEADER.size))
+
+            if size == 0:
+                return
+
+            yield method, size, await reader.read_exactly(payload_size)
+
+    async def decompress(self, source):
+        """ Decompresses the source lazily.
+
+        Parameters
+        ----------
+        source
+            An asyncio.StreamReader (or anything with a read coroutine) or an async iterable of bytes chunks.
+
+        Yields
+        ------
+        bytes
+            The uncompressed blocks, in order.
+        """
+
+        loop = asyncio.get_running_loop()
+        reader = AsyncStreamReader(source)
+        StreamDecompressor.parse_header(await reader.read_exactly(HEADER.size))
+        self.bytes_out = 0
+        pending = deque()
+
+        try:
+            # The index at the end is not needed when reading the blocks in order
+            async for method, size, payload in self.read_frames(reader):
+                pending.append(loop.run_in_executor(self.executor, self.decompress_block, method, payload, size))
+
+                if len(pending) >= self.window:
+                    block = await pending.popleft()
+                    self.bytes_out += len(block)
+                    yield block
+
+            while pending:
+                block = await pending.popleft()
+                self.bytes_out += len(block)
+                yield block
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def decompress_to(self, source, writer):
+        """ Decompresses the source into an asyncio.StreamWriter, waiting for it to drain after each block.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+
+        async for block in self.decompress(source):
+            writer.write(block)
+            await writer.drain()
+
+        return self.bytes_out
@@ -0,0 +1,15 @@
+from compress.algorithms.adaptive_huffman import AdaptiveHuffman
+from compress.algorithms.auto import Auto
+from compress.algorithms.huffman import Huffman
+from compress.algorithms.lzss import LZSS
+from compress.algorithms.lzw import LZW
+from compress.algorithms.pipeline import LZHuffman
+from compress.algorithms.range_coder import RangeCoder
+
+# Algorithms usable from the command line and from the containers, indexed by name and by identifier.
+ALGORITHMS = {algorithm.name: algorithm for algorithm in (Huffman, LZW, LZSS, LZHuffman, RangeCoder, AdaptiveHuffman,
+                                                         Auto)}
+
+# Auto has no identifier, the identifier of the algorithm it chose is stored instead
+ALGORITHMS_BY_ID = {algorithm.algorithm_id: algorithm for algorithm in ALGORITHMS.values()
+                    if algorithm.algorithm_id is not None}
@@ -0,0 +1,446 @@
+# coding: utf-8
+
+import os
+
+from compress.algorithms.codec import Codec, as_bytes_view
+from compress.utils.backends import get_backend
+from compress.utils.bitio import BitWriter
+from compress.utils.prefix_codes import DecodingTable, canonical_codes, code_lengths
+
+# Symbol written after the last byte, so the decoder knows the padding of the last byte isn't data
+END_OF_STREAM = 256
+
+# Size of the chunks read from files and streams, reads return as soon as some data is available
+READ_SIZE = 1 << 16
+
+
+class AdaptiveModel(object):
+    """ Frequencies of the symbols seen so far and the codes derived from them, both sides maintain the same model.
+
+    Parameters
+    ----------
+    max_interval : int
+        Maximum number of symbols between two rebuilds of the codes.
+
+    backend : PythonBackend
+        What counts the bytes.
+
+    decoding : bool
+        Whether decoding tables are needed.
+
+    Attributes
+    ----------
+    frequencies : list
+        Frequency of each of the 256 bytes and of END_OF_STREAM, they start at 1 so every symbol always has a code.
+
+    codes : list
+        The code of each symbol.
+
+    lengths : list
+        The bit length of the code of each symbol.
+
+    table : DecodingTable
+        Table decoding the current codes, only built when decoding.
+
+    remaining : int
+        Number of symbols to encode or decode before the codes are rebuilt.
+    """
+
+    # The codes are rebuilt after this number of symbols, then the interval doubles up to max_interval, so the first
+    # bytes don't wait long for suitable codes
+    FIRST_INTERVAL = 256
+
+    # Frequencies are halved when their total goes above this, so the codes follow the data when it changes
+    MAX_TOTAL = 1 << 16
+
+    # Rebuilding happens often, the tables are smaller than DecodingTable's default so it is fast
+    TABLE_BITS = 10
+
+    def __init__(self, max_interval, backend, decoding=False):
+        self.frequencies = [1] * (END_OF_STREAM + 1)
+        self.max_interval = max_interval
+        self.backend = backend
+        self.decoding = decoding
+        self.interval = min(self.FIRST_INTERVAL, max_interval)
+        self.remaining = self.interval
+        self.codes = None
+        self.lengths = None
+        self.table = None
+        self.rebuild()
+
+    def rebuild(self):
+        """ Derives canonical codes from the current frequencies. """
+
+        self.lengths = code_lengths(self.frequencies)
+        codes = canonical_codes(self.lengths)
+        self.codes = [codes[symbol][0] for symbol in range(len(self.lengths))]
+
+        if self.decoding:
+            self.table = DecodingTable(codes, self.TABLE_BITS)
+
+    def update(self, data):
+        """ Counts bytes which have just been encoded or decoded, the codes are rebuilt when the interval is over.
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes, they must not be more than remaining.
+        """
+
+        for byte, count in enumerate(self.backend.byte_histogram(data)):
+            if count:
+                self.frequencies[byte] += count
+
+        self.remaining -= len(data)
+
+        if self.remaining:
+            return
+
+        if sum(self.frequencies) > self.MAX_TOTAL:
+            self.frequencies = [(frequency + 1) // 2 for frequency in self.frequencies]
+
+        self.interval = min(self.interval * 2, self.max_interval)
+        self.remaining = self.interval
+        self.rebuild()
+
+
+class AdaptiveHuffmanEncoder(object):
+    """ Compresses a stream piece by piece, see AdaptiveHuffman.
+
+    Parameters
+    ----------
+    max_interval_bits : int
+        The codes are rebuilt at least every 2 ** max_interval_bits bytes.
+
+    backend : PythonBackend
+        What counts and encodes the bytes.
+    """
+
+    def __init__(self, max_interval_bits, backend):
+        self.__model = AdaptiveModel(1 << max_interval_bits, backend)
+        self.__backend = backend
+        self.__writer = BitWriter()
+        self.__writer.write(max_interval_bits, 8)
+        self.__flushed = False
+
+    def compress(self, data):
+        """ Compresses the next piece of the stream.
+
+        Parameters
+        ----------
+        data
+            The bytes, any object supporting the buffer protocol.
+
+        Returns
+        -------
+        bytes
+            The compressed bytes available so far, only the bits which don't fill a byte yet are held back.
+        """
+
+        if self.__flushed:
+            raise ValueError("The stream has been flushed already.")
+
+        data = as_bytes_view(data)
+        model = self.__model
+        position = 0
+
+        while position < len(data):
+            segment = data[position:position + model.remaining]
+            self.__backend.encode(segment, model.codes, model.lengths, self.__writer)
+            model.update(segment)
+            position += len(segment)
+
+        return self.__writer.take_bytes()
+
+    def flush(self):
+        """ Ends the stream.
+
+        Returns
+        -------
+        bytes
+            The last compressed bytes.
+        """
+
+        if not self.__flushed:
+            self.__flushed = True
+            self.__writer.write(self.__model.codes[END_OF_STREAM], self.__model.lengths[END_OF_STREAM])
+
+        return self.__writer.getvalue()
+
+
+class AdaptiveHuffmanDecoder(object):
+    """ Decompresses a stream piece by piece, see AdaptiveHuffman.
+
+    Attributes
+    ----------
+    finished : bool
+        Whether the end of the stream has been decoded.
+    """
+
+    def __init__(self, backend):
+        self.finished = False
+        self.__backend = backend
+        self.__model = None  # The interval is only known once the first byte is received
+        self.__buffer = bytearray()
+        self.__position = 0
+
+    def decompress(self, data):
+        """ Decompresses the next piece of the stream.
+
+        Parameters
+        ----------
+        data
+            The compressed bytes, any object supporting the buffer protocol, they can be cut anywhere.
+
+        Returns
+        -------
+        bytes
+            The bytes decoded so far, a code is only decoded once all its bits have been received.
+        """
+
+        if self.finished:
+            if len(data):
+                raise IOError("Unexpected data after the end of the stream.")
+
+            return b""
+
+        self.__buffer += data
+
+        if self.__model is None:
+            if not self.__buffer:
+                return b""
+
+            max_interval_bits = self.__buffer[0]
+
+            if not 8 <= max_interval_bits <= 24:
+                raise IOError("Invalid adaptive Huffman stream, interval of 2 ** {} bytes.".format(max_interval_bits))
+
+            self.__model = AdaptiveModel(1 << max_interval_bits, self.__backend, decoding=True)
+            self.__position = 8
+
+        model = self.__model
+        end = len(self.__buffer) * 8
+        decompressed = bytearray()
+
+        while True:
+            symbols, position = model.table.decode_symbols(self.__buffer, self.__position, end, model.remaining)
+
+            if not symbols:
+                break
+
+            if END_OF_STREAM in symbols:
+                decompressed += bytes(symbols[:symbols.index(END_OF_STREAM)])
+                self.finished = True
+                break
+
+            block = bytes(symbols)
+            decompressed += block
+            self.__position = position
+            model.update(block)
+
+        # The bytes which have been entirely decoded are not needed anymore
+        consumed = self.__position >> 3
+        del self.__buffer[:consumed]
+        self.__position -= consumed << 3
+
+        return bytes(decompressed)
+
+
+class AdaptiveHuffman(Codec):
+    """ Huffman coding in a single pass, for streams which can't be read twice or must be sent as soon as possible.
+
+    Attributes
+    ----------
+    max_interval_bits : int
+        The codes are rebuilt at least every 2 ** max_interval_bits bytes.
+
+    backend : PythonBackend
+        What counts and encodes the bytes (see compress.utils.backends).
+
+    Notes
+    -----
+    Instead of counting all the bytes before encoding them (see Huffman), both the encoder and the decoder start with
+    the same codes and count the bytes as they go. The codes are rebuilt from the counts after 256 bytes, then after
+    twice as many bytes each time up to 2 ** max_interval_bits, which is a lot cheaper than updating the tree after
+    each byte like the FGK and Vitter algorithms do. Counts are halved from time to time so the codes follow the data
+    when it changes. Nothing but the counts is stored, so the memory used doesn't depend on the size of the stream,
+    and the compressed bytes are available as soon as their codes are known.
+
+    The stream starts with max_interval_bits on 8 bits and ends with a code marking its end, followed by the padding.
+    """
+
+    algorithm_id = 3
+    name = "adaptive-huffman"
+    parameters = ("max_interval_bits",)
+
+    def __init__(self, verbose=False, max_interval_bits=15, backend=None):
+        """
+        Parameters
+        ----------
+        verbose : bool
+            Set verbose mode to understand what's underneath.
+
+        max_interval_bits : int
+            Between 8 and 24, the bigger the interval the faster but the slower the codes adapt.
+
+        backend : str
+            Name of the backend, see compress.utils.backends.get_backend.
+        """
+
+        if not 8 <= max_interval_bits <= 24:
+            raise ValueError("The interval must be between 2 ** 8 and 2 ** 24 bytes.")
+
+        super().__init__()
+        self.verbose = verbose
+        self.max_interval_bits = max_interval_bits
+        self.backend = get_backend(backend)
+
+    def encoder(self):
+        """ Returns a new AdaptiveHuffmanEncoder, to compress a stream piece by piece. """
+
+        return AdaptiveHuffmanEncoder(self.max_interval_bits, self.backend)
+
+    def decoder(self):
+        """ Returns a new AdaptiveHuffmanDecoder, to decompress a stream piece by piece. """
+
+        return AdaptiveHuffmanDecoder(self.backend)
+
+    def compress_block(self, block):
+        """ Compresses a block of bytes.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress.
+
+        Returns
+        -------
+        bytes
+            The compressed stream.
+        """
+
+        with self.measure("compress", len(block)) as stats:
+            with self.phase("encode"):
+                encoder = self.encoder()
+                payload = encoder.compress(block) + encoder.flush()
+
+            stats.bytes_out = len(payload)
+
+        return payload
+
+    def decompress_block(self, payload):
+        """ Decompresses a payload created by compress_block.
+
+        Parameters
+        ----------
+        payload : bytes
+            The compressed stream.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        with self.measure("decompress", len(payload)) as stats:
+            with self.phase("decode"):
+                decoder = self.decoder()
+                decompressed = decoder.decompress(payload)
+
+            if not decoder.finished:
+                raise IOError("Truncated adaptive Huffman stream.")
+
+            stats.bytes_out = len(decompressed)
+
+        return decompressed
+
+    def compress_stream(self, input_file, output_file):
+        """ Compresses a binary file-like object into another one, writing the output as soon as it is produced.
+
+        Returns
+        -------
+        tuple
+            The number of bytes read and written.
+        """
+
+        encoder = self.encoder()
+        read = getattr(input_file, "read1", input_file.read)  # read1 doesn't wait for the whole size to be available
+        bytes_in = bytes_out = 0
+
+        while True:
+            chunk = read(READ_SIZE)
+
+            if not chunk:
+                break
+
+            compressed = encoder.compress(chunk)
+            output_file.write(compressed)
+            output_file.flush()
+            bytes_in += len(chunk)
+            bytes_out += len(compressed)
+
+        compressed = encoder.flush()
+        output_file.write(compressed)
+        output_file.flush()
+
+        return bytes_in, bytes_out + len(compressed)
+
+    def decompress_stream(self, input_file, output_file):
+        """ Decompresses a binary file-like object into another one, writing the output as soon as it is decoded.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+
+        decoder = self.decoder()
+        read = getattr(input_file, "read1", input_file.read)
+        bytes_out = 0
+
+        while True:
+            chunk = read(READ_SIZE)
+
+            if not chunk:
+                break
+
+            decompressed = decoder.decompress(chunk)
+            output_file.write(decompressed)
+            output_file.flush()
+            bytes_out += len(decompressed)
+
+        if not decoder.finished:
+            raise IOError("Truncated adaptive Huffman stream.")
+
+        return bytes_out
+
+    def compress_file(self, input_filename, output_filename):
+
+        with self.measure("compress", 0) as stats:
+            with open(input_filename, "rb") as input_file, open(output_filename, "wb") as output_file:
+                input_size, total_file_size = self.compress_stream(input_file, output_file)
+
+            stats.bytes_in = input_size
+            stats.bytes_out = total_file_size
+
+            if self.verbose:
+                print("Input size : {} bytes, output : {} bytes".format(input_size, total_file_size))
+
+            if input_size <= total_file_size:
+                os.remove(output_filename)
+                raise Exception("Aborted. No gain, you shouldn't compress that file. (+{} bytes)".format(
+                    total_file_size - input_size))
+
+            compression_rate = 100 - total_file_size * 100 / input_size
+
+            # Print anyway, even when not in verbose mode
+            print("Compression gain : {0:.2f}%".format(compression_rate))
+
+        return compression_rate
+
+    def decompress_file(self, input_filename, output_filename):
+
+        with self.measure("decompress", 0) as stats:
+            with open(input_filename, "rb") as input_file, open(output_filename, "wb") as output_file:
+                stats.bytes_out = self.decompress_stream(input_file, output_file)
+                stats.bytes_in = input_file.tell()
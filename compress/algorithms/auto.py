@@ -0,0 +1,273 @@
+# coding: utf-8
+
+from math import log2
+
+from compress.algorithms.codec import Codec, METHOD_STORED, as_bytes_view
+from compress.algorithms.huffman import Huffman
+from compress.algorithms.lzw import LZW
+from compress.utils.backends import get_backend
+from compress.utils.bitio import BitWriter
+from compress.utils.prefix_codes import code_lengths, write_code_lengths
+
+
+def entropy(histogram):
+    """ Computes the order 0 entropy of bytes from their histogram.
+
+    Parameters
+    ----------
+    histogram : list
+        The number of occurrences of each byte.
+
+    Returns
+    -------
+    float
+        The average number of bits per byte a code based on the frequencies of the bytes can reach, between 0 and 8.
+    """
+
+    total = sum(histogram)
+
+    if not total:
+        return 0
+
+    return -sum(count / total * log2(count / total) for count in histogram if count)
+
+
+def huffman_size(histogram, dictionary=None):
+    """ Computes the size of the canonical Huffman payload of bytes from their histogram, without encoding them.
+
+    Parameters
+    ----------
+    histogram : list
+        The number of occurrences of each of the 256 bytes.
+
+    dictionary : Dictionary
+        Dictionary giving the codes, they are computed from the histogram otherwise.
+
+    Returns
+    -------
+    int
+        The size of the payload in bytes : the marker, the padding size, the code lengths (or the identifier of the
+        dictionary) and the codes.
+    """
+
+    if dictionary is None:
+        lengths = code_lengths(histogram)
+        header = BitWriter()
+        write_code_lengths(header, lengths)
+        header_bits = header.bits_written
+    else:
+        lengths = dictionary.code_lengths
+        header_bits = 16 + 32
+
+    total_bits = 8 + 3 + header_bits + sum(count * length for count, length in zip(histogram, lengths))
+    return (total_bits + 7) // 8
+
+
+class Auto(Codec):
+    """ Chooses for each block between Huffman, LZW and storing it as is.
+
+    Attributes
+    ----------
+    codecs : dict
+        The Huffman and LZW instances compressing the blocks, by identifier.
+
+    max_entropy : float
+        Blocks with an entropy above this number of bits per byte are stored without trying to compress them.
+
+    trial : bool
+        Whether LZW is tried on a sample of the blocks, otherwise LZW is never used.
+
+    sample_size : int
+        Number of bytes of a block LZW is tried on.
+
+    choices : dict
+        Number of blocks compressed with each method since the instance was created, METHOD_STORED included.
+
+    Notes
+    -----
+    The histogram of a block gives its entropy, and the exact size Huffman would compress it to since the code lengths
+    can be computed without encoding anything. Data which is already compressed (images, archives, videos...) has an
+    entropy close to 8 bits per byte, such blocks are stored right away so no time is wasted on them. LZW takes
+    advantage of repeated sequences, which the histogram doesn't tell about : it compresses the first sample_size bytes
+    of the block and its ratio is compared with Huffman's. The winner compresses the block, which is stored as is when
+    it didn't get smaller, so compressing never fails nor grows the data by more than the block header.
+
+    compress_block returns the chosen method on a byte followed by its payload. The containers (see compress.stream)
+    record the method in the block header instead, so decompressing a block doesn't need this class.
+    """
+
+    algorithm_id = None  # The blocks are decompressed by the algorithm which was chosen
+    name = "auto"
+    parameters = ("trial", "sample_size", "max_entropy")
+    supports_dictionary = True
+
+    def __init__(self, verbose=False, trial=True, sample_size=1 << 16, max_entropy=7.9, backend=None,
+                 dictionary=None):
+        """
+        Parameters
+        ----------
+        verbose : bool
+            Set verbose mode to understand what's underneath.
+
+        trial : bool
+            Whether LZW is tried on a sample of each block.
+
+        sample_size : int
+            Number of bytes of a block LZW is tried on, the whole block when it is smaller.
+
+        max_entropy : float
+            Entropy in bits per byte above which blocks are stored.
+
+        backend : str
+            Name of the backend counting and encoding the bytes, see compress.utils.backends.get_backend.
+
+        dictionary : Dictionary
+            Dictionary used by both algorithms, see compress.utils.dictionaries.
+        """
+
+        if sample_size <= 0:
+            raise ValueError("The sample size must be positive.")
+
+        super().__init__()
+        self.verbose = verbose
+        self.trial = trial
+        self.sample_size = sample_size
+        self.max_entropy = max_entropy
+        self.backend = get_backend(backend)
+        self.dictionary = dictionary
+        self.codecs = {
+            Huffman.algorithm_id: Huffman(backend=backend, dictionary=dictionary),
+            LZW.algorithm_id: LZW(dictionary=dictionary),
+        }
+        self.choices = dict.fromkeys((METHOD_STORED,) + tuple(self.codecs), 0)
+
+    def __choose(self, block):
+        """ Returns the method which should compress the block best, and its payload when it is already known. """
+
+        with self.phase("entropy"):
+            histogram = self.backend.byte_histogram(block)
+            bits_per_byte = entropy(histogram)
+
+        if bits_per_byte > self.max_entropy:
+            if self.verbose:
+                print("Entropy of {:.3f} bits per byte, the block is stored.".format(bits_per_byte))
+
+            return METHOD_STORED, None
+
+        estimated_size = huffman_size(histogram, self.codecs[Huffman.algorithm_id].dictionary)
+        method = Huffman.algorithm_id
+
+        if not self.trial:
+            return method, None
+
+        with self.phase("trial"):
+            sample = block[:self.sample_size]
+            payload = self.codecs[LZW.algorithm_id].compress_block(sample)
+
+        if self.verbose:
+            print("Entropy of {:.3f} bits per byte, Huffman ratio {:.3f}, LZW ratio on {} bytes {:.3f}".format(
+                bits_per_byte, estimated_size / len(block), len(sample), len(payload) / len(sample)))
+
+        if len(payload) / len(sample) < estimated_size / len(block):
+            # The sample is the whole block when it is small, its payload is kept
+            return LZW.algorithm_id, payload if len(sample) == len(block) else None
+
+        return method, None
+
+    def compress_method(self, block):
+        """ Compresses a block with the method which suits it best.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        tuple
+            The identifier of the algorithm used, or METHOD_STORED, and the payload.
+        """
+
+        block = as_bytes_view(block)
+
+        with self.measure("compress", len(block)) as stats:
+            method, payload = self.__choose(block)
+
+            if method != METHOD_STORED and payload is None:
+                with self.phase("compress"):
+                    payload = self.codecs[method].compress_block(block)
+
+            if method == METHOD_STORED or len(payload) >= len(block):
+                method, payload = METHOD_STORED, bytes(block)
+
+            self.choices[method] += 1
+            stats.bytes_out = len(payload)
+
+        return method, payload
+
+    def compress_block(self, block):
+        """ Compresses a block of bytes.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        bytes
+            The identifier of the chosen algorithm, or METHOD_STORED, on a byte followed by its payload.
+        """
+
+        method, payload = self.choose_method(block)
+        return bytes((method,)) + payload
+
+    def decompress_block(self, payload):
+        """ Decompresses a payload created by compress_block.
+
+        Parameters
+        ----------
+        payload : bytes
+            The method on a byte followed by its payload.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        payload = as_bytes_view(payload)
+
+        if not payload:
+            raise IOError("Compressed data can't be empty.")
+
+        return self.decompress_method(payload[0], payload[1:])
+
+    def decompress_method(self, method, payload):
+        """ Decompresses a payload with the algorithm which compressed it.
+
+        Parameters
+        ----------
+        method : int
+            The identifier of the algorithm which compressed the payload, or METHOD_STORED.
+
+        payload : bytes
+            The compressed payload.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        with self.measure("decompress", len(payload) + 1) as stats:
+            if method == METHOD_STORED:
+                block = bytes(payload)
+            elif method in self.codecs:
+                block = self.codecs[method].decompress_block(payload)
+            else:
+                raise IOError("Unknown compression method {}.".format(method))
+
+            stats.bytes_out = len(block)
+
+        return block
@@ -0,0 +1,248 @@
+# coding: utf-8
+
+import threading
+
+from compress.utils.stats import Instrumented
+
+# First byte of the data returned by Codec.compress when it is stored as is, the other values are algorithm identifiers
+METHOD_STORED = 0
+
+
+def as_bytes_view(data):
+    """ Returns a memoryview of the bytes of any object supporting the buffer protocol, without copying them.
+
+    Parameters
+    ----------
+    data
+        bytes, bytearray, memoryview, mmap, array.array, NumPy array...
+
+    Returns
+    -------
+    memoryview
+        A view of unsigned bytes.
+    """
+
+    view = memoryview(data)
+    return view if view.format == "B" and view.ndim == 1 else view.cast("B")
+
+
+class Codec(Instrumented):
+    """ Codec is an abstract class which represents a compression algorithm.
+
+    Every algorithm is able to compress a block of bytes into a self-contained payload and to decompress such a
+    payload back. The containers (see compress.stream) only rely on this interface to frame the blocks.
+
+    Attributes
+    ----------
+    algorithm_id : int
+        Identifier of the algorithm, stored in the containers so the right codec is used to decompress a block.
+
+    name : str
+        Name of the algorithm as used on the command line.
+
+    parameters : tuple
+        Names of the attributes which change the payloads, they are part of the cache keys.
+
+    supports_dictionary : bool
+        Whether the algorithm can be created with a dictionary (see compress.utils.dictionaries).
+
+    cache : CompressionCache
+        When set, compressed blocks and files are looked up in it before being compressed (see compress.cache).
+
+    Notes
+    -----
+    compress and decompress are the API to use from other programs : they never print (unless verbose is set), accept
+    empty data and any object supporting the buffer protocol, and an instance can be shared between threads.
+
+    Every call to compress_block, decompress_block, compress_file or decompress_file records its statistics in the
+    stats attribute (see compress.utils.stats), implementations measure their phases with self.phase. Blocks found in
+    the cache are not compressed, so they are not measured.
+    """
+
+    algorithm_id = None
+    name = None
+    parameters = ()
+    supports_dictionary = False
+
+    def __init__(self):
+        super().__init__()
+        self.cache = None
+
+        # The implementations keep their state in the instance (tree, dictionary, statistics...)
+        self.__lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks can't be pickled, the worker processes of ParallelCompressor and ArchiveCompressor get their own
+        state = self.__dict__.copy()
+        del state["_Codec__lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    def cache_key(self):
+        """ Returns what, besides the data, determines the payloads : the name of the algorithm, the value of its
+        parameters and the identifier of its dictionary. """
+
+        dictionary = getattr(self, "dictionary", None)
+        return (self.name,) + tuple(getattr(self, name) for name in self.parameters) + \
+            (None if dictionary is None else dictionary.dictionary_id,)
+
+    def compress(self, data):
+        """ Compresses bytes in memory.
+
+        Parameters
+        ----------
+        data
+            The bytes to compress, any object supporting the buffer protocol. It can be empty.
+
+        Returns
+        -------
+        bytes
+            The identifier of the algorithm followed by the payload, or METHOD_STORED followed by the data when the
+            algorithm can't make it smaller.
+        """
+
+        data = as_bytes_view(data)
+
+        if not data:
+            return bytes((METHOD_STORED,))
+
+        with self.__lock:
+            method, payload = self.choose_method(data)
+
+        return bytes((method,)) + payload
+
+    def decompress(self, data):
+        """ Decompresses bytes created by compress.
+
+        Parameters
+        ----------
+        data
+            The compressed bytes, any object supporting the buffer protocol.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        data = as_bytes_view(data)
+
+        if not data:
+            raise IOError("Compressed data can't be empty.")
+
+        if data[0] == METHOD_STORED:
+            return bytes(data[1:])
+
+        with self.__lock:
+            return self.decompress_method(data[0], data[1:])
+
+    def choose_method(self, block):
+        """ Compresses a block, or keeps it as is when the algorithm can't make it smaller. When the block is in the
+        cache, it is not compressed again.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        tuple
+            The identifier of the algorithm, or METHOD_STORED, and the payload.
+        """
+
+        if self.cache is None:
+            return self.compress_method(block)
+
+        def compute():
+            method, payload = self.compress_method(block)
+            return bytes((method,)) + payload
+
+        compressed = self.cache.lookup(block, ("method",) + self.cache_key(), compute)
+        return compressed[0], compressed[1:]
+
+    def compress_block_cached(self, block):
+        """ Same as compress_block, but the payload is taken from the cache when the block is in it. """
+
+        if self.cache is None:
+            return self.compress_block(block)
+
+        return self.cache.lookup(block, ("block",) + self.cache_key(), lambda: self.compress_block(block))
+
+    def compress_method(self, block):
+        """ Compresses a block, or keeps it as is when the algorithm can't make it smaller, see choose_method.
+        Algorithms choosing between several methods (see Auto) override it.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        tuple
+            The identifier of the algorithm, or METHOD_STORED, and the payload.
+        """
+
+        payload = self.compress_block(block)
+
+        if len(payload) < len(block):
+            return self.algorithm_id, payload
+
+        return METHOD_STORED, bytes(block)
+
+    def decompress_method(self, method, payload):
+        """ Decompresses a payload created by compress_method, other than METHOD_STORED. Algorithms choosing between
+        several methods (see Auto) override it.
+
+        Parameters
+        ----------
+        method : int
+            The identifier of the algorithm which compressed the payload.
+
+        payload : bytes
+            The compressed payload.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        if method != self.algorithm_id:
+            raise IOError("Data compressed with method {} can't be decompressed with {}.".format(method, self.name))
+
+        return self.decompress_block(payload)
+
+    def compress_block(self, block):
+        """ Compresses a block of bytes.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        bytes
+            The compressed payload, it may be bigger than the input.
+        """
+        raise NotImplementedError("This method needs to be overwritten.")
+
+    def decompress_block(self, payload):
+        """ Decompresses a payload created by compress_block.
+
+        Parameters
+        ----------
+        payload : bytes
+            The compressed payload.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+        raise NotImplementedError("This method needs to be overwritten.")
@@ -1,6 +1,12 @@
 # coding: utf-8
 
-from compress.utils.binary_tree import *
+from compress.algorithms.codec import Codec
+from compress.utils.backends import get_backend
+from compress.utils.binary_tree import BinaryTree, Node
+from compress.utils.bitio import BitReader, BitWriter, map_file
+from compress.utils.dictionaries import get_dictionary
+from compress.utils.prefix_codes import DecodingTable, canonical_codes, canonical_decoding_table, code_lengths, \
+    read_code_lengths, write_code_lengths
 
 
 class HuffmanNode(Node):
@@ -13,6 +19,8 @@ class HuffmanNode(Node):
 
     """
 
+    __slots__ = ("frequency",)
+
     def __init__(self, frequency=0, value=None):
         super().__init__(value)
         self.frequency = frequency
@@ -27,7 +35,7 @@ class HuffmanNode(Node):
         return "<{}> ( {} {} )".format(self.frequency, self.left, self.right)
 
 
-class Huffman(BinaryTree):
+class Huffman(BinaryTree, Codec):
     """ This class is an implementation of the Huffman compression algorithm.
 
     Attributes
@@ -36,25 +44,51 @@ class Huffman(BinaryTree):
         Association between a byte and its number occurrences.
 
     huffman_code : dict
-        Association between a byte and its new code.
+        Association between a byte and its new code, as a tuple made of the code and its bit length.
 
     encoded_tree : str
         Contains the tree in a minimalist representation. This is a binary string that will be converted
 
+    canonical : bool
+        Whether canonical codes are used. Instead of the tree, only the length of the code of each byte is stored and
+        the codes are derived from the lengths. It makes the header much smaller.
+
+    backend : PythonBackend
+        What counts and encodes the bytes, NumPy is used when it is installed (see compress.utils.backends).
+
+    dictionary : Dictionary
+        When set, the codes of the dictionary are used instead of codes computed for each payload, so no header is
+        stored, only the identifier of the dictionary (see train and compress.utils.dictionaries).
+
     Notes
     -----
     The method we have chosen to use here is semi-adaptive because it will build a tree based on actual frequencies
     instead of using static symbols weights.
     (but it will not dynamically change the tree like the real adaptive algorithm
-    https://en.wikipedia.org/wiki/Adaptive_Huffman_coding ).
+    https://en.wikipedia.org/wiki/Adaptive_Huffman_coding , see AdaptiveHuffman for a single pass variant).
     The problem with this method is that we have to transmit the tree with the encoded content in order to decompress.
     The tree can't be bigger than 256 leaves, which means this method will be good to compress big chunks of data but
-    it will be inefficient to compress small ones.
+    it will be inefficient to compress small ones. The canonical mode mitigates this, the code lengths are stored in
+    about 2 bits per byte instead of 10 bits per leaf for the tree. Canonical payloads start with a 0 byte, which the
+    tree format can't start with since it is padded with zeros followed by a 1, so both formats can be decompressed.
+    Payloads compressed with a dictionary are canonical payloads whose code lengths header is empty (which can't happen
+    otherwise) followed by the 32 bits identifier of the dictionary.
     """
 
-    def __init__(self, verbose=False):
+    algorithm_id = 1
+    name = "huffman"
+    parameters = ("canonical",)
+    supports_dictionary = True
+
+    # First byte of the canonical payloads
+    CANONICAL_MARKER = 0
+
+    def __init__(self, verbose=False, canonical=True, backend=None, dictionary=None):
         super().__init__()
         self.verbose = verbose
+        self.canonical = canonical
+        self.backend = get_backend(backend)
+        self.dictionary = dictionary
         self.bytes_occurrences = {}
         self.huffman_code = {}
         self.encoded_tree = None
@@ -95,101 +129,253 @@ class Huffman(BinaryTree):
         self.bytes_occurrences.clear()
 
         # Count bytes
-        for byte in bytes_list:
-            try:
-                self.bytes_occurrences[byte] += 1
-            except KeyError:
-                self.bytes_occurrences[byte] = 1
+        for byte, count in enumerate(self.backend.byte_histogram(bytes_list)):
+            if count:
+                self.bytes_occurrences[byte] = count
 
-    def __create_huffman_code(self, node, code=""):
+    def __create_huffman_code(self, root_node):
 
-        if node.is_leaf():
-            self.huffman_code[node.value] = code
+        # Nodes to visit along with their code, a list is used as a stack rather than recursing
+        stack = [(root_node, 0, 0)]
 
-        else:
-            self.__create_huffman_code(node.left, code + "0")
-            self.__create_huffman_code(node.right, code + "1")
+        while stack:
+            node, code, length = stack.pop()
+
+            if node.is_leaf():
+                self.huffman_code[node.value] = (code, length)
+            else:
+                stack.append((node.right, (code << 1) | 1, length + 1))
+                stack.append((node.left, code << 1, length + 1))
+
+    def __create_tree_from_code(self):
+
+        # Each code is the path from the root to its leaf, 0 goes left and 1 goes right
+        self.root_node = self.create_node()
 
-    def build_tree_from(self, binary_string):
+        for byte, (code, length) in self.huffman_code.items():
+            node = self.root_node
+
+            for shift in range(length - 1, -1, -1):
+                if (code >> shift) & 1:
+                    if node.right is None:
+                        node.right = self.create_node()
+
+                    node = node.right
+                else:
+                    if node.left is None:
+                        node.left = self.create_node()
+
+                    node = node.left
+
+            node.value = byte
+
+    def build_tree_from(self, reader):
         """ Recreates the tree when minimized by the traversal_actions and stored to a file.
 
-        Attributes
+        Parameters
         ----------
-        binary_string : str
-            Contains the bits from the whole file.
+        reader : BitReader
+            Reader positioned on the first bit of the tree, it is left on the bit following the tree.
         """
         self.root_node = self.create_node()
         self.root_node.value = 0
-        return self.__build_tree_from(binary_string, self.root_node)
+        self.__build_tree_from(reader, self.root_node)
 
-    def __build_tree_from(self, binary_string, current_node, current_index=0):
+    def __build_tree_from(self, reader, current_node):
         current_node.left = self.create_node()
         current_node.right = self.create_node()
 
-        bit = binary_string[current_index]
+        for child in (current_node.left, current_node.right):
 
-        if bit == "1":
-            # We grab the 8 bits following the 1
-            current_node.left.value = int(binary_string[current_index + 1:current_index + 1 + 8], 2)
-            current_index += 9  # Skip the 1 and the 8 following bits
+            if reader.read(1):
+                # A 1 is followed by the 8 bits of the leaf byte
+                child.value = reader.read(8)
+            else:
+                child.value = 0
+                self.__build_tree_from(reader, child)
 
-        else:
-            current_node.left.value = 0
-            current_index = self.__build_tree_from(binary_string, current_node.left, current_index+1)
-
-        bit = binary_string[current_index]
-
-        if bit == "1":
-            # We grab the 8 bits following the 1
-            current_node.right.value = int(binary_string[current_index + 1:current_index + 1 + 8], 2)
-            current_index += 9  # Skip the 1 and the 8 following bits
-        else:
-            current_node.right.value = 0
-            current_index = self.__build_tree_from(binary_string, current_node.right, current_index+1)
+    def __create_code(self, bytes_list):
 
-        return current_index
+        with self.phase("histogram"):
+            self.__find_bytes_occurrences(bytes_list)
 
-    def __compress(self, bytes_list):
+        self.__create_code_from_occurrences()
 
-        self.__find_bytes_occurrences(bytes_list)
+    def __create_code_from_occurrences(self):
 
         if self.verbose:
             print("Occurrences: " + str(self.bytes_occurrences))
             print("Number of different bytes : {}".format(len(self.bytes_occurrences)))
 
-        self.build_tree([HuffmanNode(self.bytes_occurrences[byte], byte) for byte in self.bytes_occurrences])
+        with self.phase("tree"):
+            histogram = [0] * 256
 
-        if self.verbose:
-            print("Tree: " + str(self.root_node))
+            for byte, count in self.bytes_occurrences.items():
+                histogram[byte] = count
+
+            # The lengths are computed on an array-backed tree (see HuffmanTree) and limited to MAX_CODE_LENGTH bits
+            lengths = code_lengths(histogram)
+
+            if len(self.bytes_occurrences) == 1:
+                # The root node must not be a leaf, otherwise the only byte would have an empty code. Add a fake byte
+                # that never occurs so the tree has 2 leaves.
+                lengths[(next(iter(self.bytes_occurrences)) + 1) % 256] = 1
 
-        self.__create_huffman_code(self.root_node)
+        with self.phase("code"):
+            # The codes are derived from the lengths, so they are the same whether the tree or the lengths are stored
+            self.huffman_code = canonical_codes(lengths)
+
+            if not self.canonical:
+                self.__create_tree_from_code()
+
+        if self.verbose and not self.canonical:
+            print("Tree: " + str(self.root_node))
 
         if self.verbose:
             print("Code: " + str(self.huffman_code))
 
-        encoded_string = "1"  # Padding needed to convert to bytes, otherwise we will lose information (the first zeros)
+    def __code_lengths(self):
+        lengths = [0] * 256
 
-        for byte in bytes_list:
-            encoded_string += self.huffman_code[byte]
+        for byte, (code, length) in self.huffman_code.items():
+            lengths[byte] = length
 
-        # Convert to bytes array
-        return int(encoded_string, 2).to_bytes((len(encoded_string) + 7) // 8, byteorder='big')
+        return lengths
 
-    def compress_file(self, input_filename, output_filename):
+    def __encode(self, bytes_list, writer):
+        codes = [0] * 256
+        lengths = [0] * 256
 
-        if self.verbose:
-            print("Reading {}...".format(input_filename))
+        for byte, (code, length) in self.huffman_code.items():
+            codes[byte] = code
+            lengths[byte] = length
 
-        with open(input_filename, "rb") as input_file:
-            bytes_list = input_file.read()  # All the file will be in memory, can be a problem with huge files.
+        # The backends pack the bits as they encode, both are measured at once
+        with self.phase("encode"):
+            self.backend.encode(bytes_list, codes, lengths, writer)
 
-        if not bytes_list:
-            raise IOError("File is empty !")
+    def __encoded_bits(self):
+        return sum(self.bytes_occurrences[byte] * self.huffman_code[byte][1] for byte in self.bytes_occurrences)
 
-        if self.verbose:
-            print("Input size : ", len(bytes_list))
+    def train(self, samples):
+        """ Computes codes suited to data looking like the samples, to be stored in a Dictionary.
+
+        Parameters
+        ----------
+        samples : iterable
+            Bytes-like objects.
+
+        Returns
+        -------
+        list
+            The code length of each of the 256 bytes. Bytes absent from the samples get a code too, so any data can be
+            compressed with these codes.
+        """
+
+        histogram = [1] * 256  # Every byte is counted once more so it gets a code
+
+        for sample in samples:
+            if sample:
+                for byte, count in enumerate(self.backend.byte_histogram(sample)):
+                    histogram[byte] += count
+
+        self.bytes_occurrences = dict(enumerate(histogram))
+        self.__create_code_from_occurrences()
+        return self.__code_lengths()
+
+    def __dictionary_codes(self):
+        try:
+            return self.dictionary.cache["huffman"]
+        except KeyError:
+            pass
+
+        codes = [0] * 256
+
+        for byte, (code, length) in canonical_codes(self.dictionary.code_lengths).items():
+            codes[byte] = code
+
+        return self.dictionary.cache.setdefault("huffman", (codes, list(self.dictionary.code_lengths)))
+
+    def __compress_with_dictionary(self, bytes_list):
+
+        codes, lengths = self.__dictionary_codes()
+
+        with self.phase("histogram"):
+            self.__find_bytes_occurrences(bytes_list)
 
-        compressed = self.__compress(bytes_list)
+        # Same layout as canonical payloads, an empty header replaces the code lengths
+        total_bits = 8 + 3 + 16 + 32 + sum(count * lengths[byte] for byte, count in self.bytes_occurrences.items())
+
+        writer = BitWriter()
+        writer.write(self.CANONICAL_MARKER, 8)
+        writer.write((-total_bits) % 8, 3)
+        writer.write(0, 16)
+        writer.write(self.dictionary.dictionary_id, 32)
+
+        with self.phase("encode"):
+            self.backend.encode(bytes_list, codes, lengths, writer)
+
+        return writer.getvalue()
+
+    def __compress(self, bytes_list):
+
+        # The content starts with a 1 so the decoder knows where the first zeros are, and it is padded with zeros on the
+        # left to fill the first byte. That's what converting "1" + codes to a big integer used to produce.
+        encoded_bits = 1 + self.__encoded_bits()
+
+        writer = BitWriter()
+        writer.write(1, 1 + (-encoded_bits) % 8)
+        self.__encode(bytes_list, writer)
+        return writer.getvalue()
+
+    def __compress_canonical(self, bytes_list):
+
+        with self.phase("header"):
+            header = BitWriter()
+            write_code_lengths(header, self.__code_lengths())
+
+        # The number of zeros used to pad the last byte is stored after the marker, so the decoder knows where to stop
+        total_bits = 8 + 3 + header.bits_written + self.__encoded_bits()
+
+        writer = BitWriter()
+        writer.write(self.CANONICAL_MARKER, 8)
+        writer.write((-total_bits) % 8, 3)
+        writer.write(int.from_bytes(header.getvalue(), 'big') >> (-header.bits_written) % 8, header.bits_written)
+        self.__encode(bytes_list, writer)
+        return writer.getvalue()
+
+    def compress_block(self, block):
+        """ Compresses a block of bytes, the tree (or the code lengths in canonical mode) is stored at the beginning of
+        the returned payload.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        bytes
+            The encoded tree followed by the encoded content.
+        """
+
+        with self.measure("compress", len(block)) as stats:
+            payload = self.__compress_block(block)
+            stats.bytes_out = len(payload)
+
+        return payload
+
+    def __compress_block(self, block):
+
+        if self.dictionary is not None:
+            return self.__compress_with_dictionary(block)
+
+        self.__create_code(block)
+
+        if self.canonical:
+            return self.__compress_canonical(block)
+
+        compressed = self.__compress(block)
 
         if self.verbose:
             print("Compressed size : ", len(compressed))
@@ -197,88 +383,147 @@ class Huffman(BinaryTree):
         # There is a maximum of 256 leaves in the tree (because there are 256 different bytes), so the number of leaves
         # in the tree will be encoded on 1 byte. A byte can be any value between 0 and 255. And the maximum number of
         # leaves is 256. So we will store size-1. It's not a problem because the tree can't contain 0 leaf.
-        self.encoded_tree = ""  # Reset encoded tree
-        self.preorder_traversal()
+        with self.phase("header"):
+            self.encoded_tree = ""  # Reset encoded tree
 
-        # Pad with a 1 to keep zeros
-        self.encoded_tree = "1" + self.encoded_tree[1:]  # Remove the 0 of the root node which is useless, 1 bit gain :)
+            # build_tree_from reads the nodes in the same order
+            self.preorder_traversal()
 
-        tree_big_int_format = int(self.encoded_tree, 2)
-        final_encoded_tree = tree_big_int_format.to_bytes((tree_big_int_format.bit_length() + 7) // 8, 'big')
+            # Pad with a 1 to keep zeros. Remove the 0 of the root node which is useless, 1 bit gain :)
+            self.encoded_tree = "1" + self.encoded_tree[1:]
+
+            tree_big_int_format = int(self.encoded_tree, 2)
+            final_encoded_tree = tree_big_int_format.to_bytes((tree_big_int_format.bit_length() + 7) // 8, 'big')
 
         if self.verbose:
             print("final_encoded_tree = ", final_encoded_tree)
 
-        total_file_size = len(final_encoded_tree) + len(compressed)
+        return final_encoded_tree + compressed
+
+    def compress_file(self, input_filename, output_filename):
 
         if self.verbose:
-            print("Total size output : {} bytes".format(total_file_size))
+            print("Reading {}...".format(input_filename))
+
+        with self.measure("compress", 0) as stats:
+
+            # The file is mapped in memory rather than read, see compress.stream for files which don't fit in memory.
+            with open(input_filename, "rb") as input_file, map_file(input_file) as bytes_list:
 
-        if len(bytes_list) <= total_file_size:
-            raise Exception("Aborted. No gain, you shouldn't compress that file. (+{} bytes)".format(
-                total_file_size - len(bytes_list)))
+                if not bytes_list:
+                    raise IOError("File is empty !")
 
-        compression_rate = 100 - total_file_size * 100 / len(bytes_list)
+                if self.verbose:
+                    print("Input size : ", len(bytes_list))
 
-        # Print anyway, even when not in verbose mode
-        print("Compression gain : {0:.2f}%".format(compression_rate))
+                payload = self.compress_block_cached(bytes_list)
+                input_size = stats.bytes_in = len(bytes_list)
 
-        with open(output_filename, "wb") as output_file:
-            output_file.write(final_encoded_tree)
-            output_file.write(compressed)
+            total_file_size = stats.bytes_out = len(payload)
+
+            if self.verbose:
+                print("Total size output : {} bytes".format(total_file_size))
+
+            if input_size <= total_file_size:
+                raise Exception("Aborted. No gain, you shouldn't compress that file. (+{} bytes)".format(
+                    total_file_size - input_size))
+
+            compression_rate = 100 - total_file_size * 100 / input_size
+
+            # Print anyway, even when not in verbose mode
+            print("Compression gain : {0:.2f}%".format(compression_rate))
+
+            with self.phase("write"), open(output_filename, "wb") as output_file:
+                output_file.write(payload)
 
         return compression_rate
 
-    def __decompress(self, compressed_data_bits):
+    @staticmethod
+    def __table_bits(payload):
+        # Building the decoding table costs 2 ** table_bits steps, so it must not be bigger than the content
+        return min(DecodingTable.DEFAULT_TABLE_BITS, max(8, (len(payload) * 8).bit_length() - 6))
 
-        decompressed = []
-        current_node = self.root_node
+    def decompress_block(self, payload):
+        """ Decompresses a payload created by compress_block.
 
-        for i in compressed_data_bits:
+        Parameters
+        ----------
+        payload : bytes
+            The encoded tree followed by the encoded content.
 
-            if current_node.is_leaf():
-                decompressed.append(current_node.value)
-                current_node = self.root_node
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
 
-            if i == "0":
-                current_node = current_node.left
+        with self.measure("decompress", len(payload)) as stats:
+            decompressed = self.__decompress_block(payload)
+            stats.bytes_out = len(decompressed)
 
-            elif i == "1":
-                current_node = current_node.right
+        return decompressed
 
-        return bytes(decompressed)
+    def __decompress_block(self, payload):
 
-    def decompress_file(self, input_filename, output_filename):
+        if payload[0] == self.CANONICAL_MARKER:
+            with self.phase("header"):
+                reader = BitReader(payload, 8)
+                padding = reader.read(3)
 
-        with open(input_filename, "rb") as input_file:
-            bytes_list = input_file.read()  # All the file will be in memory, can be a problem with huge files.
+                if BitReader(payload, reader.position).read(16) == 0:  # Empty header, the dictionary has the codes
+                    reader.read(16)
+                    dictionary_id = reader.read(32)
 
-        if not bytes_list:
-            raise IOError("File is empty !")
+                    if self.dictionary is not None and self.dictionary.dictionary_id == dictionary_id:
+                        lengths = self.dictionary.code_lengths
+                    else:
+                        lengths = get_dictionary(dictionary_id).code_lengths
+                else:
+                    lengths = read_code_lengths(reader, 256)
 
-        binary_string = ""
+            if self.verbose:
+                print("Code lengths: ", {byte: length for byte, length in enumerate(lengths) if length})
 
-        for byte in bytes_list:
-            binary_string += format(byte, "08b")
+            with self.phase("table"):
+                table = canonical_decoding_table(tuple(lengths), self.__table_bits(payload))
 
-        padding_index = 0
-        while binary_string[padding_index] == "0":
-            padding_index += 1
+            with self.phase("decode"):
+                return bytes(table.decode(payload, reader.position, len(payload) * 8 - padding))
 
-        binary_string = binary_string[padding_index+1:]  # Remove first zeros and the 1 padding
-        tree_end_index = self.build_tree_from(binary_string)
-        binary_string = binary_string[tree_end_index:]
+        with self.phase("header"):
+            reader = BitReader(payload)
+            reader.skip_padding()
+            self.build_tree_from(reader)
 
         if self.verbose:
             print("Rebuilt tree: ", self.root_node)
 
-        padding_index = 0
-        while binary_string[padding_index] == "0":
-            padding_index += 1
+        # The tree ends on a byte boundary, the content is padded the same way
+        reader.skip_padding()
+
+        with self.phase("table"):
+            self.huffman_code.clear()
+            self.__create_huffman_code(self.root_node)
+
+            # Instead of walking the tree for each bit, look up several bits at once
+            table = DecodingTable(self.huffman_code, self.__table_bits(payload))
+
+        with self.phase("decode"):
+            return bytes(table.decode(payload, reader.position, len(payload) * 8))
+
+    def decompress_file(self, input_filename, output_filename):
+
+        with self.measure("decompress", 0) as stats:
+
+            with open(input_filename, "rb") as input_file, map_file(input_file) as bytes_list:
+
+                if not bytes_list:
+                    raise IOError("File is empty !")
 
-        binary_string = binary_string[padding_index + 1:]  # Remove first zeros and the 1 padding
+                decompressed = self.decompress_block(bytes_list)
+                stats.bytes_in = len(bytes_list)
 
-        decompressed = self.__decompress(binary_string)
+            stats.bytes_out = len(decompressed)
 
-        with open(output_filename, "wb") as output_file:
-            output_file.write(decompressed)
+            with self.phase("write"), open(output_filename, "wb") as output_file:
+                output_file.write(decompressed)
@@ -0,0 +1,154 @@
+# coding: utf-8
+
+from compress.algorithms.codec import Codec
+from compress.utils.match_finder import MatchFinder, DEFAULT_LEVEL, LEVELS, MIN_MATCH, copy_match
+
+
+class LZSS(Codec):
+    """ Implementation of the LZSS algorithm, LZ77 with a flag telling literals and matches apart.
+
+    Attributes
+    ----------
+    level : int
+        From 1 (fastest) to 9 (smallest output), only the compression depends on it.
+
+    Notes
+    -----
+    Unlike LZW, whose dictionary only knows the sequences it has already split the data into and grows until it is
+    reset, LZSS refers to any repetition of the last 64 KiB : a match copies up to 258 bytes starting up to 65536 bytes
+    before. The matches are found by compress.utils.match_finder.MatchFinder, the level sets how hard it searches.
+
+    The payload is byte aligned so it is cheap to decode : a byte of flags (least significant bit first) tells whether
+    each of the next 8 items is a literal, stored on a byte, or a match, stored on 3 bytes : its length minus 3 and its
+    distance minus 1 on 16 bits.
+    """
+
+    algorithm_id = 4
+    name = "lzss"
+    parameters = ("level",)
+
+    # Levels the compressor can be created with, the command line checks them
+    levels = tuple(LEVELS)
+
+    def __init__(self, verbose=False, level=DEFAULT_LEVEL):
+        """
+        Parameters
+        ----------
+        verbose : bool
+            Set verbose mode to understand what's underneath.
+
+        level : int
+            From 1 to 9, fast levels are meant for data compressed on the fly and slow levels for archives.
+        """
+
+        super().__init__()
+        self.verbose = verbose
+        self.level = level
+        self.match_finder = MatchFinder(level)
+
+    def compress_block(self, block):
+        """ Compresses a block of bytes.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        bytes
+            The flags, literals and matches.
+        """
+
+        with self.measure("compress", len(block)) as stats:
+            with self.phase("matches"):
+                tokens = self.match_finder.parse(block)
+
+            if self.verbose:
+                matches = sum(1 for token in tokens if token.__class__ is tuple)
+                print("{} literals and {} matches.".format(len(tokens) - matches, matches))
+
+            with self.phase("encode"):
+                payload = self.__encode(tokens)
+
+            stats.bytes_out = len(payload)
+
+        return payload
+
+    @staticmethod
+    def __encode(tokens):
+        payload = bytearray()
+
+        for start in range(0, len(tokens), 8):
+            flags_position = len(payload)
+            payload.append(0)
+            flags = 0
+
+            for bit, token in enumerate(tokens[start:start + 8]):
+                if token.__class__ is int:
+                    payload.append(token)
+                else:
+                    length, distance = token
+                    flags |= 1 << bit
+                    distance -= 1
+                    payload += bytes((length - MIN_MATCH, distance >> 8, distance & 0xFF))
+
+            payload[flags_position] = flags
+
+        return bytes(payload)
+
+    def decompress_block(self, payload):
+        """ Decompresses a payload created by compress_block.
+
+        Parameters
+        ----------
+        payload : bytes
+            The flags, literals and matches.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        with self.measure("decompress", len(payload)) as stats:
+            with self.phase("decode"):
+                decompressed = self.__decode(bytes(payload))
+
+            stats.bytes_out = len(decompressed)
+
+        return decompressed
+
+    @staticmethod
+    def __decode(payload):
+        decompressed = bytearray()
+        position = 0
+        end = len(payload)
+
+        while position < end:
+            flags = payload[position]
+            position += 1
+
+            if not flags:
+                # 8 literals, the most common case in data which doesn't repeat much
+                decompressed += payload[position:position + 8]
+                position += 8
+                continue
+
+            for bit in range(8):
+                if position >= end:
+                    break
+
+                if not flags >> bit & 1:
+                    decompressed.append(payload[position])
+                    position += 1
+                    continue
+
+                if position + 3 > end:
+                    raise IOError("Truncated match in the compressed data.")
+
+                copy_match(decompressed, payload[position] + MIN_MATCH,
+                           (payload[position + 1] << 8 | payload[position + 2]) + 1)
+                position += 3
+
+        return bytes(decompressed)
@@ -1,13 +1,24 @@
 # coding: utf-8
 
+from compress.algorithms.codec import Codec
+from compress.utils.bitio import BitReader, BitWriter, map_file
+from compress.utils.dictionaries import get_dictionary
 
-class LZW(object):
+
+class LZW(Codec):
     """ Implementation of the LZW algorithm.
 
     Attributes
     ----------
     translation_dict : dict
-        Association between repeated bytes sequences and integers.
+        Association between repeated bytes sequences and integers. A sequence is identified by the integer of the
+        sequence without its last byte and by its last byte, packed as integer << 8 | byte, so no bytes object is
+        created while compressing. Sequences of a single byte are not stored, their integer is the byte itself.
+
+    dictionary : Dictionary
+        When set, the compressor and the decompressor start as if they had just processed the content of the
+        dictionary, so the sequences of the content are known from the first byte (see train and
+        compress.utils.dictionaries). The variable width mode is always used then.
 
     Examples
     --------
@@ -22,156 +33,505 @@ class LZW(object):
     based on the biggest integer in the dictionary. This integer will be on 5 bits, it means other integers can be coded
     on 2^5 = 32 bits max. Which means the biggest supported dictionary is 2^32 = 4294967296 long. Which is more than
     enough.
+
+    The problem is that all the integers have to be known before writing the first one, and the dictionary grows
+    without limit. The variable width mode works like the Unix compress command instead : integers are written as soon
+    as they are known, using the number of bits needed by the biggest integer of the dictionary at that time (starting
+    at 9 bits). When the dictionary reaches 2^max_code_bits integers, the CLEAR_CODE integer is written and both the
+    compressor and the decompressor start over with a new dictionary. Variable width payloads start with a 0 byte,
+    which the original format can't start with since it is padded with zeros followed by a 1. When a dictionary is
+    used, the marker is followed by a 0 byte (which isn't a valid maximum size of the integers) and by the 32 bits
+    identifier of the dictionary.
     """
 
-    def __init__(self, verbose=False):
+    algorithm_id = 2
+    name = "lzw"
+    parameters = ("variable_width", "max_code_bits")
+    supports_dictionary = True
+
+    # First byte of the variable width payloads
+    VARIABLE_WIDTH_MARKER = 0
+
+    # In variable width mode, integer telling the dictionary must be reset, so the first new pattern is 257
+    CLEAR_CODE = 256
+    FIRST_CODE = 257
+
+    # Second byte of the variable width payloads compressed with a dictionary
+    DICTIONARY_MARKER = 0
+
+    def __init__(self, verbose=False, variable_width=True, max_code_bits=16, dictionary=None):
+        """
+        Parameters
+        ----------
+        verbose : bool
+            Set verbose mode to understand what's underneath.
+
+        variable_width : bool
+            Whether the variable width mode is used to compress.
+
+        max_code_bits : int
+            In variable width mode, the maximum size of the integers, which limits the size of the dictionary.
+
+        dictionary : Dictionary
+            Dictionary to prime the compressor with.
+        """
+
+        if not 9 <= max_code_bits <= 24:
+            raise ValueError("The maximum size of the integers must be between 9 and 24 bits.")
+
+        super().__init__()
         self.verbose = verbose
         self.translation_dict = None
         self.max_size_integer_size = 5  # The integers size is encoded on 5 bits by default
         self.integers_size_bits = 0  # Max value must be 2**max_size_integer_size (= 32 by default)
+        self.variable_width = variable_width
+        self.max_code_bits = max_code_bits
+        self.dictionary = dictionary
 
-    def __build_bytes_dictionary(self, decompression=False):
-        if decompression:
-            self.translation_dict = {byte: bytes([byte]) for byte in range(256)}
-        else:
-            self.translation_dict = {bytes([byte]): byte for byte in range(256)}
+    def __compress(self, bytes_list, first_code=256, clear_code=None, max_code=None):
 
-    def __compress(self, bytes_list):
+        # Patterns are identified by the integer of the pattern without its last byte and by the last byte. Bytes alone
+        # are their own integer, so the dictionary starts empty. Without clear_code, the dictionary is never reset.
+        self.translation_dict = {}
+        translation_dict_get = self.translation_dict.get
+        next_code = first_code
 
-        self.__build_bytes_dictionary()
+        if max_code is None:
+            max_code = first_code + len(bytes_list)  # Never reached
 
-        biggest_integer = 0
         compressed = []
-        pattern = bytes([])
+        append = compressed.append
+        bytes_iterator = iter(bytes_list)
+        code = next(bytes_iterator)
 
-        for byte in bytes_list:
-            byte_as_array = bytes([byte])
-            current = pattern + byte_as_array
+        for byte in bytes_iterator:
+            key = code << 8 | byte
+            known_code = translation_dict_get(key)
 
-            if current in self.translation_dict:
-                pattern = current
+            if known_code is not None:
+                code = known_code
             else:
-                self.translation_dict[current] = len(self.translation_dict)
-                compressed.append(self.translation_dict[pattern])
+                append(code)
+
+                if next_code <= max_code:
+                    self.translation_dict[key] = next_code
+                    next_code += 1
+                else:
+                    append(clear_code)
+                    self.translation_dict.clear()
+                    next_code = first_code
+
+                code = byte
+
+        append(code)
+        return compressed
+
+    def __prime(self, content, max_patterns):
+
+        # Same as compressing the content, without writing anything. Where each new sequence starts in the content and
+        # its length are kept for the decompressor.
+        translation_dict = {}
+        starts = []
+        lengths = []
+
+        if not content:
+            return translation_dict, starts, lengths, 0
+
+        code = content[0]
+        code_start = 0
+
+        for position in range(1, len(content)):
+            key = code << 8 | content[position]
+            known_code = translation_dict.get(key)
+
+            if known_code is not None:
+                code = known_code
+                continue
+
+            if len(starts) == max_patterns:
+                return translation_dict, starts, lengths, position
+
+            translation_dict[key] = self.FIRST_CODE + len(starts)
+            starts.append(code_start)
+            lengths.append(position - code_start + 1)
+            code = content[position]
+            code_start = position
+
+        return translation_dict, starts, lengths, len(content)
+
+    def train(self, samples, max_patterns=4096):
+        """ Selects the content of a Dictionary from samples of the data to compress.
+
+        Parameters
+        ----------
+        samples : iterable
+            Bytes-like objects.
+
+        max_patterns : int
+            Maximum number of sequences the content defines. The more sequences, the more likely they are found in the
+            data, but the bigger the integers.
+
+        Returns
+        -------
+        bytes
+            The beginning of the concatenated samples defining max_patterns sequences.
+        """
+
+        content = b"".join(bytes(sample) for sample in samples)
+        return content[:self.__prime(content, max_patterns)[3]]
+
+    def __primed_state(self, dictionary, max_code_bits):
+
+        try:
+            return dictionary.cache["lzw", max_code_bits]
+        except KeyError:
+            pass
+
+        # The dictionary never takes more than half of the integers, the others are left for the data
+        state = self.__prime(dictionary.content, ((1 << max_code_bits) - self.FIRST_CODE) // 2)[:3]
+        return dictionary.cache.setdefault(("lzw", max_code_bits), state)
+
+    def __compress_variable_width(self, bytes_list):
+
+        writer = BitWriter()
+        writer.write(self.VARIABLE_WIDTH_MARKER, 8)
+
+        if self.dictionary is not None:
+            writer.write(self.DICTIONARY_MARKER, 8)
+            writer.write(self.dictionary.dictionary_id, 32)
+            primed_dict, primed_starts, _ = self.__primed_state(self.dictionary, self.max_code_bits)
+        else:
+            primed_dict, primed_starts = {}, ()
+
+        writer.write(self.max_code_bits, 8)
+        write = writer.write
+
+        self.translation_dict = primed_dict.copy()
+        translation_dict_get = self.translation_dict.get
+        max_code = (1 << self.max_code_bits) - 1
+        first_code = self.FIRST_CODE + len(primed_starts)
+        next_code = first_code
+        first_width = width = (first_code - 1).bit_length()  # The biggest integer the decompressor can receive
+        resets = 0
+
+        bytes_iterator = iter(bytes_list)
+        code = next(bytes_iterator)
+
+        for byte in bytes_iterator:
+            key = code << 8 | byte
+            known_code = translation_dict_get(key)
+
+            if known_code is not None:
+                code = known_code
+                continue
+
+            write(code, width)
+
+            if next_code <= max_code:
+                self.translation_dict[key] = next_code
+                width = next_code.bit_length()
+                next_code += 1
+            else:
+                write(self.CLEAR_CODE, width)
+                self.translation_dict.clear()
+                self.translation_dict.update(primed_dict)
+                next_code = first_code
+                width = first_width
+                resets += 1
+
+            code = byte
+
+        write(code, width)
+
+        if self.verbose:
+            print("The dictionary has been reset {} times.".format(resets))
+
+        return writer.getvalue()
+
+    def compress_block(self, block):
+        """ Compresses a block of bytes, the size of the integers is stored at the beginning of the returned payload.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
 
-                if biggest_integer < self.translation_dict[pattern]:
-                    biggest_integer = self.translation_dict[pattern]
+        Returns
+        -------
+        bytes
+            The integers size followed by the integers.
+        """
 
-                pattern = byte_as_array
+        with self.measure("compress", len(block)) as stats:
+            payload = self.__compress_block(block)
+            stats.bytes_out = len(payload)
 
-        compressed.append(self.translation_dict[pattern])
+        return payload
 
-        if biggest_integer < self.translation_dict[pattern]:
-            biggest_integer = self.translation_dict[pattern]
+    def __compress_block(self, block):
+
+        if self.variable_width or self.dictionary is not None:
+            # Integers are packed as soon as they are known, both are measured at once
+            with self.phase("encode"):
+                return self.__compress_variable_width(block)
+
+        with self.phase("dictionary"):
+            compressed = self.__compress(block)
+
+        biggest_integer = max(compressed)
 
         if biggest_integer > 2 ** (2 ** self.max_size_integer_size):
             # Shouldn't happen
             raise ValueError("Can't encode such value... Maybe you should increase the size of max_size_integer_size.")
 
-        self.integers_size_bits = biggest_integer.bit_length()
+        self.integers_size_bits = max(1, biggest_integer.bit_length())
 
         if self.verbose:
             print("The biggest integer is {} so integers will be coded on {} bits.".format(biggest_integer,
                                                                                            self.integers_size_bits))
-        return compressed
 
-    def compress_file(self, input_filename, output_filename):
-        with open(input_filename, "rb") as input_file:
-            bytes_list = input_file.read()
+        if self.verbose:
+            print("Assembling integers together...")
 
-        if not bytes_list:
-            raise IOError("File is empty !")
+        # The integers are preceded by a 1 so the decoder knows where the first zeros are, and padded with zeros on the
+        # left to fill the first byte. That's what converting "1" + integers to a big integer used to produce.
+        total_bits = 1 + self.max_size_integer_size + len(compressed) * self.integers_size_bits
+
+        with self.phase("packing"):
+            writer = BitWriter()
+            writer.write(1, 1 + (-total_bits) % 8)
+            writer.write(self.integers_size_bits, self.max_size_integer_size)
+            writer.write_integers(compressed, self.integers_size_bits)
 
         if self.verbose:
-            print("Input size : {} bytes.".format(len(bytes_list)))
+            print("Done.")
 
-        compressed = self.__compress(bytes_list)
+        return writer.getvalue()
 
-        if self.verbose:
-            print("Assembling integers together...")
+    def encode_codes(self, block):
+        """ Splits a block into the integers of the variable width mode, without packing them. Other encoders can
+        compress them further (see compress.algorithms.pipeline), dictionaries are not used.
 
-        # Originally, each integer was added to a big one using bits shifting, but this method was way to slow.
-        # Strings are better for this purpose.
-        binary_string_compressed = "1"  # Padding with a 1 to keep the first zeros when converting to integer
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
 
-        # Add binary representation of the integers bit-length
-        binary_string_compressed += format(self.integers_size_bits, "0{}b".format(self.max_size_integer_size))
+        Returns
+        -------
+        list
+            The integers, all of them are below 2 ** max_code_bits and CLEAR_CODE resets the dictionary.
+        """
 
-        # https://waymoot.org/home/python_string/
-        # According to this, the fastest way to concatenate strings is to use join() on a list
-        bin_format = "0{}b".format(self.integers_size_bits)
-        binary_string_compressed += ''.join([format(byte, bin_format) for byte in compressed])
+        return self.__compress(block, self.FIRST_CODE, self.CLEAR_CODE, (1 << self.max_code_bits) - 1)
 
-        if self.verbose:
-            print("Done.")
+    def decode_codes(self, codes):
+        """ Decodes integers returned by encode_codes, max_code_bits must be the same.
 
-        big_int_compress = int(binary_string_compressed, 2)
-        to_store_in_file = big_int_compress.to_bytes((big_int_compress.bit_length() + 7) // 8, 'big')
+        Parameters
+        ----------
+        codes : list
+            The integers.
 
-        total_file_size = len(to_store_in_file)
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
 
-        if self.verbose:
-            print("Output : {} bytes".format(total_file_size))
+        return self.__decompress(codes, self.FIRST_CODE, self.CLEAR_CODE, (1 << self.max_code_bits) - 1)
+
+    def compress_file(self, input_filename, output_filename):
+
+        with self.measure("compress", 0) as stats:
+
+            # The file is mapped in memory rather than read, see compress.stream for files which don't fit in memory.
+            with open(input_filename, "rb") as input_file, map_file(input_file) as bytes_list:
+
+                if not bytes_list:
+                    raise IOError("File is empty !")
+
+                if self.verbose:
+                    print("Input size : {} bytes.".format(len(bytes_list)))
 
-        if len(bytes_list) <= total_file_size:
-            raise Exception("Aborted. No gain, you shouldn't compress that file. (+{} bytes)".format(
-                total_file_size - len(bytes_list)))
+                to_store_in_file = self.compress_block_cached(bytes_list)
+                input_size = stats.bytes_in = len(bytes_list)
 
-        compression_rate = 100 - total_file_size * 100 / len(bytes_list)
+            total_file_size = stats.bytes_out = len(to_store_in_file)
 
-        # Print anyway, even when not in verbose mode
-        print("Compression gain : {0:.2f}%".format(compression_rate))
+            if self.verbose:
+                print("Output : {} bytes".format(total_file_size))
 
-        with open(output_filename, "wb") as output_file:
-            output_file.write(to_store_in_file)
+            if input_size <= total_file_size:
+                raise Exception("Aborted. No gain, you shouldn't compress that file. (+{} bytes)".format(
+                    total_file_size - input_size))
+
+            compression_rate = 100 - total_file_size * 100 / input_size
+
+            # Print anyway, even when not in verbose mode
+            print("Compression gain : {0:.2f}%".format(compression_rate))
+
+            with self.phase("write"), open(output_filename, "wb") as output_file:
+                output_file.write(to_store_in_file)
 
         return compression_rate
 
-    def __decompress(self, compressed_bytes_list):
-        self.__build_bytes_dictionary(decompression=True)
+    def __decompress(self, codes, first_code, clear_code=None, max_code=None, primed=(b"", (), ())):
+
+        # Patterns are not stored : a new pattern is the previous one followed by the first byte of the current one, and
+        # both are next to each other in the decompressed bytes. So only where each pattern starts and its length are
+        # kept, it is the same as keeping the previous integer and the last byte but it can be copied at once. With a
+        # dictionary, its content is decompressed first and its patterns refer to it.
+        primed_content, primed_starts, primed_lengths = primed
+        starts = list(primed_starts)
+        lengths = list(primed_lengths)
+        max_patterns = (max_code - first_code + 1) if max_code is not None else len(codes)
+
+        decompressed = bytearray(primed_content)
+        previous_start = 0
+        previous_length = 0  # No previous pattern
+
+        for code in codes:
+            start = len(decompressed)
+
+            if code < 256:
+                decompressed.append(code)
+                length = 1
+
+            elif code == clear_code:
+                del starts[len(primed_starts):]
+                del lengths[len(primed_lengths):]
+                previous_length = 0
+                continue
+
+            elif code - first_code < len(starts):
+                pattern_start = starts[code - first_code]
+                length = lengths[code - first_code]
+                decompressed += decompressed[pattern_start:pattern_start + length]
+
+            elif code - first_code == len(starts) and previous_length:
+                # The code is the one being defined right now, it starts with the previous pattern and ends with its
+                # first byte.
+                decompressed += decompressed[previous_start:previous_start + previous_length]
+                decompressed.append(decompressed[previous_start])
+                length = previous_length + 1
 
-        previous_code = compressed_bytes_list[0]
-        decompressed = self.translation_dict[previous_code]
+            else:
+                raise IOError("Invalid integer {} in the compressed data.".format(code))
 
-        first_byte = None
+            if previous_length and len(starts) < max_patterns:
+                starts.append(previous_start)
+                lengths.append(previous_length + 1)
 
-        for new_code in compressed_bytes_list[1:]:
+            previous_start = start
+            previous_length = length
 
-            try:
-                translation = self.translation_dict[new_code]
-            except KeyError:
-                translation = first_byte + self.translation_dict[previous_code]
+        if primed_content:
+            return bytes(memoryview(decompressed)[len(primed_content):])
 
-            decompressed += translation
+        return bytes(decompressed)
 
-            first_byte = bytes([translation[0]])
-            self.translation_dict[len(self.translation_dict)] = self.translation_dict[previous_code] + first_byte
+    def __read_variable_width_codes(self, reader, end, max_code_bits, first_code):
 
-            previous_code = new_code
+        # The compressor is one integer ahead : after reading n integers (not counting the first one), the dictionary
+        # contains first_code - 1 + n integers, plus the one the compressor has just added.
+        biggest_code = first_code - 1
 
-        return decompressed
+        while True:
+            width = min(max_code_bits, biggest_code.bit_length())
 
-    def decompress_file(self, input_filename, output_filename):
-        with open(input_filename, "rb") as input_file:
-            bytes_list = input_file.read()
+            if end - reader.position < width:  # Only the padding is left
+                return
 
-        if not bytes_list:
-            raise IOError("File is empty !")
+            code = reader.read(width)
 
-        big_int_compressed = int.from_bytes(bytes_list, 'big')
-        bits_string_compressed = format(big_int_compressed, "0b")
+            if code == self.CLEAR_CODE:
+                biggest_code = first_code - 1
+            else:
+                biggest_code += 1
+
+            yield code
+
+    def __decompress_variable_width(self, payload):
+
+        if payload[1] == self.DICTIONARY_MARKER:
+            dictionary_id = int.from_bytes(payload[2:6], 'big')
+
+            if self.dictionary is not None and self.dictionary.dictionary_id == dictionary_id:
+                dictionary = self.dictionary
+            else:
+                dictionary = get_dictionary(dictionary_id)
+
+            max_code_bits = payload[6]
+            start = 56
+            primed_dict, primed_starts, primed_lengths = self.__primed_state(dictionary, max_code_bits)
+            primed = (dictionary.content, primed_starts, primed_lengths)
+        else:
+            max_code_bits = payload[1]
+            start = 16
+            primed = (b"", (), ())
+
+        first_code = self.FIRST_CODE + len(primed[1])
+
+        with self.phase("unpacking"):
+            codes = list(self.__read_variable_width_codes(BitReader(payload, start), len(payload) * 8, max_code_bits,
+                                                          first_code))
+
+        with self.phase("dictionary"):
+            return self.__decompress(codes, self.FIRST_CODE, self.CLEAR_CODE, (1 << max_code_bits) - 1, primed)
+
+    def decompress_block(self, payload):
+        """ Decompresses a payload created by compress_block.
+
+        Parameters
+        ----------
+        payload : bytes
+            The integers size followed by the integers.
 
-        self.integers_size_bits = int(bits_string_compressed[1:self.max_size_integer_size + 1], 2)  # Skip first pad bit
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        with self.measure("decompress", len(payload)) as stats:
+            decompressed = self.__decompress_block(payload)
+            stats.bytes_out = len(decompressed)
+
+        return decompressed
+
+    def __decompress_block(self, payload):
+
+        if payload[0] == self.VARIABLE_WIDTH_MARKER:
+            return self.__decompress_variable_width(payload)
+
+        reader = BitReader(payload)
+        reader.skip_padding()
+        self.integers_size_bits = reader.read(self.max_size_integer_size)
 
         if self.verbose:
             print("Integers are {} bits long.".format(self.integers_size_bits))
 
-        compressed = []
+        with self.phase("unpacking"):
+            compressed = reader.read_integers((len(payload) * 8 - reader.position) // self.integers_size_bits,
+                                              self.integers_size_bits)
+
+        with self.phase("dictionary"):
+            return self.__decompress(compressed, 256)
+
+    def decompress_file(self, input_filename, output_filename):
+
+        with self.measure("decompress", 0) as stats:
+
+            with open(input_filename, "rb") as input_file, map_file(input_file) as bytes_list:
+
+                if not bytes_list:
+                    raise IOError("File is empty !")
 
-        for i in range(self.max_size_integer_size + 1, len(bits_string_compressed), self.integers_size_bits):
-            compressed.append(int(bits_string_compressed[i:i + self.integers_size_bits], 2))
+                decompressed = self.decompress_block(bytes_list)
+                stats.bytes_in = len(bytes_list)
 
-        decompressed = self.__decompress(compressed)
+            stats.bytes_out = len(decompressed)
 
-        with open(output_filename, "wb") as output_file:
-            output_file.write(decompressed)
+            with self.phase("write"), open(output_filename, "wb") as output_file:
+                output_file.write(decompressed)
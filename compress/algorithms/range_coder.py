@@ -0,0 +1,415 @@
+# coding: utf-8
+
+from bisect import bisect_right
+from itertools import accumulate
+
+from compress.algorithms.codec import Codec
+from compress.utils.backends import get_backend
+from compress.utils.bitio import BitReader, BitWriter
+
+# The range is renormalized, a byte at a time, when it gets below TOP. Totals are at most MAX_TOTAL so a symbol always
+# gets at least 2 ** 8 values of the range.
+TOP = 1 << 24
+MAX_TOTAL = 1 << 16
+
+# Models, in the order of their identifiers stored in the payloads
+MODELS = ("static", "adaptive", "order1")
+
+
+def gamma_length(value):
+    """ Returns the number of bits of the Elias gamma code of a positive integer. """
+
+    return 2 * value.bit_length() - 1
+
+
+def write_frequencies(writer, frequencies):
+    """ Writes the frequency of each byte plus one with an Elias gamma code : the bit length of the value minus one
+    zeros followed by the value, so absent bytes take a single bit and frequent ones about twice their bit length. """
+
+    for frequency in frequencies:
+        writer.write(frequency + 1, gamma_length(frequency + 1))
+
+
+def read_frequencies(reader, count=256):
+    """ Reads frequencies written by write_frequencies. """
+
+    frequencies = []
+
+    for _ in range(count):
+        zeros = 0
+
+        while not reader.read(1):
+            zeros += 1
+
+            if zeros > 24:
+                raise IOError("Invalid frequency in the range coded data.")
+
+        frequencies.append(((1 << zeros) | reader.read(zeros)) - 1)
+
+    return frequencies
+
+
+def scale_frequencies(histogram, max_total=MAX_TOTAL):
+    """ Scales the counts of the bytes down so their total is at most max_total, bytes which occur keep a frequency of
+    at least 1.
+
+    Parameters
+    ----------
+    histogram : list
+        Number of occurrences of each of the 256 bytes, as returned by the byte_histogram of the backends.
+
+    max_total : int
+        The maximum total.
+
+    Returns
+    -------
+    list
+        The frequencies.
+    """
+
+    total = sum(histogram)
+
+    if total <= max_total:
+        return list(histogram)
+
+    frequencies = [max(1, count * max_total // total) if count else 0 for count in histogram]
+    excess = sum(frequencies) - max_total
+
+    # Rounding bytes up to 1 may exceed the total, the most frequent bytes give it back
+    for byte in sorted(range(len(frequencies)), key=frequencies.__getitem__, reverse=True):
+        if excess <= 0:
+            break
+
+        cut = min(excess, frequencies[byte] - 1)
+        frequencies[byte] -= cut
+        excess -= cut
+
+    return frequencies
+
+
+class ContextModels(object):
+    """ Cumulative frequencies of the bytes in each context, shared by the encoder and the decoder.
+
+    Parameters
+    ----------
+    contexts : int
+        Number of contexts, 1 for order 0 and 256 for order 1 (the context is the previous byte).
+
+    frequencies : list
+        Frequencies of a static model, which never changes. When None, the models are adaptive : every byte starts
+        with a frequency of 1 and the frequencies are updated as the bytes are coded.
+
+    Attributes
+    ----------
+    cumulatives : list
+        For each context, the 257 cumulative frequencies : byte b is coded by the interval from cumulatives[b] to
+        cumulatives[b + 1], out of cumulatives[256].
+
+    counts : list
+        For each context, the current frequency of each byte. None for a static model.
+
+    remaining : list
+        For each context, the number of bytes to code before its cumulative frequencies are rebuilt.
+    """
+
+    # Added to the frequency of a byte each time it is coded, frequencies start at 1 so the first bytes weigh a lot
+    INCREMENT = 16
+
+    # The cumulative frequencies of a context are rebuilt after this number of bytes, then the interval doubles up to
+    # MAX_INTERVAL. Rebuilding after each byte would be more precise, but computing 257 sums is slower than coding.
+    FIRST_INTERVAL = 16
+    MAX_INTERVAL = 256
+
+    def __init__(self, contexts=1, frequencies=None):
+
+        if frequencies is not None:
+            self.counts = None
+            self.cumulatives = [[0] + list(accumulate(frequencies))]
+            return
+
+        self.counts = [[1] * 256 for _ in range(contexts)]
+        self.cumulatives = [list(range(257)) for _ in range(contexts)]
+        self.intervals = [self.FIRST_INTERVAL] * contexts
+        self.remaining = [self.FIRST_INTERVAL] * contexts
+
+    def rebuild(self, context):
+        """ Computes the cumulative frequencies of a context from its counts, which are halved when their total gets
+        above MAX_TOTAL so the model follows the data when it changes. """
+
+        counts = self.counts[context]
+
+        if sum(counts) > MAX_TOTAL:
+            counts[:] = [(count + 1) >> 1 for count in counts]
+
+        self.cumulatives[context] = [0] + list(accumulate(counts))
+        self.intervals[context] = interval = min(self.intervals[context] * 2, self.MAX_INTERVAL)
+        self.remaining[context] = interval
+
+
+class RangeCoder(Codec):
+    """ Range coding, arithmetic coding with integers : each byte narrows an interval in proportion to its probability.
+
+    Attributes
+    ----------
+    model : str
+        How the probabilities are computed : static, adaptive or order1.
+
+    backend : PythonBackend
+        What counts the bytes of the static model (see compress.utils.backends).
+
+    Notes
+    -----
+    Huffman codes take a whole number of bits per byte, so a byte occurring 95% of the time still takes a bit while it
+    carries 0.07 bit of information. A range coder spends the information of each byte, whatever its probability, and
+    only loses a few bytes at the end of the payload.
+
+    The static model counts the bytes of the block first, like Huffman does, and stores the frequencies scaled down to
+    2 ** 16 (see write_frequencies). The adaptive model stores nothing : both sides start with the same frequencies and
+    count the bytes as they are coded, which suits small blocks and data which changes. The order1 model is adaptive
+    too, with a model per previous byte, so the bytes usually following another one get high probabilities : text
+    takes about 40% less than with order 0, but the 256 models learn slowly and make binary data bigger.
+
+    The coder is the one of LZMA : low is a 32 bits integer, a carry which goes past it is propagated to the bytes which
+    haven't been written yet (the last one and the 0xFF bytes following it). The payload starts with the identifier of
+    the model and the number of bytes on 32 bits, followed by the frequencies of the static model, then by the range
+    coded bytes.
+    """
+
+    algorithm_id = 6
+    name = "range"
+    parameters = ("model",)
+
+    # Models the compressor can be created with, the command line checks them
+    models = MODELS
+
+    def __init__(self, verbose=False, model="adaptive", backend=None):
+        """
+        Parameters
+        ----------
+        verbose : bool
+            Set verbose mode to understand what's underneath.
+
+        model : str
+            static (fastest), adaptive or order1 (smallest output on text).
+
+        backend : str
+            Name of the backend, see compress.utils.backends.get_backend.
+        """
+
+        if model not in MODELS:
+            raise ValueError("Unknown model {}, the models are {}.".format(model, ", ".join(MODELS)))
+
+        super().__init__()
+        self.verbose = verbose
+        self.model = model
+        self.backend = get_backend(backend)
+
+    def compress_block(self, block):
+        """ Compresses a block of bytes.
+
+        Parameters
+        ----------
+        block : bytes
+            The bytes to compress, can't be empty.
+
+        Returns
+        -------
+        bytes
+            The model, the frequencies of the static model and the range coded bytes.
+        """
+
+        if len(block) >= 1 << 32:
+            raise ValueError("The range coder compresses blocks of less than 4 GiB.")
+
+        with self.measure("compress", len(block)) as stats:
+            if self.model == "static":
+                # The same counts as Huffman's, scaled down so the coder's integers stay small
+                with self.phase("histogram"):
+                    frequencies = scale_frequencies(self.backend.byte_histogram(block))
+
+                models = ContextModels(frequencies=frequencies)
+            else:
+                models = ContextModels(256 if self.model == "order1" else 1)
+
+            with self.phase("header"):
+                header = BitWriter()
+                header.write(MODELS.index(self.model), 8)
+                header.write(len(block), 32)
+
+                if self.model == "static":
+                    write_frequencies(header, frequencies)
+
+            if self.verbose:
+                print("Header size : {} bytes".format(len(header.getvalue())))
+
+            with self.phase("encode"):
+                payload = header.getvalue() + self.__encode(block, models, 0xFF if self.model == "order1" else 0)
+
+            stats.bytes_out = len(payload)
+
+        return payload
+
+    @staticmethod
+    def __encode(block, models, context_mask):
+        output = bytearray()
+        append = output.append
+        cumulatives = models.cumulatives
+        counts = models.counts
+        remaining = models.remaining if counts is not None else None
+        increment = ContextModels.INCREMENT
+        low = 0
+        range_ = 0xFFFFFFFF
+        cache = 0  # The last byte of low which left it, it is written once no carry can change it
+        pending = 0  # Number of 0xFF bytes following cache, a carry would turn them into zeros
+        context = 0
+
+        for byte in block:
+            cumulative = cumulatives[context]
+            start = cumulative[byte]
+            r = range_ // cumulative[256]
+            low += start * r
+            range_ = (cumulative[byte + 1] - start) * r
+
+            while range_ < TOP:
+                range_ <<= 8
+
+                if low < 0xFF000000 or low > 0xFFFFFFFF:
+                    carry = low >> 32
+                    append((cache + carry) & 0xFF)
+
+                    if pending:
+                        output += (b"\x00" if carry else b"\xff") * pending
+                        pending = 0
+
+                    cache = (low >> 24) & 0xFF
+                else:
+                    pending += 1
+
+                low = (low & 0xFFFFFF) << 8
+
+            if counts is not None:
+                counts[context][byte] += increment
+                remaining[context] -= 1
+
+                if not remaining[context]:
+                    models.rebuild(context)
+
+            context = byte & context_mask
+
+        # The 4 bytes of low are pushed out, then cache and the pending bytes
+        for _ in range(5):
+            if low < 0xFF000000 or low > 0xFFFFFFFF:
+                carry = low >> 32
+                append((cache + carry) & 0xFF)
+                output += (b"\x00" if carry else b"\xff") * pending
+                pending = 0
+                cache = (low >> 24) & 0xFF
+            else:
+                pending += 1
+
+            low = (low & 0xFFFFFF) << 8
+
+        # The first byte is the initial cache, always 0 since low can't carry before a byte has left it
+        return bytes(output[1:])
+
+    def decompress_block(self, payload):
+        """ Decompresses a payload created by compress_block.
+
+        Parameters
+        ----------
+        payload : bytes
+            The model, the frequencies of the static model and the range coded bytes.
+
+        Returns
+        -------
+        bytes
+            The original bytes.
+        """
+
+        with self.measure("decompress", len(payload)) as stats:
+            with self.phase("header"):
+                payload = bytes(payload)
+
+                if not payload or payload[0] >= len(MODELS):
+                    raise IOError("Unknown range coder model in the compressed data.")
+
+                model = MODELS[payload[0]]
+                reader = BitReader(payload, 8)
+                size = reader.read(32)
+
+                if model == "static":
+                    frequencies = read_frequencies(reader)
+
+                    if not 0 < sum(frequencies) <= MAX_TOTAL:
+                        raise IOError("Invalid frequencies in the range coded data.")
+
+                    models = ContextModels(frequencies=frequencies)
+                else:
+                    models = ContextModels(256 if model == "order1" else 1)
+
+            if self.verbose:
+                print("Model : {}, {} bytes".format(model, size))
+
+            with self.phase("decode"):
+                decompressed = self.__decode(payload, (reader.position + 7) >> 3, size, models,
+                                             0xFF if model == "order1" else 0)
+
+            stats.bytes_out = len(decompressed)
+
+        return decompressed
+
+    @staticmethod
+    def __decode(payload, position, size, models, context_mask):
+
+        # The encoder may stop before the decoder has read its last 4 bytes, they are zeros
+        data = payload + bytes(4)
+        end = len(data)
+
+        if position + 4 > end:
+            raise IOError("Truncated range coded data.")
+
+        decompressed = bytearray()
+        append = decompressed.append
+        cumulatives = models.cumulatives
+        counts = models.counts
+        remaining = models.remaining if counts is not None else None
+        increment = ContextModels.INCREMENT
+        code = int.from_bytes(data[position:position + 4], 'big')
+        position += 4
+        range_ = 0xFFFFFFFF
+        context = 0
+
+        for _ in range(size):
+            cumulative = cumulatives[context]
+            total = cumulative[256]
+            r = range_ // total
+            value = code // r
+
+            if value >= total:
+                value = total - 1
+
+            byte = bisect_right(cumulative, value) - 1
+            start = cumulative[byte]
+            code -= start * r
+            range_ = (cumulative[byte + 1] - start) * r
+
+            while range_ < TOP:
+                if position == end:
+                    raise IOError("Truncated range coded data.")
+
+                code = (code << 8) | data[position]
+                position += 1
+                range_ <<= 8
+
+            append(byte)
+
+            if counts is not None:
+                counts[context][byte] += increment
+                remaining[context] -= 1
+
+                if not remaining[context]:
+                    models.rebuild(context)
+
+            context = byte & context_mask
+
+        return bytes(decompressed)
@@ -0,0 +1,128 @@
+# coding: utf-8
+
+from compress.algorithms import ALGORITHMS, ALGORITHMS_BY_ID
+from compress.algorithms.codec import METHOD_STORED, as_bytes_view
+from compress.algorithms.huffman import Huffman
+from compress.algorithms.lzw import LZW
+from compress.utils.dictionaries import Dictionary, load_dictionary, register_dictionary
+
+DEFAULT_ALGORITHM = "lzw"
+
+# Instances shared by the whole process, codecs can be used from several threads
+_codecs = {}
+
+
+def get_codec(algorithm=DEFAULT_ALGORITHM, dictionary=None):
+    """ Returns the shared instance of an algorithm, created with its default settings.
+
+    Parameters
+    ----------
+    algorithm : str or int
+        Name or identifier of the algorithm.
+
+    dictionary : Dictionary
+        Dictionary used to compress, it is registered so the payloads referencing it can be decompressed.
+
+    Returns
+    -------
+    Codec
+        The instance.
+    """
+
+    key = (algorithm, None if dictionary is None else dictionary.dictionary_id)
+
+    try:
+        return _codecs[key]
+    except KeyError:
+        pass
+
+    if algorithm in ALGORITHMS:
+        algorithm_class = ALGORITHMS[algorithm]
+    elif algorithm in ALGORITHMS_BY_ID:
+        algorithm_class = ALGORITHMS_BY_ID[algorithm]
+    else:
+        raise ValueError("Unknown algorithm {}.".format(algorithm))
+
+    if dictionary is not None and not algorithm_class.supports_dictionary:
+        raise ValueError("The {} algorithm doesn't support dictionaries.".format(algorithm_class.name))
+
+    if dictionary is None:
+        codec = algorithm_class()
+    else:
+        codec = algorithm_class(dictionary=register_dictionary(dictionary))
+
+    return _codecs.setdefault(key, codec)
+
+
+def compress(data, algorithm=DEFAULT_ALGORITHM, dictionary=None):
+    """ Compresses bytes in memory, quietly. See Codec.compress.
+
+    Parameters
+    ----------
+    data
+        The bytes to compress, any object supporting the buffer protocol.
+
+    algorithm : str
+        Name of the algorithm.
+
+    dictionary : Dictionary
+        Dictionary trained on similar data (see train_dictionary), it makes small payloads much smaller. The same
+        dictionary must be loaded to decompress.
+
+    Returns
+    -------
+    bytes
+        The compressed bytes, they start with the identifier of the algorithm used.
+    """
+
+    return get_codec(algorithm, dictionary).compress(data)
+
+
+def decompress(data):
+    """ Decompresses bytes created by compress (or by Codec.compress), whatever the algorithm used.
+
+    Parameters
+    ----------
+    data
+        The compressed bytes, any object supporting the buffer protocol.
+
+    Returns
+    -------
+    bytes
+        The original bytes.
+    """
+
+    data = as_bytes_view(data)
+
+    if not data:
+        raise IOError("Compressed data can't be empty.")
+
+    if data[0] == METHOD_STORED:
+        return bytes(data[1:])
+
+    if data[0] not in ALGORITHMS_BY_ID:
+        raise IOError("Unknown compression method {}.".format(data[0]))
+
+    return get_codec(data[0]).decompress(data)
+
+
+def train_dictionary(samples, max_patterns=4096):
+    """ Builds a dictionary for both algorithms from samples of the data to compress.
+
+    Parameters
+    ----------
+    samples : list
+        Bytes-like objects, typically a few hundred messages.
+
+    max_patterns : int
+        Maximum number of LZW sequences defined by the dictionary, see LZW.train.
+
+    Returns
+    -------
+    Dictionary
+        The dictionary, registered so it can be used to decompress. It can be saved with its save method and loaded
+        with load_dictionary.
+    """
+
+    samples = list(samples)
+    return register_dictionary(Dictionary(Huffman().train(samples), LZW().train(samples, max_patterns)))
@@ -0,0 +1,407 @@
+# coding: utf-8
+
+import mmap
+import os
+import struct
+
+from compress.parallel import ordered_map
+from compress.seekable import SeekableContainer
+from compress.stream import StreamCompressor, DEFAULT_BLOCK_SIZE, ARCHIVE_MAGIC, is_archive
+
+MAGIC = ARCHIVE_MAGIC
+FORMAT_VERSION = 1
+
+# Archive header : magic, format version
+HEADER = struct.Struct(">4sB")
+
+# Central directory entry : offset of the member, compressed size, uncompressed size, method, permissions,
+# modification time in nanoseconds and length of the name, followed by the name encoded in UTF-8
+ENTRY = struct.Struct(">QQQBIqH")
+
+# Trailer, the very last bytes of the archive : offset of the central directory, number of entries, magic
+TRAILER = struct.Struct(">QI4s")
+DIRECTORY_MAGIC = b"TORC"
+
+# Method of the members compressed by Auto, the algorithm chosen for each block is in its header
+METHOD_AUTO = 0xFF
+
+
+class ArchiveMember(object):
+    """ A file stored in an archive.
+
+    Attributes
+    ----------
+    name : str
+        Path of the file in the archive, with / separators.
+
+    size : int
+        Uncompressed size.
+
+    compressed_size : int
+        Size of the member in the archive.
+
+    offset : int
+        Offset of the member in the archive.
+
+    method : int
+        Identifier of the algorithm used to compress the member (some blocks may be stored as is), METHOD_AUTO when it
+        was chosen for each block.
+
+    mode : int
+        Permissions of the file. The setuid, setgid and sticky bits are recorded but not restored by extract.
+
+    mtime_ns : int
+        Modification time of the file in nanoseconds.
+    """
+
+    def __init__(self, name, size, compressed_size, offset, method, mode, mtime_ns):
+        self.name = name
+        self.size = size
+        self.compressed_size = compressed_size
+        self.offset = offset
+        self.method = method
+        self.mode = mode
+        self.mtime_ns = mtime_ns
+
+    def __repr__(self):
+        return "ArchiveMember({!r}, {} bytes)".format(self.name, self.size)
+
+
+def list_files(paths, exclude=()):
+    """ Lists the files to archive.
+
+    Parameters
+    ----------
+    paths : list
+        Files and directories, directories are walked recursively.
+
+    exclude : iterable
+        Paths of files which are left out, like the archive itself when it is written in a directory being archived.
+
+    Returns
+    -------
+    list
+        Tuples made of the path of each file and its name in the archive, which is relative to the parent of the given
+        path (so archiving "data/logs" gives names like "logs/app.log"). Files of a directory are sorted so archives are
+        reproducible.
+    """
+
+    excluded = {os.path.abspath(path) for path in exclude}
+    files = []
+
+    for path in paths:
+        parent = os.path.dirname(os.path.abspath(path))
+
+        if not os.path.isdir(path):
+            files.append((path, os.path.basename(os.path.abspath(path))))
+            continue
+
+        for root, directories, filenames in os.walk(path):
+            directories.sort()
+
+            for filename in sorted(filenames):
+                file_path = os.path.join(root, filename)
+
+                if os.path.abspath(file_path) in excluded:
+                    continue
+
+                name = os.path.relpath(os.path.abspath(file_path), parent)
+                files.append((file_path, name.replace(os.sep, "/")))
+
+    return files
+
+
+# Compressor of the current worker process, set once by the pool initializer
+_worker = None
+
+
+def _init_worker(algorithm, block_size):
+    global _worker
+    _worker = StreamCompressor(algorithm, block_size)
+
+
+def _compress_member(path):
+    with open(path, "rb") as input_file:
+        return b"".join(_worker.compress(input_file)), _worker.bytes_in
+
+
+class ArchiveCompressor(object):
+    """ Compresses files and directories into a single archive, several files at a time.
+
+    Attributes
+    ----------
+    algorithm : Codec
+        The algorithm used to compress the files.
+
+    block_size : int
+        Size of the blocks the files are split into.
+
+    jobs : int
+        Number of worker processes, defaults to the number of CPUs.
+
+    Notes
+    -----
+    The archive starts with a header (magic and format version), followed by the members and by the central directory.
+    Each member is a container as written by StreamCompressor, with its own block index. The central directory lists
+    the name, sizes, method, permissions, modification time and offset of each member, and the trailer gives its
+    offset, so a member can be extracted (or read from the middle, see compress.seekable) without reading the others.
+    """
+
+    def __init__(self, algorithm, block_size=DEFAULT_BLOCK_SIZE, jobs=None, verbose=False):
+
+        if block_size <= 0:
+            raise ValueError("The block size must be positive.")
+
+        self.algorithm = algorithm
+        self.block_size = block_size
+        self.jobs = jobs or os.cpu_count() or 1
+        self.verbose = verbose
+
+    def __compress_members(self, files):
+
+        if self.jobs == 1:
+            _init_worker(self.algorithm, self.block_size)
+
+            for path, name in files:
+                yield _compress_member(path)
+
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(self.jobs, initializer=_init_worker,
+                                 initargs=(self.algorithm, self.block_size)) as executor:
+            # Two files per worker so they never wait, it also bounds the memory used by the compressed files
+            yield from ordered_map(executor, _compress_member, ((path,) for path, name in files), self.jobs * 2)
+
+    def compress(self, paths, output_file, exclude=()):
+        """ Archives files and directories.
+
+        Parameters
+        ----------
+        paths : list
+            Files and directories to archive, see list_files.
+
+        output_file
+            A binary file-like object where the archive is written.
+
+        exclude : iterable
+            Paths of files which are not archived, see list_files.
+
+        Returns
+        -------
+        list
+            The ArchiveMember of each file.
+        """
+
+        files = list_files(paths, exclude)
+        method = METHOD_AUTO if self.algorithm.algorithm_id is None else self.algorithm.algorithm_id
+        members = []
+        offset = HEADER.size
+
+        output_file.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+
+        for (path, name), (compressed, size) in zip(files, self.__compress_members(files)):
+            status = os.stat(path)
+            members.append(ArchiveMember(name, size, len(compressed), offset, method,
+                                         status.st_mode & 0o7777, status.st_mtime_ns))
+            output_file.write(compressed)
+            offset += len(compressed)
+
+            if self.verbose:
+                print("{} : {} bytes compressed to {} bytes.".format(name, size, len(compressed)))
+
+        directory = []
+
+        for member in members:
+            name = member.name.encode("utf-8")
+            directory.append(ENTRY.pack(member.offset, member.compressed_size, member.size, member.method,
+                                        member.mode, member.mtime_ns, len(name)) + name)
+
+        output_file.write(b"".join(directory) + TRAILER.pack(offset, len(members), DIRECTORY_MAGIC))
+        return members
+
+
+class ArchiveReader(object):
+    """ Lists and extracts the members of an archive created by ArchiveCompressor.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the archive. It is mapped in memory, so only the members which are read are loaded by the system.
+
+    Attributes
+    ----------
+    members : list
+        The ArchiveMember of each file, in the order they are stored.
+    """
+
+    def __init__(self, filename):
+        self.__file = open(filename, "rb")
+
+        try:
+            if os.fstat(self.__file.fileno()).st_size < HEADER.size + TRAILER.size:
+                raise IOError("This is not an archive.")
+
+            self.__mapped_file = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.__file.close()
+            raise
+
+        self.__data = memoryview(self.__mapped_file)
+
+        try:
+            self.members = self.__read_directory()
+        except Exception:
+            self.close()
+            raise
+
+        self.__members_by_name = {member.name: member for member in self.members}
+
+    def __read_directory(self):
+        magic, version = HEADER.unpack_from(self.__data)
+
+        if magic != MAGIC:
+            raise IOError("This is not an archive.")
+
+        if version != FORMAT_VERSION:
+            raise IOError("Unsupported archive version {}.".format(version))
+
+        offset, count, magic = TRAILER.unpack_from(self.__data, len(self.__data) - TRAILER.size)
+
+        if magic != DIRECTORY_MAGIC:
+            raise IOError("Corrupted archive, the central directory is missing.")
+
+        members = []
+
+        for _ in range(count):
+            member_offset, compressed_size, size, method, mode, mtime_ns, name_length = \
+                ENTRY.unpack_from(self.__data, offset)
+            offset += ENTRY.size
+            name = bytes(self.__data[offset:offset + name_length]).decode("utf-8")
+            offset += name_length
+
+            if member_offset + compressed_size > len(self.__data):
+                raise IOError("Corrupted archive, {} goes past its end.".format(name))
+
+            members.append(ArchiveMember(name, size, compressed_size, member_offset, method, mode, mtime_ns))
+
+        return members
+
+    def names(self):
+        """ Returns the names of the members. """
+
+        return [member.name for member in self.members]
+
+    def get_member(self, name):
+        """ Returns the ArchiveMember of a name, a KeyError is raised if there is none. """
+
+        try:
+            return self.__members_by_name[name]
+        except KeyError:
+            raise KeyError("There is no {} in the archive.".format(name))
+
+    def open(self, name):
+        """ Returns a SeekableContainer reading a member, only the blocks which are read are decompressed. It must be
+        closed before the archive.
+
+        Parameters
+        ----------
+        name : str
+            Name of the member.
+
+        Returns
+        -------
+        SeekableContainer
+            The member.
+        """
+
+        member = self.get_member(name)
+        return SeekableContainer(self.__data[member.offset:member.offset + member.compressed_size], cache_size=1)
+
+    def read(self, name):
+        """ Returns the content of a member.
+
+        Parameters
+        ----------
+        name : str
+            Name of the member.
+
+        Returns
+        -------
+        bytes
+            The uncompressed content.
+        """
+
+        with self.open(name) as container:
+            return container.read(0, container.size)
+
+    def extract(self, name, directory="."):
+        """ Extracts a member, only this member is decompressed.
+
+        Parameters
+        ----------
+        name : str
+            Name of the member.
+
+        directory : str
+            Where the member is extracted, the directories of its name are created.
+
+        Returns
+        -------
+        str
+            Path of the extracted file.
+        """
+
+        member = self.get_member(name)
+        parts = member.name.split("/")
+
+        # Names come from the archive, they must not write outside of the directory
+        if os.path.isabs(member.name) or any(part in ("", ".", "..") for part in parts):
+            raise IOError("Unsafe name {} in the archive.".format(member.name))
+
+        path = os.path.join(directory, *parts)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self.open(name) as container, open(path, "wb") as output_file:
+            # Block by block, so the memory used doesn't depend on the size of the member
+            for number in range(len(container.block_offsets)):
+                output_file.write(container.read_block(number))
+
+        # Like tar without -p, the setuid, setgid and sticky bits recorded in an archive aren't restored
+        os.chmod(path, member.mode & 0o777)
+        os.utime(path, ns=(member.mtime_ns, member.mtime_ns))
+        return path
+
+    def extractall(self, directory=".", names=None):
+        """ Extracts all the members, or only some of them.
+
+        Parameters
+        ----------
+        directory : str
+            Where the members are extracted.
+
+        names : list
+            Names of the members to extract, all of them by default.
+
+        Returns
+        -------
+        list
+            Paths of the extracted files.
+        """
+
+        return [self.extract(name, directory) for name in (self.names() if names is None else names)]
+
+    def close(self):
+        """ Releases the archive, the containers returned by open must have been closed. """
+
+        self.__data.release()
+        self.__mapped_file.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
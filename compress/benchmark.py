@@ -0,0 +1,446 @@
+# coding: utf-8
+
+import csv
+from functools import partial
+import json
+import os
+import platform
+import random
+import statistics
+import struct
+import time
+import tracemalloc
+
+from compress.algorithms import ALGORITHMS
+
+DEFAULT_CORPUS_SIZE = 256 * 1024  # 256 KiB per generated corpus
+DEFAULT_WARMUPS = 1
+DEFAULT_REPEATS = 5
+
+# Relative slowdown, memory increase or ratio loss above which a result is a regression. Throughputs are also allowed
+# the noise of their runs, see compare_results.
+DEFAULT_THRESHOLD = 0.1
+
+# The median absolute deviation of the runs is about 2/3 of their standard deviation, throughputs are allowed about
+# two standard deviations of each result. Noise never hides a throughput which dropped by more than MAX_TOLERANCE.
+NOISE_FACTOR = 3
+MAX_TOLERANCE = 0.5
+
+# Comparing throughputs needs at least this number of runs, the deviation of fewer runs says little about the noise
+MIN_COMPARE_REPEATS = 5
+
+# Calls shorter than this are timed several at a time in each run, the clock and the scheduler would dominate otherwise
+MIN_RUN_DURATION = 0.05
+
+# Codecs benchmarked by default : every algorithm with its default settings, and the original formats
+CONFIGURATIONS = {name: partial(algorithm) for name, algorithm in ALGORITHMS.items()}
+CONFIGURATIONS["huffman-tree"] = partial(ALGORITHMS["huffman"], canonical=False)
+CONFIGURATIONS["lzw-fixed"] = partial(ALGORITHMS["lzw"], variable_width=False)
+CONFIGURATIONS["lzss-1"] = partial(ALGORITHMS["lzss"], level=1)
+CONFIGURATIONS["lzss-9"] = partial(ALGORITHMS["lzss"], level=9)
+CONFIGURATIONS["lz-huffman-lzw"] = partial(ALGORITHMS["lz-huffman"], stage="lzw")
+CONFIGURATIONS["range-static"] = partial(ALGORITHMS["range"], model="static")
+CONFIGURATIONS["range-order1"] = partial(ALGORITHMS["range"], model="order1")
+
+# Columns of the CSV output, the JSON output has the same keys
+FIELDS = ("corpus", "kind", "codec", "size", "compressed_size", "ratio", "compress_mb_s", "decompress_mb_s",
+          "compress_peak_kib", "decompress_peak_kib", "compress_noise", "decompress_noise")
+
+WORDS = ("the", "of", "and", "to", "in", "a", "is", "that", "for", "it", "as", "was", "with", "be", "by", "on", "not",
+         "he", "this", "are", "or", "his", "from", "at", "which", "but", "have", "an", "had", "they", "you", "were",
+         "their", "one", "all", "we", "can", "her", "has", "there", "been", "if", "more", "when", "will", "would",
+         "who", "so", "no", "compression", "algorithm", "dictionary", "tree", "symbol", "frequency", "entropy")
+
+
+def generate_text(size, rng):
+    """ Sentences made of common English words, with a Zipf-like distribution. """
+
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    text = bytearray()
+
+    while len(text) < size:
+        sentence = " ".join(rng.choices(WORDS, weights, k=rng.randint(5, 20)))
+        text += (sentence[0].upper() + sentence[1:] + ". ").encode()
+
+        if rng.random() < 0.1:
+            text += b"\n"
+
+    return bytes(text[:size])
+
+
+def generate_binary(size, rng):
+    """ Fixed-size records like those of a database or a binary log : identifiers, timestamps, small integers, floats.
+    """
+
+    record = struct.Struct("<IIhBxd")
+    data = bytearray()
+    timestamp = 1500000000
+
+    for identifier in range(size // record.size + 1):
+        timestamp += rng.randint(0, 60)
+        data += record.pack(identifier, timestamp, rng.randint(-100, 100), rng.randint(0, 3), rng.gauss(0, 1))
+
+    return bytes(data[:size])
+
+
+def generate_image(size, rng):
+    """ A PPM image made of noisy gradients, like the ones the original benchmark used. """
+
+    width = 256
+    height = max(1, size // (width * 3))
+    image = bytearray(b"P6\n%d %d\n255\n" % (width, height))
+
+    for y in range(height):
+        for x in range(width):
+            noise = rng.randint(-4, 4)
+            image += bytes(((x + noise) & 255, (y + noise) & 255, ((x + y) // 2) & 255))
+
+    return bytes(image[:size])
+
+
+def generate_random(size, rng):
+    """ Uniformly random bytes, which can't be compressed. """
+
+    return rng.getrandbits(size * 8).to_bytes(size, "little") if size else b""
+
+
+def generate_repetitive(size, rng):
+    """ A short pattern repeated over and over, with a few mutations. """
+
+    pattern = generate_text(64, rng)
+    data = bytearray((pattern * (size // len(pattern) + 1))[:size])
+
+    for _ in range(size // 4096):
+        data[rng.randrange(size)] = rng.randrange(256)
+
+    return bytes(data)
+
+
+GENERATORS = {
+    "text": generate_text,
+    "binary": generate_binary,
+    "image": generate_image,
+    "random": generate_random,
+    "repetitive": generate_repetitive,
+}
+
+
+def generate_corpora(size=DEFAULT_CORPUS_SIZE, seed=0):
+    """ Generates one corpus of each kind. They only depend on the size and the seed, so runs can be compared.
+
+    Parameters
+    ----------
+    size : int
+        Size of each corpus in bytes.
+
+    seed : int
+        Seed of the pseudo-random generator.
+
+    Returns
+    -------
+    list
+        Tuples made of the name, the kind and the content of each corpus.
+    """
+
+    return [(kind, kind, generator(size, random.Random(seed))) for kind, generator in GENERATORS.items()]
+
+
+def discover_corpora(directory):
+    """ Uses the files of a directory (and its subdirectories) as corpora, like the images of the original dataset.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to look into.
+
+    Returns
+    -------
+    list
+        Tuples made of the name (path relative to the directory), the kind ("file") and the content of each non-empty
+        file, sorted by name.
+    """
+
+    if not os.path.isdir(directory):
+        raise IOError("{} is not a directory.".format(directory))
+
+    corpora = []
+
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+
+            with open(path, "rb") as corpus_file:
+                content = corpus_file.read()
+
+            if content:
+                corpora.append((os.path.relpath(path, directory), "file", content))
+
+    return sorted(corpora)
+
+
+def calls_per_run(function, argument):
+    """ Returns how many successive calls make a run of at least MIN_RUN_DURATION, from the duration of a call. """
+
+    begin = time.perf_counter()
+    function(argument)
+    return max(1, min(1000, int(MIN_RUN_DURATION / max(time.perf_counter() - begin, 1e-6))))
+
+
+def time_run(function, argument, calls):
+    """ Returns the mean duration in seconds of calls successive calls. """
+
+    begin = time.perf_counter()
+
+    for _ in range(calls):
+        function(argument)
+
+    return (time.perf_counter() - begin) / calls
+
+
+def summarize_durations(durations):
+    """ Returns the shortest duration, which is the least disturbed by the rest of the system, and the noise of the
+    runs : their median absolute deviation relative to their median, which a single disturbed run barely changes. """
+
+    median = statistics.median(durations)
+    return min(durations), statistics.median(abs(duration - median) for duration in durations) / median
+
+
+def measure_peak_memory(function, argument):
+    """ Returns the peak memory allocated during a call in bytes, on top of what was allocated before it. """
+
+    was_tracing = tracemalloc.is_tracing()
+
+    if not was_tracing:
+        tracemalloc.start()
+
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    try:
+        function(argument)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def check_round_trip(codec, data):
+    """ Compresses the data, checks that it is restored and returns the payload. """
+
+    payload = codec.compress_block(data)
+
+    if codec.decompress_block(payload) != data:
+        raise Exception("{} did not restore the original data.".format(codec.name))
+
+    return payload
+
+
+def make_result(data, payload, compress_timing, decompress_timing, compress_peak, decompress_peak):
+    """ Returns the measures of a codec on a corpus as a dict, with the keys listed in FIELDS but the first three. """
+
+    compress_time, compress_noise = compress_timing
+    decompress_time, decompress_noise = decompress_timing
+
+    return {
+        "size": len(data),
+        "compressed_size": len(payload),
+        "ratio": round(len(payload) / len(data), 4),
+        "compress_mb_s": round(len(data) / compress_time / 1e6, 3),
+        "decompress_mb_s": round(len(data) / decompress_time / 1e6, 3),
+        "compress_peak_kib": round(compress_peak / 1024, 1),
+        "decompress_peak_kib": round(decompress_peak / 1024, 1),
+        "compress_noise": round(compress_noise, 3),
+        "decompress_noise": round(decompress_noise, 3),
+    }
+
+
+def run_benchmark(corpora, codecs=None, warmups=DEFAULT_WARMUPS, repeats=DEFAULT_REPEATS, verbose=False):
+    """ Measures every codec on every corpus.
+
+    Parameters
+    ----------
+    corpora : list
+        Tuples made of the name, the kind and the content of each corpus, see generate_corpora and discover_corpora.
+
+    codecs : list
+        Names of the configurations to measure (keys of CONFIGURATIONS), all of them by default.
+
+    warmups : int
+        Number of runs before measuring.
+
+    repeats : int
+        Number of measured runs.
+
+    verbose : bool
+        Print each result as soon as it is known.
+
+    Returns
+    -------
+    list
+        One dict per corpus and codec, with the keys listed in FIELDS.
+
+    Notes
+    -----
+    The speed of a machine varies over seconds (other processes, frequency scaling, shared virtual machines), so the
+    runs of a codec aren't successive : every codec is run once on every corpus, then again, repeats times. The
+    shortest run of each codec is then taken at different moments, and the deviation of its runs shows how much the
+    machine varied during the whole benchmark (see summarize_durations).
+    """
+
+    if repeats <= 0:
+        raise ValueError("The number of repeats must be positive.")
+
+    codecs = list(CONFIGURATIONS) if codecs is None else codecs
+
+    for codec_name in codecs:
+        if codec_name not in CONFIGURATIONS:
+            raise ValueError("Unknown codec {}.".format(codec_name))
+
+    measures = []
+
+    for corpus_name, kind, data in corpora:
+        for codec_name in codecs:
+            codec = CONFIGURATIONS[codec_name]()
+            payload = check_round_trip(codec, data)
+
+            for _ in range(warmups):
+                codec.compress_block(data)
+                codec.decompress_block(payload)
+
+            measures.append({"corpus": corpus_name, "kind": kind, "codec": codec_name, "instance": codec, "data": data,
+                             "payload": payload, "compress_calls": calls_per_run(codec.compress_block, data),
+                             "decompress_calls": calls_per_run(codec.decompress_block, payload),
+                             "compress_durations": [], "decompress_durations": []})
+
+    results = []
+
+    for repeat in range(repeats):
+        for measure in measures:
+            codec, data, payload = measure["instance"], measure["data"], measure["payload"]
+            measure["compress_durations"].append(time_run(codec.compress_block, data, measure["compress_calls"]))
+            measure["decompress_durations"].append(time_run(codec.decompress_block, payload,
+                                                            measure["decompress_calls"]))
+
+            if repeat < repeats - 1:
+                continue
+
+            # Measured apart since tracing the allocations slows everything down
+            result = {"corpus": measure["corpus"], "kind": measure["kind"], "codec": measure["codec"]}
+            result.update(make_result(data, payload, summarize_durations(measure["compress_durations"]),
+                                      summarize_durations(measure["decompress_durations"]),
+                                      measure_peak_memory(codec.compress_block, data),
+                                      measure_peak_memory(codec.decompress_block, payload)))
+            results.append(result)
+
+            if verbose:
+                print("{corpus:<20} {codec:<14} ratio {ratio:.3f}  compress {compress_mb_s:8.3f} MB/s "
+                      "(±{compress_noise:.0%})  decompress {decompress_mb_s:8.3f} MB/s (±{decompress_noise:.0%})  "
+                      "peak {compress_peak_kib:.0f}/{decompress_peak_kib:.0f} KiB".format(**result))
+
+    return results
+
+
+def write_results(results, filename):
+    """ Writes the results as CSV when the file name ends with .csv, as JSON otherwise.
+
+    The JSON file also records the Python version and the machine, so results of different machines aren't mixed up.
+    """
+
+    with open(filename, "w", newline="") as output_file:
+        if filename.lower().endswith(".csv"):
+            writer = csv.DictWriter(output_file, FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results},
+                      output_file, indent=2)
+
+
+def read_results(filename):
+    """ Reads results written by write_results in JSON. """
+
+    with open(filename) as input_file:
+        return json.load(input_file)["results"]
+
+
+def compare_results(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """ Looks for regressions between two runs. Results are matched by corpus and codec, the others are ignored.
+
+    The ratio and the memory barely change from one run to the next, so they are compared with the threshold alone.
+    Throughputs vary with the load of the machine, they must also drop by more than NOISE_FACTOR times the noise of
+    the runs of both results (see summarize_durations), so a noisy measure isn't reported as a regression. The tolerance is capped at
+    MAX_TOLERANCE, so a large drop is reported however noisy the machine was.
+
+    Parameters
+    ----------
+    baseline : list
+        The results of the reference run.
+
+    results : list
+        The results of the new run.
+
+    threshold : float
+        Relative change tolerated, 0.1 means a throughput may be 10% lower (plus the noise) and the memory or the
+        ratio 10% higher.
+
+    Returns
+    -------
+    list
+        A message describing each regression, empty if there are none.
+    """
+
+    reference = {(result["corpus"], result["codec"]): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        old = reference.get((result["corpus"], result["codec"]))
+
+        if old is None:
+            continue
+
+        for field in FIELDS[5:10]:
+            old_value, new_value = old[field], result[field]
+
+            if field.endswith("mb_s"):
+                # Results written before the noise was recorded have none
+                noise_field = field.replace("mb_s", "noise")
+                noise = old.get(noise_field, 0) + result.get(noise_field, 0)
+                tolerance = min(threshold + NOISE_FACTOR * noise, MAX_TOLERANCE)
+                regressed = new_value < old_value * (1 - tolerance)
+            else:
+                regressed = new_value > old_value * (1 + threshold)
+
+            if regressed:
+                regressions.append("{} / {} : {} went from {} to {}.".format(
+                    result["corpus"], result["codec"], field, old_value, new_value))
+
+    return regressions
+
+
+def plot_results(results):
+    """ Shows the compression ratio and the throughputs of each codec on each corpus, it requires matplotlib. """
+
+    import matplotlib.pyplot as plt
+
+    corpora = sorted({result["corpus"] for result in results})
+    codecs = sorted({result["codec"] for result in results})
+    values = {(result["corpus"], result["codec"]): result for result in results}
+    bar_width = 0.8 / len(codecs)
+
+    for field, label in (("ratio", "Compression ratio"), ("compress_mb_s", "Compression speed (MB/s)"),
+                         ("decompress_mb_s", "Decompression speed (MB/s)")):
+        fig, ax = plt.subplots()
+
+        for index, codec in enumerate(codecs):
+            ax.bar([position + index * bar_width for position in range(len(corpora))],
+                   [values[corpus, codec][field] if (corpus, codec) in values else 0 for corpus in corpora],
+                   bar_width, label=codec, alpha=0.6)
+
+        ax.set_xlabel('Corpus')
+        ax.set_ylabel(label)
+        ax.set_xticks([position + bar_width * (len(codecs) - 1) / 2 for position in range(len(corpora))])
+        ax.set_xticklabels(corpora)
+        ax.legend()
+        fig.tight_layout()
+
+    plt.show()
@@ -0,0 +1,210 @@
+# coding: utf-8
+
+from collections import OrderedDict
+from hashlib import blake2b
+import os
+import tempfile
+import threading
+
+DEFAULT_MAX_SIZE = 64 << 20  # 64 MiB
+
+
+class CompressionCache(object):
+    """ Remembers compressed payloads by the hash of what was compressed, so identical inputs are compressed once.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of bytes of payloads kept in memory, the least recently used ones are evicted first.
+
+    directory : str
+        Where the payloads are also stored, so they are found by the next runs and by other processes. The directory
+        is created when needed, its files are never deleted by the cache.
+
+    Attributes
+    ----------
+    size : int
+        Number of bytes of payloads in memory.
+
+    hits : int
+        Number of payloads found, in memory or on disk.
+
+    disk_hits : int
+        Number of payloads found on disk only, they are then kept in memory too.
+
+    misses : int
+        Number of payloads which had to be computed.
+
+    evictions : int
+        Number of payloads evicted from memory.
+
+    Notes
+    -----
+    Keys are BLAKE2b digests of the input and of what else determines the payload (the algorithm and its parameters,
+    see Codec.cache_key), so a hit costs hashing the input, which is a lot faster than compressing it. A cache can be
+    shared between codecs and threads. Set it as the cache attribute of a codec (see Codec.choose_method) : the
+    in-memory API, the containers and the archives then look every block up, and compress_file every file.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, directory=None):
+
+        if max_size < 0:
+            raise ValueError("The size of the cache can't be negative.")
+
+        self.max_size = max_size
+        self.directory = directory
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent to the worker processes along with a codec : the lock can't be pickled, and like the caches of the
+        # dictionaries, the payloads in memory are rebuilt by each process rather than sent (the directory is shared)
+        state = self.__dict__.copy()
+        del state["_CompressionCache__lock"]
+        state["_CompressionCache__entries"] = OrderedDict()
+        state["size"] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def make_key(data, parameters):
+        """ Returns the key of a payload.
+
+        Parameters
+        ----------
+        data
+            The input, any object supporting the buffer protocol.
+
+        parameters : tuple
+            What else determines the payload, made of strings, numbers, booleans and None.
+
+        Returns
+        -------
+        str
+            The hexadecimal digest.
+        """
+
+        digest = blake2b(repr(parameters).encode("utf-8"), digest_size=20)
+        digest.update(data)
+        return digest.hexdigest()
+
+    def __path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key):
+        """ Returns the payload of a key, or None when it isn't in the cache. """
+
+        with self.__lock:
+            payload = self.__entries.get(key)
+
+            if payload is not None:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return payload
+
+        if self.directory is not None:
+            try:
+                with open(self.__path(key), "rb") as cache_file:
+                    payload = cache_file.read()
+            except FileNotFoundError:
+                pass
+            else:
+                with self.__lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+
+                self.__remember(key, payload)
+                return payload
+
+        with self.__lock:
+            self.misses += 1
+
+        return None
+
+    def put(self, key, payload):
+        """ Stores the payload of a key, in memory and on disk when there is a directory. """
+
+        payload = bytes(payload)
+        self.__remember(key, payload)
+
+        if self.directory is not None:
+            path = self.__path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Written aside then renamed, so other processes never read a partial file
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+
+            try:
+                with os.fdopen(file_descriptor, "wb") as cache_file:
+                    cache_file.write(payload)
+
+                os.replace(temporary_path, path)
+            except BaseException:
+                os.unlink(temporary_path)
+                raise
+
+    def __remember(self, key, payload):
+
+        if len(payload) > self.max_size:
+            return
+
+        with self.__lock:
+            previous = self.__entries.pop(key, None)
+
+            if previous is not None:
+                self.size -= len(previous)
+
+            self.__entries[key] = payload
+            self.size += len(payload)
+
+            while self.size > self.max_size:
+                evicted_key, evicted = self.__entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def lookup(self, data, parameters, compute):
+        """ Returns the payload of an input, computed and stored when it isn't in the cache.
+
+        Parameters
+        ----------
+        data
+            The input, any object supporting the buffer protocol.
+
+        parameters : tuple
+            What else determines the payload, see make_key.
+
+        compute : callable
+            Called without argument to compute the payload on a miss.
+
+        Returns
+        -------
+        bytes
+            The payload.
+        """
+
+        key = self.make_key(data, parameters)
+        payload = self.get(key)
+
+        if payload is None:
+            payload = compute()
+            self.put(key, payload)
+
+        return payload
+
+    def clear(self):
+        """ Forgets the payloads kept in memory, the files of the directory are kept. """
+
+        with self.__lock:
+            self.__entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self.__entries)
@@ -0,0 +1,446 @@
+# coding: utf-8
+
+""" Command line interface, run with python -m compress or the compress.py script.
+
+Modules which are only needed by some modes (the benchmark, the archives, the worker processes...) are imported by
+these modes, so compressing or decompressing a small file doesn't wait for them to be imported.
+"""
+
+from optparse import OptionParser, OptionValueError
+import contextlib
+import os
+import sys
+
+from compress.algorithms import ALGORITHMS
+from compress.stream import StreamCompressor, StreamDecompressor, DEFAULT_BLOCK_SIZE, MAGIC, is_archive, is_container
+from compress.utils.dictionaries import load_dictionary
+
+
+def benchmark(options):
+    """ Measures the algorithms, writes the results and compares them with a previous run.
+
+    Returns
+    -------
+    int
+        The exit status, 1 when a regression has been found.
+    """
+
+    from compress import benchmark as benchmark_module
+
+    for name in ("corpus_size", "warmups", "repeats", "threshold"):
+        if getattr(options, name) is None:
+            setattr(options, name, getattr(benchmark_module, "DEFAULT_" + name.upper()))
+
+    if options.corpus_dir is not None:
+        corpora = benchmark_module.discover_corpora(options.corpus_dir)
+    else:
+        corpora = benchmark_module.generate_corpora(options.corpus_size)
+
+    codecs = options.codecs.split(",") if options.codecs else None
+
+    print("Benchmark starting...")
+    results = benchmark_module.run_benchmark(corpora, codecs, options.warmups, options.repeats, verbose=True)
+
+    if options.results is not None:
+        benchmark_module.write_results(results, options.results)
+        print("Results written to {}".format(options.results))
+
+    if options.plot:
+        benchmark_module.plot_results(results)
+
+    if options.compare is None:
+        return 0
+
+    regressions = benchmark_module.compare_results(benchmark_module.read_results(options.compare), results,
+                                                   options.threshold)
+
+    for regression in regressions:
+        print("Regression : " + regression)
+
+    if not regressions:
+        print("No regression compared to {}".format(options.compare))
+
+    return 1 if regressions else 0
+
+
+def train(options, sample_filenames):
+    """ Trains a dictionary on sample files and saves it. """
+
+    from compress.api import train_dictionary
+
+    samples = []
+
+    for sample_filename in sample_filenames:
+        with open(sample_filename, "rb") as sample_file:
+            samples.append(sample_file.read())
+
+    dictionary = train_dictionary(samples, options.max_patterns)
+    dictionary.save(options.output)
+    print("Dictionary {:08x} written to {}".format(dictionary.dictionary_id, options.output))
+
+
+def extract_range(options, input_filename):
+    """ Decompresses a part of a container, only the blocks holding it are decompressed. """
+
+    from compress.seekable import SeekableContainer
+
+    offset, length = options.range
+
+    with SeekableContainer(input_filename) as container, open_file(options.output, "w") as output_file:
+        output_file.write(container.read(offset, length))
+
+
+def archive(algo, options, paths):
+    """ Compresses files and directories into a single archive, several files at a time when jobs isn't 1. """
+
+    from compress.archive import ArchiveCompressor
+
+    with open(options.output, "wb") as output_file:
+        compressor = ArchiveCompressor(algo, options.block_size, options.jobs, verbose=options.verbose)
+        members = compressor.compress(paths, output_file, exclude=[options.output])
+
+    input_size = sum(member.size for member in members)
+    output_size = os.path.getsize(options.output)
+    print("{} files archived in {}".format(len(members), options.output))
+
+    if input_size:
+        print("Compression gain : {0:.2f}%".format(100 - output_size * 100 / input_size))
+
+
+def extract_archive(options, input_filename):
+    """ Lists or extracts the members of an archive, only the members asked for are decompressed. """
+
+    from compress.archive import ArchiveReader
+
+    with ArchiveReader(input_filename) as reader:
+
+        if options.list:
+            for member in reader.members:
+                print("{:>12} {:>12}  {}".format(member.size, member.compressed_size, member.name))
+
+        elif options.range is not None:
+            offset, length = options.range
+
+            with reader.open(options.members[0]) as container, open_file(options.output, "w") as output_file:
+                output_file.write(container.read(offset, length))
+
+        else:
+            for path in reader.extractall(options.output, options.members or None):
+                if options.verbose:
+                    print("Extracted " + path)
+
+
+def parse_range(option, opt_str, value, parser):
+    """ Parses OFFSET:LENGTH. """
+
+    try:
+        offset, length = (int(number) for number in value.split(":"))
+    except ValueError:
+        raise OptionValueError("{} must be OFFSET:LENGTH.".format(opt_str))
+
+    if offset < 0 or length < 0:
+        raise OptionValueError("{} can't be negative.".format(opt_str))
+
+    parser.values.range = (offset, length)
+
+
+def open_file(filename, mode):
+    """ Opens a file in binary mode, "-" stands for the standard input or output. """
+
+    if filename == "-":
+        return contextlib.nullcontext(sys.stdin.buffer if "r" in mode else sys.stdout.buffer)
+
+    return open(filename, mode + "b")
+
+
+def starts_with_container(input_file):
+    """ Tells whether a binary file-like object starts with the magic of the containers, without consuming it. """
+
+    # Buffered files and the standard input can be peeked, the header is written at once so it is entirely there
+    return input_file.peek(len(MAGIC))[:len(MAGIC)] == MAGIC
+
+
+def stream(algo, options, input_filename):
+    """ Compresses or decompresses block by block, so any size of input can be processed with bounded memory. """
+
+    with open_file(input_filename, "r") as input_file, open_file(options.output, "w") as output_file:
+
+        # Keep the standard output clean when the result is written to it
+        with contextlib.redirect_stdout(sys.stderr) if options.output == "-" else contextlib.nullcontext():
+
+            if options.compress and options.jobs == 1 and hasattr(algo, "compress_stream"):
+                # The algorithm streams by itself, its output is written as soon as it is produced
+                algo.compress_stream(input_file, output_file)
+
+            elif not options.compress and hasattr(algo, "decompress_stream") and not starts_with_container(input_file):
+                # Its own format, whatever --jobs says. With several jobs, the algorithm compresses into a container.
+                algo.decompress_stream(input_file, output_file)
+
+            elif options.compress:
+                if options.jobs == 1:
+                    compressor = StreamCompressor(algo, options.block_size, verbose=options.verbose)
+                else:
+                    from compress.parallel import ParallelCompressor
+                    compressor = ParallelCompressor(algo, options.block_size, options.jobs, verbose=options.verbose)
+
+                compression_rate = compressor.compress_stream(input_file, output_file)
+                print("Compression gain : {0:.2f}%".format(compression_rate))
+
+            elif options.jobs == 1:
+                StreamDecompressor(verbose=options.verbose).decompress_stream(input_file, output_file)
+            else:
+                from compress.parallel import ParallelDecompressor
+                ParallelDecompressor(options.jobs, verbose=options.verbose).decompress_stream(input_file, output_file)
+
+
+def build_parser():
+    """ Returns the parser of the command line options. """
+
+    parser = OptionParser(usage="Usage: %prog [options] file...")
+    parser.set_defaults(verbose=False, compress=True, algo="lzw", stream=False, block_size=DEFAULT_BLOCK_SIZE, jobs=1,
+                        plot=False, train=False, max_patterns=4096,
+                        range=None, list=False, members=[])
+    parser.add_option("-v", "--verbose", action="store_true", dest="verbose",
+                      help="Set verbose mode to understand what's underneath.")
+
+    parser.add_option("-a", "--algo", action="store", dest="algo",
+                      help="Set the algorithm you want to use (Huffman, LZW, LZSS, LZ-Huffman, range, adaptive-Huffman "
+                           "or auto) default is LZW. Auto chooses the best one for each block and implies --stream, so "
+                           "do LZSS, LZ-Huffman and range.")
+
+    parser.add_option("-L", "--level", action="store", type="int", dest="level",
+                      help="Set the compression level of LZSS and LZ-Huffman, from 1 (fastest) to 9 (smallest), "
+                           "default is 6.")
+
+    parser.add_option("-M", "--model", action="store", dest="model",
+                      help="Set the model of the range coder : static, adaptive or order1 (smallest on text), default "
+                           "is adaptive.")
+
+    parser.add_option("-o", "--output", action="store", dest="output",
+                      help="Set the output file name, default is the same as input + tor extension.")
+
+    parser.add_option("-d", "--decompress", action="store_false", dest="compress",
+                      help="Decompress the file.")
+
+    parser.add_option("-s", "--stream", action="store_true", dest="stream",
+                      help="Process the file block by block to use a bounded amount of memory. Implied when the file "
+                           "or the output is - (standard input or output).")
+
+    parser.add_option("-b", "--block-size", action="store", type="int", dest="block_size",
+                      help="Set the size of the blocks in bytes when streaming, default is {}.".format(
+                          DEFAULT_BLOCK_SIZE))
+
+    parser.add_option("-j", "--jobs", action="store", type="int", dest="jobs",
+                      help="Compress or decompress the blocks on N processes, 0 means one per CPU. Implies --stream, "
+                           "default is 1.")
+
+    parser.add_option("-r", "--range", action="callback", callback=parse_range, type="string", dest="range",
+                      help="Decompress only LENGTH bytes starting at OFFSET, given as OFFSET:LENGTH. The file must have "
+                           "been compressed with --stream, only the blocks holding the range are decompressed. "
+                           "Written to the standard output by default.")
+
+    parser.add_option("-l", "--list", action="store_true", dest="list",
+                      help="List the files of an archive.")
+
+    parser.add_option("-m", "--member", action="append", dest="members",
+                      help="Extract only this file of an archive, can be given several times. The other files are not "
+                           "decompressed.")
+
+    parser.add_option("-c", "--cache", action="store", dest="cache",
+                      help="Keep the compressed blocks and files in this directory, identical inputs are then taken "
+                           "from it instead of being compressed again, even by the next runs.")
+
+    parser.add_option("-D", "--dictionary", action="store", dest="dictionary",
+                      help="Use a dictionary created by --train, it makes small files much smaller. The same dictionary "
+                           "is needed to decompress.")
+
+    parser.add_option("--train", action="store_true", dest="train",
+                      help="Create a dictionary from sample files given as arguments, written to the output file "
+                           "(default is dictionary.tord).")
+
+    parser.add_option("--max-patterns", action="store", type="int", dest="max_patterns",
+                      help="Maximum number of LZW sequences in a dictionary created by --train, default is 4096.")
+
+    # The benchmark module is only imported by --benchmark, its defaults are given here in words and set by benchmark
+    parser.add_option("--benchmark", action="store_true", dest="benchmark",
+                      help="Start benchmarking compession algorithms.")
+
+    parser.add_option("--corpus-dir", action="store", dest="corpus_dir",
+                      help="Benchmark on the files of this directory instead of generated corpora.")
+
+    parser.add_option("--corpus-size", action="store", type="int", dest="corpus_size",
+                      help="Size in bytes of each generated corpus, default is 256 KiB.")
+
+    parser.add_option("--codecs", action="store", dest="codecs",
+                      help="Comma separated list of the codecs to benchmark, among the algorithms, huffman-tree, "
+                           "lzw-fixed, lzss-1, lzss-9, lz-huffman-lzw, range-static and range-order1. Default is all "
+                           "of them.")
+
+    parser.add_option("--warmups", action="store", type="int", dest="warmups",
+                      help="Number of runs before measuring, default is 1.")
+
+    parser.add_option("--repeats", action="store", type="int", dest="repeats",
+                      help="Number of measured runs, the shortest is kept. Default is 5, and at least 5 with "
+                           "--compare.")
+
+    parser.add_option("--results", action="store", dest="results",
+                      help="Write the benchmark results to this file, as CSV if it ends with .csv, as JSON otherwise.")
+
+    parser.add_option("--compare", action="store", dest="compare",
+                      help="Compare the benchmark results with a JSON file written by --results, exit with status 1 "
+                           "when there is a regression.")
+
+    parser.add_option("--threshold", action="store", type="float", dest="threshold",
+                      help="Relative change tolerated by --compare, default is 0.1.")
+
+    parser.add_option("--plot", action="store_true", dest="plot",
+                      help="Show the benchmark results with matplotlib.")
+
+    return parser
+
+
+def main(args=None):
+    """ Runs the command line.
+
+    Parameters
+    ----------
+    args : list
+        The arguments, sys.argv[1:] by default.
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+
+    parser = build_parser()
+    (options, args) = parser.parse_args(args)
+
+    if options.benchmark:
+        from compress.benchmark import MIN_COMPARE_REPEATS
+
+        if options.compare is not None and options.repeats is not None and options.repeats < MIN_COMPARE_REPEATS:
+            parser.error("--compare needs at least {} repeats to tell a regression from noise.".format(
+                MIN_COMPARE_REPEATS))
+
+        return benchmark(options)
+
+    if options.train:
+        if not args:
+            parser.error("Please specify the sample files to train the dictionary on.")
+
+        if options.output is None:
+            options.output = "dictionary.tord"
+
+        train(options, args)
+        return 0
+
+    if not args:
+        parser.error("Please specify a file to compress.")
+
+    # Several files or a directory are compressed into an archive, archives are recognized by their magic
+    archiving = options.compress and (len(args) > 1 or os.path.isdir(args[0]))
+    extracting = not options.compress and os.path.isfile(args[0]) and is_archive(args[0])
+
+    # Containers record the method of each block, they are decompressed block by block whatever --algo is
+    container = not options.compress and not extracting and os.path.isfile(args[0]) and is_container(args[0])
+
+    if len(args) != 1 and not archiving:
+        parser.error("Please specify a single file to decompress.")
+
+    if archiving and "-" in args:
+        parser.error("The standard input can't be archived.")
+
+    if (options.list or options.members) and not extracting:
+        parser.error("--list and --member can only be used with an archive to decompress.")
+
+    if extracting and options.range is not None and len(options.members) != 1:
+        parser.error("--range needs a single --member to read an archive.")
+
+    if options.output is None:
+        if archiving:
+            options.output = os.path.basename(os.path.abspath(args[0])) + ".tor" if len(args) == 1 else "archive.tor"
+        elif options.range is not None and not options.compress:
+            # A range of a container or of a member of an archive is written to the standard output, like with cat
+            options.output = "-"
+        elif extracting:
+            options.output = "."
+        elif args[0] == "-":
+            options.output = "-"
+        elif options.compress:
+            options.output = args[0] + ".tor"
+        else:
+            tor_index = args[0].find(".tor")
+
+            if tor_index != -1:
+                options.output = args[0][:tor_index]
+            else:
+                options.output = args[0] + "_extracted"
+
+    if options.algo.lower() not in ALGORITHMS:
+        parser.error("Algorithm does not exist or is not supported yet.")
+
+    if options.block_size <= 0:
+        parser.error("The block size must be positive.")
+
+    algorithm_class = ALGORITHMS[options.algo.lower()]
+    settings = {"verbose": options.verbose}
+
+    if options.level is not None:
+        if options.level not in getattr(algorithm_class, "levels", ()):
+            parser.error("The {} algorithm has no level {}.".format(algorithm_class.name, options.level))
+
+        settings["level"] = options.level
+
+    if options.model is not None:
+        if options.model not in getattr(algorithm_class, "models", ()):
+            parser.error("The {} algorithm has no model {}.".format(algorithm_class.name, options.model))
+
+        settings["model"] = options.model
+
+    if options.dictionary is not None:
+        if not algorithm_class.supports_dictionary:
+            parser.error("The {} algorithm doesn't support dictionaries.".format(algorithm_class.name))
+
+        # Loading it is enough to decompress, payloads refer to it by identifier
+        settings["dictionary"] = load_dictionary(options.dictionary)
+
+    algo = algorithm_class(**settings)
+
+    if options.cache is not None and options.compress:
+        from compress.cache import CompressionCache
+        algo.cache = CompressionCache(directory=options.cache)
+
+    if options.jobs < 0:
+        parser.error("The number of jobs can't be negative.")
+
+    if archiving:
+        archive(algo, options, args)
+    elif extracting:
+        try:
+            extract_archive(options, args[0])
+        except KeyError as error:
+            parser.error(error.args[0])
+    elif options.range is not None:
+        if options.compress:
+            parser.error("--range can only be used to decompress.")
+
+        if args[0] == "-":
+            parser.error("--range needs a file, the standard input can't be seeked.")
+
+        extract_range(options, args[0])
+    elif options.stream or options.jobs != 1 or args[0] == "-" or options.output == "-" or container or \
+            not hasattr(algo, "compress_file"):
+        stream(algo, options, args[0])
+    elif options.compress:
+        algo.compress_file(args[0], options.output)
+    else:
+        algo.decompress_file(args[0], options.output)
+
+    if algo.cache is not None and options.verbose:
+        # Worker processes have their own counters, only what this process looked up is counted
+        print("Cache : {} hits ({} from disk), {} misses.".format(algo.cache.hits, algo.cache.disk_hits,
+                                                                  algo.cache.misses),
+              file=sys.stderr if options.output == "-" else sys.stdout)
+
+    return 0
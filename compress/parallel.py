@@ -0,0 +1,130 @@
+# coding: utf-8
+
+from collections import deque
+import os
+
+from compress.stream import StreamCompressor, StreamDecompressor, BLOCK_HEADER, DEFAULT_BLOCK_SIZE
+from compress.utils.dictionaries import register_dictionary, registered_dictionaries
+
+# Codec of the current worker process, set once by the pool initializer so it isn't sent along with every block
+_worker = None
+
+
+def _init_compression_worker(algorithm, block_size):
+    global _worker
+    _worker = StreamCompressor(algorithm, block_size)
+
+
+def _compress_block(block):
+    return _worker.compress_block(block)
+
+
+def _init_decompression_worker(dictionaries):
+    global _worker
+    _worker = StreamDecompressor()
+
+    # Workers don't share the memory of the main process, the dictionaries it loaded are sent to them
+    for dictionary in dictionaries:
+        register_dictionary(dictionary)
+
+
+def _decompress_block(method, size, payload):
+    return _worker.decompress_block(method, payload, size)
+
+
+def ordered_map(executor, function, items, window):
+    """ Submits the items to the executor and yields the results in order.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor
+        Where the work is done.
+
+    function : callable
+        Function applied to each item, it must be picklable when the executor is a process pool.
+
+    items : iterable
+        Tuples of arguments for the function.
+
+    window : int
+        Maximum number of items being processed at the same time. It bounds the memory used when the consumer is slower
+        than the producer.
+
+    Yields
+    ------
+    The results, in the order of the items.
+    """
+
+    pending = deque()
+
+    for item in items:
+        pending.append(executor.submit(function, *item))
+
+        if len(pending) >= window:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+class ParallelCompressor(StreamCompressor):
+    """ Compresses the blocks of a stream on several processes.
+
+    The output is the same container as StreamCompressor's, the blocks are written in order.
+
+    Attributes
+    ----------
+    jobs : int
+        Number of worker processes, defaults to the number of CPUs.
+    """
+
+    def __init__(self, algorithm, block_size=DEFAULT_BLOCK_SIZE, jobs=None, verbose=False):
+        super().__init__(algorithm, block_size, verbose)
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def compress_blocks(self, blocks):
+
+        if self.jobs == 1:
+            yield from super().compress_blocks(blocks)
+            return
+
+        # Importing it takes longer than compressing a small file, it is only imported when there are workers
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(self.jobs, initializer=_init_compression_worker,
+                                 initargs=(self.algorithm, self.block_size)) as executor:
+
+            # Two blocks per worker so they never wait for the next one to be read
+            for frame in ordered_map(executor, _compress_block, ((block,) for block in blocks), self.jobs * 2):
+
+                if self.verbose:
+                    method, size, payload_size = BLOCK_HEADER.unpack_from(frame)
+                    print("Block of {} bytes compressed to {} bytes (method {}).".format(size, payload_size, method))
+
+                yield frame
+
+
+class ParallelDecompressor(StreamDecompressor):
+    """ Decompresses the blocks of a container on several processes.
+
+    Attributes
+    ----------
+    jobs : int
+        Number of worker processes, defaults to the number of CPUs.
+    """
+
+    def __init__(self, jobs=None, verbose=False):
+        super().__init__(verbose)
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def decompress_blocks(self, frames):
+
+        if self.jobs == 1:
+            yield from super().decompress_blocks(frames)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(self.jobs, initializer=_init_decompression_worker,
+                                 initargs=(registered_dictionaries(),)) as executor:
+            yield from ordered_map(executor, _decompress_block, frames, self.jobs * 2)
@@ -0,0 +1,262 @@
+# coding: utf-8
+
+from bisect import bisect_right
+from collections import OrderedDict
+import io
+import mmap
+import os
+
+from compress.stream import StreamDecompressor, BLOCK_HEADER, FLAG_INDEX, HEADER, INDEX_ENTRY, INDEX_MAGIC, \
+    INDEX_TRAILER, MAGIC, FORMAT_VERSION
+
+
+class SeekableContainer(object):
+    """ Reads any part of a container created by StreamCompressor, only decompressing the blocks holding it.
+
+    Parameters
+    ----------
+    source
+        File name, binary file object or bytes-like object. Files are mapped in memory, so only the blocks which are
+        read are loaded by the system.
+
+    cache_size : int
+        Number of decompressed blocks kept, so successive small reads of the same block decompress it once.
+
+    Attributes
+    ----------
+    size : int
+        Size of the uncompressed data.
+
+    block_offsets : list
+        Uncompressed offset of the first byte of each block.
+
+    Notes
+    -----
+    The trailing index gives the offset of each block header and its uncompressed size, so finding the block holding
+    an offset is a binary search and reading it costs the decompression of a single block whatever the size of the
+    container. Containers without index are supported, their block headers are read one after the other when opening
+    them (the payloads are skipped).
+    """
+
+    DEFAULT_CACHE_SIZE = 4
+
+    def __init__(self, source, cache_size=DEFAULT_CACHE_SIZE):
+        self.__file = None
+        self.__mapped_file = None
+
+        if isinstance(source, (str, os.PathLike)):
+            source = self.__file = open(source, "rb")
+
+        if hasattr(source, "fileno"):
+            if not os.fstat(source.fileno()).st_size:
+                raise IOError("This is not a compressed stream.")
+
+            self.__mapped_file = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__data = memoryview(self.__mapped_file)
+        else:
+            self.__data = memoryview(source).cast("B")
+
+        self.__decompressor = StreamDecompressor()
+        self.__cache = OrderedDict()
+        self.cache_size = cache_size
+
+        try:
+            flags = self.__read_header()
+            self.__headers, sizes = self.__read_index() if flags & FLAG_INDEX else self.__scan_blocks()
+        except Exception:
+            self.close()
+            raise
+
+        self.block_offsets = []
+        self.size = 0
+
+        for size in sizes:
+            self.block_offsets.append(self.size)
+            self.size += size
+
+    def __read_header(self):
+        if len(self.__data) < HEADER.size:
+            raise IOError("This is not a compressed stream.")
+
+        magic, version, flags, block_size = HEADER.unpack_from(self.__data)
+
+        if magic != MAGIC:
+            raise IOError("This is not a compressed stream.")
+
+        if version != FORMAT_VERSION:
+            raise IOError("Unsupported stream version {}.".format(version))
+
+        return flags
+
+    def __read_index(self):
+        if len(self.__data) < HEADER.size + INDEX_TRAILER.size:
+            raise IOError("Truncated stream, the index is missing.")
+
+        index_offset, count, magic = INDEX_TRAILER.unpack_from(self.__data, len(self.__data) - INDEX_TRAILER.size)
+
+        if magic != INDEX_MAGIC or index_offset + count * INDEX_ENTRY.size + INDEX_TRAILER.size != len(self.__data):
+            raise IOError("Corrupted index.")
+
+        entries = [INDEX_ENTRY.unpack_from(self.__data, index_offset + number * INDEX_ENTRY.size)
+                   for number in range(count)]
+        return [offset for offset, size in entries], [size for offset, size in entries]
+
+    def __scan_blocks(self):
+        headers = []
+        sizes = []
+        offset = HEADER.size
+
+        while True:
+            if offset + BLOCK_HEADER.size > len(self.__data):
+                raise IOError("Truncated stream, the end of the stream is missing.")
+
+            method, size, payload_size = BLOCK_HEADER.unpack_from(self.__data, offset)
+
+            if not size:
+                return headers, sizes
+
+            headers.append(offset)
+            sizes.append(size)
+            offset += BLOCK_HEADER.size + payload_size
+
+    def read_block(self, number):
+        """ Returns a decompressed block.
+
+        Parameters
+        ----------
+        number : int
+            Index of the block, starting from 0.
+
+        Returns
+        -------
+        bytes
+            The uncompressed block.
+        """
+
+        try:
+            self.__cache.move_to_end(number)
+            return self.__cache[number]
+        except KeyError:
+            pass
+
+        offset = self.__headers[number]
+        method, size, payload_size = BLOCK_HEADER.unpack_from(self.__data, offset)
+        payload_start = offset + BLOCK_HEADER.size
+
+        if payload_start + payload_size > len(self.__data):
+            raise IOError("Truncated block {}.".format(number))
+
+        # The payload is a view of the mapped file, it is released before the file can be closed
+        with self.__data[payload_start:payload_start + payload_size] as payload:
+            block = bytes(self.__decompressor.decompress_block(method, payload, size))
+
+        self.__cache[number] = block
+
+        if len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+
+        return block
+
+    def read(self, offset, length):
+        """ Returns length bytes of the uncompressed data, starting at offset. Less bytes are returned when the end of
+        the data is reached.
+
+        Parameters
+        ----------
+        offset : int
+            Uncompressed offset of the first byte to read.
+
+        length : int
+            Number of bytes to read.
+
+        Returns
+        -------
+        bytes
+            The uncompressed bytes.
+        """
+
+        if offset < 0 or length < 0:
+            raise ValueError("The offset and the length can't be negative.")
+
+        end = min(offset + length, self.size)
+        pieces = []
+
+        while offset < end:
+            number = bisect_right(self.block_offsets, offset) - 1
+            block = self.read_block(number)
+            block_start = offset - self.block_offsets[number]
+            piece = block[block_start:block_start + end - offset]
+            pieces.append(piece)
+            offset += len(piece)
+
+        return b"".join(pieces)
+
+    def open(self):
+        """ Returns a file-like object reading the uncompressed data, it supports seek. """
+
+        return io.BufferedReader(SeekableReader(self))
+
+    def close(self):
+        """ Releases the mapped file, the container can't be read anymore. """
+
+        self.__cache.clear()
+        self.__data.release()
+
+        if self.__mapped_file is not None:
+            self.__mapped_file.close()
+
+        if self.__file is not None:
+            self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SeekableReader(io.RawIOBase):
+    """ Raw file-like object reading the uncompressed data of a SeekableContainer, see SeekableContainer.open.
+
+    Parameters
+    ----------
+    container : SeekableContainer
+        The container to read.
+    """
+
+    def __init__(self, container):
+        super().__init__()
+        self.container = container
+        self.__position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.__position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.__position + offset
+        elif whence == io.SEEK_END:
+            position = self.container.size + offset
+        else:
+            raise ValueError("Invalid whence {}.".format(whence))
+
+        if position < 0:
+            raise ValueError("Negative seek position {}.".format(position))
+
+        self.__position = position
+        return position
+
+    def readinto(self, buffer):
+        data = self.container.read(self.__position, len(buffer))
+        buffer[:len(data)] = data
+        self.__position += len(data)
+        return len(data)
@@ -0,0 +1,524 @@
+# coding: utf-8
+
+import io
+import struct
+
+from compress.algorithms import ALGORITHMS_BY_ID
+
+MAGIC = b"TORS"
+FORMAT_VERSION = 1
+DEFAULT_BLOCK_SIZE = 1 << 20  # 1 MiB
+
+# Stream header : magic, format version, flags, block size
+HEADER = struct.Struct(">4sBBI")
+
+# Block header : method (algorithm identifier), uncompressed size, payload size
+BLOCK_HEADER = struct.Struct(">BII")
+
+# Method of the blocks stored as is, because the algorithm was not able to make them smaller
+BLOCK_STORED = 0
+
+# The container ends with an index of its blocks
+FLAG_INDEX = 0x01
+
+# Index entry : offset of the block header in the container, uncompressed size
+INDEX_ENTRY = struct.Struct(">QI")
+
+# Index trailer, the very last bytes of the container : offset of the index, number of entries, magic
+INDEX_TRAILER = struct.Struct(">QI4s")
+INDEX_MAGIC = b"TORI"
+
+# First bytes of the archives of compress.archive, which imports a lot more than this module
+ARCHIVE_MAGIC = b"TORA"
+
+
+def starts_with(filename, magic):
+    """ Tells whether the first bytes of a file are magic. """
+
+    with open(filename, "rb") as input_file:
+        return input_file.read(len(magic)) == magic
+
+
+def is_container(filename):
+    """ Tells whether a file is a container created by StreamCompressor, from its first bytes. """
+
+    return starts_with(filename, MAGIC)
+
+
+def is_archive(filename):
+    """ Tells whether a file is an archive created by compress.archive.ArchiveCompressor, from its first bytes. """
+
+    return starts_with(filename, ARCHIVE_MAGIC)
+
+
+def iter_blocks(source, block_size):
+    """ Splits the source into blocks of block_size bytes, only the last one may be smaller.
+
+    Parameters
+    ----------
+    source
+        A bytes-like object, a binary file-like object (anything with a read method, like sys.stdin.buffer) or an
+        iterable of bytes chunks of any size.
+
+    block_size : int
+        Size of the blocks to yield.
+
+    Yields
+    ------
+    bytes
+        The blocks, never empty.
+    """
+
+    if hasattr(source, "read"):
+        while True:
+            block = bytearray()
+
+            # Pipes and sockets may return less than requested, keep reading until the block is full
+            while len(block) < block_size:
+                chunk = source.read(block_size - len(block))
+
+                if not chunk:
+                    break
+
+                block += chunk
+
+            if not block:
+                return
+
+            yield bytes(block)
+
+            if len(block) < block_size:
+                return
+
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+
+        for index in range(0, len(view), block_size):
+            yield bytes(view[index:index + block_size])
+
+    else:
+        buffer = bytearray()
+
+        for chunk in source:
+            buffer += chunk
+
+            while len(buffer) >= block_size:
+                yield bytes(buffer[:block_size])
+                del buffer[:block_size]
+
+        if buffer:
+            yield bytes(buffer)
+
+
+class StreamReader(object):
+    """ Reads exact amounts of bytes from a file-like object, a bytes-like object or an iterable of bytes chunks.
+
+    Parameters
+    ----------
+    source
+        Where to read the bytes from.
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+
+        self.__file = source if hasattr(source, "read") else None
+        self.__chunks = None if self.__file is not None else iter(source)
+        self.__buffer = bytearray()
+
+    def read(self, size):
+        """ Reads size bytes, less bytes are returned only when the end of the source is reached.
+
+        Parameters
+        ----------
+        size : int
+            Number of bytes to read.
+
+        Returns
+        -------
+        bytes
+            The bytes read.
+        """
+
+        while len(self.__buffer) < size:
+            if self.__file is not None:
+                chunk = self.__file.read(size - len(self.__buffer))
+            else:
+                chunk = next(self.__chunks, b"")
+
+            if not chunk:
+                break
+
+            self.__buffer += chunk
+
+        data = bytes(self.__buffer[:size])
+        del self.__buffer[:size]
+        return data
+
+    def read_exactly(self, size):
+        """ Same as read but raises an IOError when the source ends too early. """
+
+        data = self.read(size)
+
+        if len(data) != size:
+            raise IOError("Truncated stream, expected {} bytes but got {}.".format(size, len(data)))
+
+        return data
+
+
+class StreamCompressor(object):
+    """ Compresses a stream block by block, so the memory used only depends on the block size, not on the input size.
+
+    Attributes
+    ----------
+    algorithm : Codec
+        The algorithm used to compress each block.
+
+    block_size : int
+        Size of the uncompressed blocks.
+
+    bytes_in : int
+        Number of bytes read by the last compression.
+
+    bytes_out : int
+        Number of bytes produced by the last compression.
+
+    Notes
+    -----
+    The container starts with a header (magic, format version, flags and block size) followed by the blocks. Each block
+    has its own header made of the method used to compress it, its uncompressed size and its payload size. Blocks are
+    independent from each other, the tree (Huffman) or the integers size (LZW) are stored in every payload. When the
+    algorithm is not able to make a block smaller, the block is stored as is. A block with an uncompressed size of 0
+    marks the end of the stream. It is followed by the index of the blocks (offset of each block header and its
+    uncompressed size) and a trailer giving the offset of the index, so blocks can be located without reading the
+    whole container.
+    """
+
+    def __init__(self, algorithm, block_size=DEFAULT_BLOCK_SIZE, verbose=False):
+
+        if block_size <= 0:
+            raise ValueError("The block size must be positive.")
+
+        self.algorithm = algorithm
+        self.block_size = block_size
+        self.verbose = verbose
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.__index = []
+
+    def compress_block(self, block):
+        """ Compresses a single block, stores it as is when there is no gain.
+
+        Parameters
+        ----------
+        block : bytes
+            The block to compress, can't be empty.
+
+        Returns
+        -------
+        bytes
+            The block header followed by the payload.
+        """
+
+        method, payload = self.algorithm.choose_method(block)
+
+        if self.verbose:
+            print("Block of {} bytes compressed to {} bytes (method {}).".format(len(block), len(payload), method))
+
+        return BLOCK_HEADER.pack(method, len(block), len(payload)) + payload
+
+    def compress_blocks(self, blocks):
+        """ Compresses the blocks one after the other, subclasses may spread the work as long as the order is kept.
+
+        Parameters
+        ----------
+        blocks : iterable
+            The blocks to compress.
+
+        Yields
+        ------
+        bytes
+            The compressed blocks (header and payload), in the same order as the input.
+        """
+
+        for block in blocks:
+            yield self.compress_block(block)
+
+    def start(self):
+        """ Starts a new container, the blocks compressed by compress_block are then given to add_frame.
+
+        Returns
+        -------
+        bytes
+            The container header.
+        """
+
+        self.bytes_in = 0
+        self.bytes_out = HEADER.size
+        self.__index = []
+        return HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_INDEX, self.block_size)
+
+    def add_frame(self, frame):
+        """ Records a compressed block in the index, it must be written right after the previous one.
+
+        Parameters
+        ----------
+        frame : bytes
+            The block header and payload returned by compress_block.
+        """
+
+        size = BLOCK_HEADER.unpack_from(frame)[1]
+        self.__index.append(INDEX_ENTRY.pack(self.bytes_out, size))
+        self.bytes_in += size
+        self.bytes_out += len(frame)
+
+    def finish(self):
+        """ Ends the container.
+
+        Returns
+        -------
+        bytes
+            The end of the stream marker followed by the index.
+        """
+
+        index_offset = self.bytes_out + BLOCK_HEADER.size
+        self.__index.append(INDEX_TRAILER.pack(index_offset, len(self.__index), INDEX_MAGIC))
+        index = b"".join(self.__index)
+        self.bytes_out = index_offset + len(index)
+        self.__index = []
+
+        return BLOCK_HEADER.pack(BLOCK_STORED, 0, 0) + index
+
+    def compress(self, source):
+        """ Compresses the source lazily.
+
+        Parameters
+        ----------
+        source
+            A bytes-like object, a binary file-like object or an iterable of bytes chunks.
+
+        Yields
+        ------
+        bytes
+            Pieces of the container, to be written in order.
+        """
+
+        yield self.start()
+
+        for frame in self.compress_blocks(iter_blocks(source, self.block_size)):
+            self.add_frame(frame)
+            yield frame
+
+        yield self.finish()
+
+    def compress_stream(self, source, output_file):
+        """ Compresses the source into a binary file-like object.
+
+        Parameters
+        ----------
+        source
+            A bytes-like object, a binary file-like object or an iterable of bytes chunks.
+
+        output_file
+            A binary file-like object (anything with a write method, like sys.stdout.buffer).
+
+        Returns
+        -------
+        float
+            The compression rate, it can be negative when the input was not compressible.
+        """
+
+        for piece in self.compress(source):
+            output_file.write(piece)
+
+        if not self.bytes_in:
+            return 0
+
+        return 100 - self.bytes_out * 100 / self.bytes_in
+
+
+class StreamDecompressor(object):
+    """ Decompresses a container created by StreamCompressor block by block.
+
+    Attributes
+    ----------
+    bytes_out : int
+        Number of bytes produced by the last decompression.
+    """
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.bytes_out = 0
+        self.__algorithms = {}
+
+    def __get_algorithm(self, method):
+        try:
+            return self.__algorithms[method]
+        except KeyError:
+            pass
+
+        try:
+            algorithm = ALGORITHMS_BY_ID[method](verbose=self.verbose)
+        except KeyError:
+            raise IOError("Unknown compression method {}.".format(method))
+
+        self.__algorithms[method] = algorithm
+        return algorithm
+
+    def decompress_block(self, method, payload, size):
+        """ Decompresses the payload of a single block.
+
+        Parameters
+        ----------
+        method : int
+            The method found in the block header.
+
+        payload : bytes
+            The payload of the block.
+
+        size : int
+            The uncompressed size found in the block header.
+
+        Returns
+        -------
+        bytes
+            The uncompressed block.
+        """
+
+        if method == BLOCK_STORED:
+            block = payload
+        else:
+            block = self.__get_algorithm(method).decompress_block(payload)
+
+        if len(block) != size:
+            raise IOError("Corrupted block, expected {} bytes but got {}.".format(size, len(block)))
+
+        return block
+
+    @staticmethod
+    def read_header(reader):
+        """ Reads and checks the container header.
+
+        Parameters
+        ----------
+        reader : StreamReader
+            Where to read the header from.
+
+        Returns
+        -------
+        tuple
+            The flags and the block size of the container.
+        """
+
+        return StreamDecompressor.parse_header(reader.read_exactly(HEADER.size))
+
+    @staticmethod
+    def parse_header(header):
+        """ Checks the container header.
+
+        Parameters
+        ----------
+        header : bytes
+            The first HEADER.size bytes of the container.
+
+        Returns
+        -------
+        tuple
+            The flags and the block size of the container.
+        """
+
+        magic, version, flags, block_size = HEADER.unpack(header)
+
+        if magic != MAGIC:
+            raise IOError("This is not a compressed stream.")
+
+        if version != FORMAT_VERSION:
+            raise IOError("Unsupported stream version {}.".format(version))
+
+        return flags, block_size
+
+    def decompress_blocks(self, frames):
+        """ Decompresses the blocks one after the other, subclasses may spread the work as long as the order is kept.
+
+        Parameters
+        ----------
+        frames : iterable
+            Tuples made of the method, the uncompressed size and the payload of each block.
+
+        Yields
+        ------
+        bytes
+            The uncompressed blocks, in the same order as the input.
+        """
+
+        for method, size, payload in frames:
+            yield self.decompress_block(method, payload, size)
+
+    @staticmethod
+    def read_frames(reader):
+        """ Reads the blocks of a container until the end of the stream, the header must have been read already.
+
+        Parameters
+        ----------
+        reader : StreamReader
+            Where to read the blocks from.
+
+        Yields
+        ------
+        tuple
+            The method, the uncompressed size and the payload of each block.
+        """
+
+        while True:
+            method, size, payload_size = BLOCK_HEADER.unpack(reader.read_exactly(BLOCK_HEADER.size))
+
+            if size == 0:
+                return
+
+            yield method, size, reader.read_exactly(payload_size)
+
+    def decompress(self, source):
+        """ Decompresses the source lazily.
+
+        Parameters
+        ----------
+        source
+            A bytes-like object, a binary file-like object or an iterable of bytes chunks.
+
+        Yields
+        ------
+        bytes
+            The uncompressed blocks, in order.
+        """
+
+        reader = StreamReader(source)
+        self.read_header(reader)
+        self.bytes_out = 0
+
+        # The index at the end is not needed when reading the blocks in order
+        for block in self.decompress_blocks(self.read_frames(reader)):
+            self.bytes_out += len(block)
+            yield block
+
+    def decompress_stream(self, source, output_file):
+        """ Decompresses the source into a binary file-like object.
+
+        Parameters
+        ----------
+        source
+            A bytes-like object, a binary file-like object or an iterable of bytes chunks.
+
+        output_file
+            A binary file-like object.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+
+        for block in self.decompress(source):
+            output_file.write(block)
+
+        return self.bytes_out
@@ -0,0 +1,160 @@
+# coding: utf-8
+
+from collections import Counter
+from importlib.util import find_spec
+
+# NumPy is optional, the pure Python backend is used without it. Importing it takes longer than compressing a small
+# file, so it is only imported once there is enough data to process (see NumpyBackend.MIN_SIZE).
+NUMPY_AVAILABLE = find_spec("numpy") is not None
+np = None
+
+
+def import_numpy():
+    """ Imports NumPy the first time it is needed and returns the module. """
+
+    global np
+
+    if np is None:
+        import numpy
+        np = numpy
+
+    return np
+
+
+class PythonBackend(object):
+    """ Counts and encodes bytes with the standard library only. """
+
+    name = "python"
+
+    @staticmethod
+    def byte_histogram(data):
+        """ Counts the occurrences of each byte.
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes to count.
+
+        Returns
+        -------
+        list
+            The number of occurrences of each of the 256 bytes.
+        """
+
+        histogram = [0] * 256
+
+        for byte, count in Counter(data).items():
+            histogram[byte] = count
+
+        return histogram
+
+    @staticmethod
+    def encode(data, codes, lengths, writer):
+        """ Writes the code of each byte.
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes to encode.
+
+        codes : list
+            The code of each of the 256 bytes, there may be more codes for symbols which aren't bytes.
+
+        lengths : list
+            The bit length of each code.
+
+        writer : BitWriter
+            Where the codes are written.
+        """
+
+        writer.write_symbols(data, codes, lengths)
+
+
+class NumpyBackend(PythonBackend):
+    """ Counts and encodes bytes with NumPy, so the work is done by vectorized operations instead of the interpreter.
+
+    Notes
+    -----
+    Encoding expands the codes to one byte per bit (by indexing a table holding the bits of each code) before packing
+    them with np.packbits, so the input is processed in chunks to keep the memory used bounded.
+    """
+
+    name = "numpy"
+
+    # Number of bits expanded at once when encoding, each one uses a byte of memory
+    CHUNK_BITS = 1 << 22
+
+    # Below this number of bytes, setting NumPy up costs more than it saves and the pure Python code is used
+    MIN_SIZE = 1 << 12
+
+    @classmethod
+    def byte_histogram(cls, data):
+
+        if len(data) < cls.MIN_SIZE:
+            return PythonBackend.byte_histogram(data)
+
+        np = import_numpy()
+        return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256).tolist()
+
+    @classmethod
+    def encode(cls, data, codes, lengths, writer):
+
+        if len(data) < cls.MIN_SIZE:
+            PythonBackend.encode(data, codes, lengths, writer)
+            return
+
+        np = import_numpy()
+        max_length = max(lengths)
+
+        # Row i holds the bits of the code of byte i followed by zeros, and the mask tells which ones belong to the code
+        code_bits = np.zeros((len(codes), max_length), np.uint8)
+        code_mask = np.zeros((len(codes), max_length), np.bool_)
+
+        for byte, (code, length) in enumerate(zip(codes, lengths)):
+            code_bits[byte, :length] = [(code >> shift) & 1 for shift in range(length - 1, -1, -1)]
+            code_mask[byte, :length] = True
+
+        symbols = np.frombuffer(data, dtype=np.uint8)
+        chunk_size = max(1, cls.CHUNK_BITS // max_length)
+        carried_bits = np.zeros(0, np.uint8)  # Bits which didn't fill a whole byte at the end of the previous chunk
+
+        for start in range(0, len(symbols), chunk_size):
+            chunk = symbols[start:start + chunk_size]
+            bits = code_bits.take(chunk, axis=0)[code_mask.take(chunk, axis=0)]
+            bits = np.concatenate((carried_bits, bits))
+
+            whole_bits = len(bits) & ~7
+            writer.write_bytes(np.packbits(bits[:whole_bits]).tobytes())
+            carried_bits = bits[whole_bits:]
+
+        for bit in carried_bits.tolist():
+            writer.write(bit, 1)
+
+
+def get_backend(name=None):
+    """ Returns a backend.
+
+    Parameters
+    ----------
+    name : str
+        Name of the backend, "python" or "numpy". By default NumPy is used when it is installed.
+
+    Returns
+    -------
+    PythonBackend
+        The backend.
+    """
+
+    if name is None:
+        name = "numpy" if NUMPY_AVAILABLE else "python"
+
+    if name == "numpy":
+        if not NUMPY_AVAILABLE:
+            raise ImportError("The numpy backend requires NumPy to be installed.")
+
+        return NumpyBackend
+
+    if name == "python":
+        return PythonBackend
+
+    raise ValueError("Unknown backend {}.".format(name))
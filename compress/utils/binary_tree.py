@@ -1,6 +1,6 @@
 # coding: utf-8
 
-from heapq import *
+from heapq import heappop, heappush
 
 
 class Node(object):
@@ -16,6 +16,8 @@ class Node(object):
         The right child node.
     """
 
+    __slots__ = ("value", "left", "right")
+
     def __init__(self, value=None):
         self.value = value
         self.left = None
@@ -45,6 +47,7 @@ class BinaryTree(object):
         Root node of the tree.
     """
     def __init__(self):
+        super().__init__()
         self.root_node = None
 
     def build_tree(self, values):
@@ -68,35 +71,88 @@ class BinaryTree(object):
     def traversal_action(self, node):
         print(node.value)
 
-    def inorder_traversal(self):
+    def preorder(self):
+        """ Visits the nodes in preorder : each node, then its left subtree, then its right subtree.
 
-        heap = []
-        current_node = self.root_node
+        Yields
+        ------
+        Node
+            The nodes, one at a time, so the tree can be modified between them or the walk stopped early.
+
+        Notes
+        -----
+        A list is used as a stack, so each node is pushed and popped once and the order only depends on the structure
+        of the tree. There is no recursion limit on the depth of the tree.
+        """
+
+        stack = [] if self.root_node is None else [self.root_node]
 
-        while heap or current_node is not None:
-            if current_node is not None:
-                heappush(heap, current_node)
-                current_node = current_node.left
+        while stack:
+            node = stack.pop()
+            yield node
+
+            # The right child is pushed first so the left one is popped first
+            if node.right is not None:
+                stack.append(node.right)
+
+            if node.left is not None:
+                stack.append(node.left)
+
+    def inorder(self):
+        """ Visits the nodes in inorder : the left subtree of each node, the node, then its right subtree.
+
+        Yields
+        ------
+        Node
+            The nodes, one at a time.
+        """
+
+        stack = []
+        node = self.root_node
+
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
             else:
-                current_node = heappop(heap)
-                self.traversal_action(current_node)
-                current_node = current_node.right
+                node = stack.pop()
+                yield node
+                node = node.right
 
-    def preorder_traversal(self):
+    def postorder(self):
+        """ Visits the nodes in postorder : the left subtree of each node, its right subtree, then the node.
 
-        heap = []
-        heappush(heap, self.root_node)
+        Yields
+        ------
+        Node
+            The nodes, one at a time, children always come before their parent.
+        """
 
-        while heap:  # While there are items to pop
-            current_node = heappop(heap)
+        stack = []
+        node = self.root_node
+        previous_node = None  # Last node yielded, it tells whether the right subtree of the top node has been visited
+
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            elif stack[-1].right is not None and stack[-1].right is not previous_node:
+                node = stack[-1].right
+            else:
+                previous_node = stack.pop()
+                yield previous_node
 
-            self.traversal_action(current_node)
+    def inorder_traversal(self):
+        """ Calls traversal_action on each node in inorder. """
+
+        for node in self.inorder():
+            self.traversal_action(node)
 
-            if current_node.left is not None:
-                heappush(heap, current_node.left)
+    def preorder_traversal(self):
+        """ Calls traversal_action on each node in preorder. """
 
-            if current_node.right is not None:
-                heappush(heap, current_node.right)
+        for node in self.preorder():
+            self.traversal_action(node)
 
     def create_node(self, left=None, right=None):
         """ The value of the node depends on the algorithm, that's why this method must be overwritten.
@@ -0,0 +1,317 @@
+# coding: utf-8
+
+from contextlib import contextmanager
+import mmap
+import os
+
+
+class BitWriter(object):
+    """ Packs integers of any bit length into bytes, most significant bit first.
+
+    Attributes
+    ----------
+    bits_written : int
+        Number of bits written so far.
+
+    Notes
+    -----
+    Bits are accumulated in an integer and moved to a bytearray as soon as there are enough of them, so the memory used
+    is the size of the output and the time spent is linear, unlike concatenating "0" and "1" strings and converting the
+    result to a big integer.
+    """
+
+    # Number of pending bits above which whole bytes are moved to the buffer. Shifting a big accumulator is slow and
+    # converting a tiny one is slow as well, this is a trade-off between the two.
+    FLUSH_BITS = 256
+
+    def __init__(self):
+        self.bits_written = 0
+        self.__buffer = bytearray()
+        self.__accumulator = 0
+        self.__pending_bits = 0
+
+    def __flush(self):
+        remaining_bits = self.__pending_bits & 7
+        self.__buffer += (self.__accumulator >> remaining_bits).to_bytes(self.__pending_bits >> 3, 'big')
+        self.__accumulator &= (1 << remaining_bits) - 1
+        self.__pending_bits = remaining_bits
+
+    def write(self, value, length):
+        """ Writes the length least significant bits of value.
+
+        Parameters
+        ----------
+        value : int
+            The integer to write, it must fit in length bits.
+
+        length : int
+            The number of bits to write.
+        """
+
+        self.__accumulator = (self.__accumulator << length) | value
+        self.__pending_bits += length
+        self.bits_written += length
+
+        if self.__pending_bits >= self.FLUSH_BITS:
+            self.__flush()
+
+    def write_symbols(self, symbols, codes, lengths):
+        """ Writes the code of each symbol, it is equivalent to calling write for each symbol but way faster.
+
+        Parameters
+        ----------
+        symbols : iterable
+            The symbols to write, usually a bytes-like object.
+
+        codes : list
+            The code of each symbol.
+
+        lengths : list
+            The bit length of the code of each symbol.
+        """
+
+        accumulator = self.__accumulator
+        pending_bits = self.__pending_bits
+        written_bits = 0
+        flush_bits = self.FLUSH_BITS
+        buffer = self.__buffer
+
+        for symbol in symbols:
+            length = lengths[symbol]
+            accumulator = (accumulator << length) | codes[symbol]
+            pending_bits += length
+
+            if pending_bits >= flush_bits:
+                remaining_bits = pending_bits & 7
+                buffer += (accumulator >> remaining_bits).to_bytes(pending_bits >> 3, 'big')
+                accumulator &= (1 << remaining_bits) - 1
+                written_bits += pending_bits - remaining_bits
+                pending_bits = remaining_bits
+
+        self.bits_written += written_bits + pending_bits - self.__pending_bits
+        self.__accumulator = accumulator
+        self.__pending_bits = pending_bits
+
+    def write_integers(self, integers, width):
+        """ Writes integers of width bits, it is equivalent to calling write for each integer but faster.
+
+        Parameters
+        ----------
+        integers : iterable
+            The integers to write, they must fit in width bits.
+
+        width : int
+            The number of bits of each integer.
+        """
+
+        accumulator = self.__accumulator
+        pending_bits = self.__pending_bits
+        written_bits = 0
+        flush_bits = self.FLUSH_BITS
+        buffer = self.__buffer
+
+        for integer in integers:
+            accumulator = (accumulator << width) | integer
+            pending_bits += width
+
+            if pending_bits >= flush_bits:
+                remaining_bits = pending_bits & 7
+                buffer += (accumulator >> remaining_bits).to_bytes(pending_bits >> 3, 'big')
+                accumulator &= (1 << remaining_bits) - 1
+                written_bits += pending_bits - remaining_bits
+                pending_bits = remaining_bits
+
+        self.bits_written += written_bits + pending_bits - self.__pending_bits
+        self.__accumulator = accumulator
+        self.__pending_bits = pending_bits
+
+    def write_bytes(self, data):
+        """ Writes whole bytes, they are copied as is when the writer is on a byte boundary.
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes to write.
+        """
+
+        self.__flush()
+        self.bits_written += len(data) * 8
+
+        if not self.__pending_bits:
+            self.__buffer += data
+            return
+
+        # The pending bits go first, and the same number of bits at the end of data become the pending ones
+        accumulator = (self.__accumulator << (len(data) * 8)) | int.from_bytes(data, 'big')
+        self.__buffer += (accumulator >> self.__pending_bits).to_bytes(len(data), 'big')
+        self.__accumulator = accumulator & ((1 << self.__pending_bits) - 1)
+
+    def take_bytes(self):
+        """ Returns the whole bytes written since the previous call and forgets them, the bits which don't fill a byte
+        yet are kept. It lets the output be sent as it is produced.
+
+        Returns
+        -------
+        bytes
+            The packed bits.
+        """
+
+        self.__flush()
+        data = bytes(self.__buffer)
+        self.__buffer.clear()
+        return data
+
+    def getvalue(self):
+        """ Returns the bytes written so far (since the last take_bytes), the last byte is padded with zeros on the
+        right.
+
+        Returns
+        -------
+        bytes
+            The packed bits.
+        """
+
+        self.__flush()
+
+        if not self.__pending_bits:
+            return bytes(self.__buffer)
+
+        return bytes(self.__buffer) + bytes([self.__accumulator << (8 - self.__pending_bits)])
+
+
+class BitReader(object):
+    """ Reads integers of any bit length from bytes, most significant bit first.
+
+    Parameters
+    ----------
+    data
+        Any object supporting slicing and the buffer protocol : bytes, bytearray, memoryview or mmap. It is never copied,
+        so a memory-mapped file can be read without loading it.
+
+    position : int
+        Index of the first bit to read.
+
+    Notes
+    -----
+    Like BitWriter, bits are kept in an integer accumulator which is refilled 8 bytes at a time.
+    """
+
+    # Minimum number of bytes added to the accumulator at once
+    REFILL_BYTES = 8
+
+    def __init__(self, data, position=0):
+        self.data = data
+        self.__next_byte = position >> 3
+        self.__accumulator = 0
+        self.__available_bits = 0
+
+        if position & 7:
+            self.__refill(1)
+            self.__available_bits -= position & 7
+
+    @property
+    def position(self):
+        """ Index of the next bit to read. """
+
+        return (self.__next_byte << 3) - self.__available_bits
+
+    def __refill(self, length):
+        while self.__available_bits < length:
+            chunk_size = max(self.REFILL_BYTES, (length - self.__available_bits + 7) >> 3)
+            chunk = self.data[self.__next_byte:self.__next_byte + chunk_size]
+
+            if not len(chunk):
+                raise IOError("Truncated data, can't read {} more bits.".format(length - self.__available_bits))
+
+            # Only the available bits of the accumulator are kept, so it doesn't grow
+            self.__accumulator = ((self.__accumulator & ((1 << self.__available_bits) - 1)) << (len(chunk) << 3)) | \
+                int.from_bytes(chunk, 'big')
+            self.__available_bits += len(chunk) << 3
+            self.__next_byte += len(chunk)
+
+    def read(self, length):
+        """ Reads the next length bits.
+
+        Parameters
+        ----------
+        length : int
+            The number of bits to read.
+
+        Returns
+        -------
+        int
+            The bits as an integer.
+        """
+
+        if self.__available_bits < length:
+            self.__refill(length)
+
+        self.__available_bits -= length
+        return (self.__accumulator >> self.__available_bits) & ((1 << length) - 1)
+
+    def read_integers(self, count, width):
+        """ Reads count integers of width bits, it is equivalent to calling read count times but faster.
+
+        Parameters
+        ----------
+        count : int
+            Number of integers to read.
+
+        width : int
+            Bit length of each integer.
+
+        Returns
+        -------
+        list
+            The integers.
+        """
+
+        if not count:
+            return []
+
+        # Read several integers at once, they are then taken from the resulting integer
+        chunk_size = max(1, 1024 // width)  # Integers per chunk, shifting a big integer costs its size
+        mask = (1 << width) - 1
+        integers = []
+
+        for chunk_start in range(0, count, chunk_size):
+            chunk_count = min(chunk_size, count - chunk_start)
+            chunk = self.read(chunk_count * width)
+            integers += [(chunk >> shift) & mask for shift in range((chunk_count - 1) * width, -1, -width)]
+
+        return integers
+
+    def skip_padding(self):
+        """ Skips the zeros preceding the next 1 and the 1 itself. This is how the encoders mark where content starts.
+        """
+
+        while not self.read(1):
+            pass
+
+
+@contextmanager
+def map_file(input_file):
+    """ Maps a file in memory instead of reading it, so it isn't copied and the system loads it as it is used.
+
+    Parameters
+    ----------
+    input_file
+        A file opened in binary mode.
+
+    Yields
+    ------
+    memoryview
+        The content of the file, it must not be used after the context exits.
+    """
+
+    if not os.fstat(input_file.fileno()).st_size:  # Empty files can't be mapped
+        yield memoryview(b"")
+        return
+
+    with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        view = memoryview(mapped_file)
+
+        try:
+            yield view
+        finally:
+            view.release()
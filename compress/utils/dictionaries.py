@@ -0,0 +1,188 @@
+# coding: utf-8
+
+from hashlib import blake2b
+import os
+import struct
+import threading
+
+MAGIC = b"TORD"
+FORMAT_VERSION = 1
+
+# Dictionary file header : magic, format version, identifier, size of the content
+HEADER = struct.Struct(">4sBII")
+
+
+class Dictionary(object):
+    """ What the algorithms learnt from sample data, so small payloads don't have to carry it.
+
+    Parameters
+    ----------
+    code_lengths : list
+        Length of the Huffman code of each of the 256 bytes, they all have a code.
+
+    content : bytes
+        Sample bytes the LZW dictionary is primed with : the compressor and the decompressor both start as if they had
+        just processed them.
+
+    Attributes
+    ----------
+    dictionary_id : int
+        32 bits identifier, derived from the code lengths and the content, stored in the compressed payloads.
+
+    cache : dict
+        State the algorithms derive from the dictionary, computed once per process (see Huffman and LZW).
+
+    Notes
+    -----
+    A dictionary file starts with the magic "TORD", the format version, the identifier and the size of the content.
+    It is followed by the 256 code lengths (one byte each) and by the content.
+    """
+
+    def __init__(self, code_lengths, content):
+
+        if len(code_lengths) != 256 or not all(0 < length < 64 for length in code_lengths):
+            raise ValueError("A dictionary needs a code length between 1 and 63 for each byte.")
+
+        self.code_lengths = tuple(code_lengths)
+        self.content = bytes(content)
+        self.dictionary_id = int.from_bytes(blake2b(self.__body(), digest_size=4).digest(), 'big')
+        self.cache = {}
+
+    def __getstate__(self):
+        # The cache is rebuilt by each process rather than sent along
+        state = self.__dict__.copy()
+        state["cache"] = {}
+        return state
+
+    def __body(self):
+        return bytes(self.code_lengths) + self.content
+
+    def to_bytes(self):
+        """ Returns the dictionary serialized, as stored in files. """
+
+        return HEADER.pack(MAGIC, FORMAT_VERSION, self.dictionary_id, len(self.content)) + self.__body()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """ Reads a dictionary serialized by to_bytes.
+
+        Parameters
+        ----------
+        data : bytes
+            The serialized dictionary.
+
+        Returns
+        -------
+        Dictionary
+            The dictionary.
+        """
+
+        if len(data) < HEADER.size + 256:
+            raise IOError("Truncated dictionary.")
+
+        magic, version, dictionary_id, content_size = HEADER.unpack_from(data)
+
+        if magic != MAGIC:
+            raise IOError("This is not a dictionary.")
+
+        if version != FORMAT_VERSION:
+            raise IOError("Unsupported dictionary version {}.".format(version))
+
+        content = data[HEADER.size + 256:]
+
+        if len(content) != content_size:
+            raise IOError("Truncated dictionary, expected {} bytes of content but got {}.".format(content_size,
+                                                                                                len(content)))
+
+        dictionary = cls(data[HEADER.size:HEADER.size + 256], content)
+
+        if dictionary.dictionary_id != dictionary_id:
+            raise IOError("Corrupted dictionary, its identifier doesn't match its content.")
+
+        return dictionary
+
+    def save(self, filename):
+        """ Writes the dictionary to a file. """
+
+        with open(filename, "wb") as output_file:
+            output_file.write(self.to_bytes())
+
+
+# Dictionaries known by the process, by identifier, so payloads referencing them can be decompressed
+_registry = {}
+
+# Dictionaries loaded from files, by path, along with the modification time of the file when it was loaded
+_loaded_files = {}
+_lock = threading.Lock()
+
+
+def register_dictionary(dictionary):
+    """ Makes a dictionary available to decompress the payloads referencing it.
+
+    Parameters
+    ----------
+    dictionary : Dictionary
+        The dictionary. If one with the same identifier is already registered, it is kept, so its cache is reused.
+
+    Returns
+    -------
+    Dictionary
+        The registered dictionary.
+    """
+
+    with _lock:
+        return _registry.setdefault(dictionary.dictionary_id, dictionary)
+
+
+def get_dictionary(dictionary_id):
+    """ Returns a registered dictionary.
+
+    Parameters
+    ----------
+    dictionary_id : int
+        Identifier of the dictionary.
+
+    Returns
+    -------
+    Dictionary
+        The dictionary, an IOError is raised if it is unknown.
+    """
+
+    try:
+        return _registry[dictionary_id]
+    except KeyError:
+        raise IOError("Unknown dictionary {:08x}, it must be loaded before decompressing.".format(dictionary_id))
+
+
+def registered_dictionaries():
+    """ Returns the registered dictionaries, to register them in another process for instance. """
+
+    return list(_registry.values())
+
+
+def load_dictionary(filename):
+    """ Loads and registers a dictionary file. Files are only read again when they are modified.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the file.
+
+    Returns
+    -------
+    Dictionary
+        The dictionary.
+    """
+
+    path = os.path.abspath(filename)
+    modification_time = os.stat(path).st_mtime_ns
+    loaded = _loaded_files.get(path)
+
+    if loaded is not None and loaded[0] == modification_time:
+        return loaded[1]
+
+    with open(path, "rb") as input_file:
+        dictionary = register_dictionary(Dictionary.from_bytes(input_file.read()))
+
+    _loaded_files[path] = (modification_time, dictionary)
+    return dictionary
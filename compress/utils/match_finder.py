@@ -0,0 +1,265 @@
+# coding: utf-8
+
+# Shortest and longest repetition a match can describe, and the size of the window matches are searched in
+MIN_MATCH = 3
+MAX_MATCH = 258
+WINDOW_SIZE = 1 << 16
+
+# A match of MIN_MATCH bytes further than this barely saves anything, literals are cheaper to decode
+TOO_FAR = 4096
+
+# Settings of each level, like zlib : matches at least good_length long shorten the search for a better match,
+# max_lazy is the length above which no better match is looked for at the next byte (for levels 1 to 3 which don't
+# look ahead, the length above which the positions inside a match are not inserted in the hash chains), a match of
+# nice_length stops the search and max_chain is the maximum number of positions tried for each byte. The chains are
+# walked in Python so they are much shorter than zlib's, longer chains barely find better matches.
+# Levels 4 to 9 insert every position, so the nearest candidates come first : with a short nice_length, a match
+# which ends on a changed byte stops the search before a longer one further back is found.
+LEVELS = {
+    # level: (good_length, max_lazy, nice_length, max_chain, lazy)
+    1: (4, 4, 8, 4, False),
+    2: (4, 5, 16, 8, False),
+    3: (4, 6, 32, 16, False),
+    4: (4, 8, 64, 16, True),
+    5: (8, 16, 64, 24, True),
+    6: (8, 16, 64, 32, True),
+    7: (8, 32, 128, 64, True),
+    8: (32, 128, 258, 128, True),
+    9: (32, 128, 258, 256, True),
+}
+
+DEFAULT_LEVEL = 6
+
+
+def copy_match(decompressed, length, distance):
+    """ Appends a match to the bytes decoded so far.
+
+    Parameters
+    ----------
+    decompressed : bytearray
+        The bytes decoded so far, the match is appended to it.
+
+    length : int
+        Number of bytes to copy.
+
+    distance : int
+        How far before the end of decompressed the copy starts.
+    """
+
+    start = len(decompressed) - distance
+
+    if start < 0 or distance <= 0:
+        raise IOError("Invalid match distance {} in the compressed data.".format(distance))
+
+    if distance >= length:
+        decompressed += decompressed[start:start + length]
+    else:
+        # The match overlaps the bytes it produces, the last distance bytes are repeated
+        decompressed += (decompressed[start:] * (length // distance + 1))[:length]
+
+
+class MatchFinder(object):
+    """ Finds the repetitions of an LZ77 parse with hash chains.
+
+    Attributes
+    ----------
+    level : int
+        From 1 (fastest) to 9 (smallest output), see LEVELS.
+
+    Notes
+    -----
+    Each position is inserted in a chain of the previous positions starting with the same MIN_MATCH bytes : the head
+    of each chain is in a dict indexed by the 3 bytes packed in an integer (so there are no collisions to check), and
+    prev gives the previous position of the chain, for the last WINDOW_SIZE positions only. Finding a match means
+    walking the chain until a position is too far or max_chain positions have been tried.
+
+    Levels 1 to 3 take the first good enough match (greedy parsing) and don't insert the positions inside long matches,
+    which is fast. Levels 4 to 9 use lazy matching : before keeping a match, the next position is searched too and the
+    match is replaced by a literal when the next one is longer.
+    """
+
+    def __init__(self, level=DEFAULT_LEVEL):
+
+        if level not in LEVELS:
+            raise ValueError("The level must be between {} and {}.".format(min(LEVELS), max(LEVELS)))
+
+        self.level = level
+
+    def parse(self, data):
+        """ Splits bytes into literals and matches.
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes to parse.
+
+        Returns
+        -------
+        list
+            Literals as integers and matches as (length, distance) tuples, copying length bytes starting distance bytes
+            before the current position.
+        """
+
+        data = bytes(data)
+        good_length, max_lazy, nice_length, max_chain, lazy = LEVELS[self.level]
+
+        if len(data) < MIN_MATCH:
+            return list(data)
+
+        # The 3 bytes starting at each position, the last two positions have none
+        keys = [a << 16 | b << 8 | c for a, b, c in zip(data, data[1:], data[2:])]
+
+        if lazy:
+            return self.__parse_lazy(data, keys, good_length, max_lazy, nice_length, max_chain)
+
+        return self.__parse_greedy(data, keys, nice_length, max_lazy, max_chain)
+
+    @staticmethod
+    def __longest_match(data, position, candidate, previous_length, nice_length, max_chain, prev):
+        """ Walks the chain starting at candidate, returns the longest match better than previous_length. """
+
+        size = len(data)
+        max_length = min(MAX_MATCH, size - position)
+        nice_length = min(nice_length, max_length)
+        limit = max(position - WINDOW_SIZE, -1)  # Chains end with -1
+        mask = WINDOW_SIZE - 1
+        best_length = previous_length
+        best_distance = 0
+
+        while candidate > limit and max_chain:
+            max_chain -= 1
+
+            # The byte which would make the match longer than the best one is checked first, most candidates stop here
+            if best_length < max_length and data[candidate + best_length] == data[position + best_length]:
+                length = MIN_MATCH
+
+                # 16 bytes at a time first, comparing slices is much faster than comparing bytes one by one
+                while length + 16 <= max_length and \
+                        data[candidate + length:candidate + length + 16] == \
+                        data[position + length:position + length + 16]:
+                    length += 16
+
+                while length < max_length and data[candidate + length] == data[position + length]:
+                    length += 1
+
+                if length > best_length:
+                    best_length = length
+                    best_distance = position - candidate
+
+                    if length >= nice_length:
+                        break
+
+            next_candidate = prev[candidate & mask]
+
+            if next_candidate >= candidate:  # The slot was reused by a position of the window
+                break
+
+            candidate = next_candidate
+
+        return best_length, best_distance
+
+    def __parse_greedy(self, data, keys, nice_length, max_insert, max_chain):
+
+        head = {}
+        prev = [-1] * WINDOW_SIZE
+        mask = WINDOW_SIZE - 1
+        longest_match = self.__longest_match
+        tokens = []
+        append = tokens.append
+        size = len(data)
+        last_key = len(keys)
+        position = 0
+
+        while position < size:
+            if position >= last_key:
+                append(data[position])
+                position += 1
+                continue
+
+            key = keys[position]
+            candidate = head.get(key, -1)
+            prev[position & mask] = candidate
+            head[key] = position
+            length = 0
+
+            if candidate >= 0 and position - candidate <= WINDOW_SIZE:
+                length, distance = longest_match(data, position, candidate, MIN_MATCH - 1, nice_length, max_chain,
+                                                 prev)
+
+                if length == MIN_MATCH and distance > TOO_FAR:
+                    length = 0
+
+            if length < MIN_MATCH:
+                append(data[position])
+                position += 1
+                continue
+
+            append((length, distance))
+
+            if length <= max_insert:
+                for inserted in range(position + 1, min(position + length, last_key)):
+                    key = keys[inserted]
+                    prev[inserted & mask] = head.get(key, -1)
+                    head[key] = inserted
+
+            position += length
+
+        return tokens
+
+    def __parse_lazy(self, data, keys, good_length, max_lazy, nice_length, max_chain):
+
+        head = {}
+        prev = [-1] * WINDOW_SIZE
+        mask = WINDOW_SIZE - 1
+        longest_match = self.__longest_match
+        tokens = []
+        append = tokens.append
+        size = len(data)
+        last_key = len(keys)
+        position = 0
+        length = distance = 0
+        pending_literal = False  # Whether the byte before position is neither emitted nor part of a match
+
+        while position < size:
+            previous_length, previous_distance = length, distance
+            length = 0
+
+            if position < last_key:
+                key = keys[position]
+                candidate = head.get(key, -1)
+                prev[position & mask] = candidate
+                head[key] = position
+
+                if candidate >= 0 and previous_length < max_lazy and position - candidate <= WINDOW_SIZE:
+                    # When the match found at the previous byte is good already, only a quick look is taken at this one
+                    chain = max_chain >> 2 if previous_length >= good_length else max_chain
+                    length, distance = longest_match(data, position, candidate, max(previous_length, MIN_MATCH - 1),
+                                                     nice_length, chain, prev)
+
+                    if length == MIN_MATCH and distance > TOO_FAR:
+                        length = 0
+
+            if previous_length >= MIN_MATCH and length <= previous_length:
+                # The match found at the previous byte is kept, the positions it covers are inserted in the chains
+                append((previous_length, previous_distance))
+
+                for inserted in range(position + 1, min(position - 1 + previous_length, last_key)):
+                    key = keys[inserted]
+                    prev[inserted & mask] = head.get(key, -1)
+                    head[key] = inserted
+
+                position += previous_length - 1
+                pending_literal = False
+                length = 0
+                continue
+
+            if pending_literal:
+                append(data[position - 1])
+
+            pending_literal = True
+            position += 1
+
+        if pending_literal:
+            append(data[position - 1])
+
+        return tokens
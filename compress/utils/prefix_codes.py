@@ -0,0 +1,561 @@
+# coding: utf-8
+
+from functools import lru_cache
+import heapq
+
+
+class DecodingTable(object):
+    """ Decodes prefix codes (like Huffman's) by looking up several bits at once instead of walking a tree bit by bit.
+
+    Attributes
+    ----------
+    table_bits : int
+        Number of bits looked up at each step.
+
+    entries : list
+        For each possible table_bits bits value, the symbol whose code is a prefix of it and the length of the code,
+        packed as symbol << 5 | length. A length of 0 means the code is longer than table_bits.
+
+    multi_symbols : list
+        For each possible table_bits bits value, all the symbols whose codes fit in it, one after the other. They are
+        stored as bytes when all the symbols are bytes.
+
+    multi_bits : list
+        For each possible table_bits bits value, the number of bits used by the codes of multi_symbols.
+
+    long_codes : dict
+        Association between (length, code) tuples and symbols, for codes longer than table_bits.
+
+    max_length : int
+        Length of the longest code.
+
+    Notes
+    -----
+    The tables have 2 ** table_bits entries, so table_bits is the trade-off between the time spent building the tables
+    and the time spent decoding. Frequent symbols have short codes, so a single lookup usually decodes 2 or 3 of them.
+    Codes longer than table_bits are rare since they belong to the least frequent symbols, they are decoded with the
+    slower long_codes dictionary.
+    """
+
+    DEFAULT_TABLE_BITS = 12
+
+    def __init__(self, codes, table_bits=DEFAULT_TABLE_BITS):
+        """
+        Parameters
+        ----------
+        codes : dict
+            Association between symbols and their code, as a tuple made of the code and its bit length.
+
+        table_bits : int
+            Maximum number of bits looked up at each step.
+        """
+
+        self.max_length = max(length for code, length in codes.values())
+        self.table_bits = table_bits
+        self.entries = [0] * (1 << self.table_bits)
+        self.long_codes = {}
+
+        for symbol, (code, length) in codes.items():
+            if length > self.table_bits:
+                self.long_codes[(length, code)] = symbol
+                continue
+
+            # Every value starting with the code decodes to the symbol
+            free_bits = self.table_bits - length
+            first = code << free_bits
+            self.entries[first:first + (1 << free_bits)] = [symbol << 5 | length] * (1 << free_bits)
+
+        self.byte_symbols = max(codes) < 256
+        self.multi_symbols = []
+        self.multi_bits = []
+        mask = (1 << self.table_bits) - 1
+
+        for value in range(1 << self.table_bits):
+            symbols = []
+            used_bits = 0
+
+            while used_bits < self.table_bits:
+                # The bits after the value are unknown, they are seen as zeros so the code must not go past the value
+                entry = self.entries[(value << used_bits) & mask]
+                length = entry & 31
+
+                if not length or used_bits + length > self.table_bits:
+                    break
+
+                symbols.append(entry >> 5)
+                used_bits += length
+
+            self.multi_symbols.append(bytes(symbols) if self.byte_symbols else tuple(symbols))
+            self.multi_bits.append(used_bits)
+
+    def __decode_long_code(self, accumulator, available_bits):
+        for length in range(self.table_bits + 1, self.max_length + 1):
+            code = (accumulator >> (available_bits - length)) & ((1 << length) - 1)
+
+            if (length, code) in self.long_codes:
+                return self.long_codes[(length, code)], length
+
+        raise IOError("Invalid code in the compressed data.")
+
+    def decode(self, data, start, end):
+        """ Decodes the symbols found between two bit positions.
+
+        Parameters
+        ----------
+        data
+            The encoded symbols, any object supporting slicing and the buffer protocol (bytes, memoryview, mmap).
+
+        start : int
+            Position of the first bit to decode.
+
+        end : int
+            Position of the bit following the last code.
+
+        Returns
+        -------
+        bytearray
+            The decoded symbols, it is a list instead when some symbols are not bytes.
+        """
+
+        entries = self.entries
+        multi_symbols = self.multi_symbols
+        multi_bits = self.multi_bits
+        table_bits = self.table_bits
+        table_mask = (1 << table_bits) - 1
+        needed_bits = max(self.max_length, table_bits)
+
+        decoded = bytearray() if self.byte_symbols else []
+
+        # Bits are read from the accumulator, which is refilled 64 bits at a time. The data is never copied, reading
+        # past its end gives zeros, which are never decoded since the number of remaining bits is known.
+        accumulator = data[start >> 3] & (0xff >> (start & 7))
+        available_bits = 8 - (start & 7)
+        position = (start >> 3) + 1
+        remaining_bits = end - start
+
+        # As long as there are table_bits bits left, all the symbols found in them can be decoded at once
+        while remaining_bits >= table_bits:
+
+            while available_bits < needed_bits:
+                chunk = data[position:position + 8]
+                accumulator = ((accumulator & ((1 << available_bits) - 1)) << 64) | \
+                    (int.from_bytes(chunk, 'big') << ((8 - len(chunk)) << 3))
+                available_bits += 64
+                position += 8
+
+            index = (accumulator >> (available_bits - table_bits)) & table_mask
+            length = multi_bits[index]
+
+            if length:
+                decoded += multi_symbols[index]
+            else:
+                symbol, length = self.__decode_long_code(accumulator, available_bits)
+                decoded.append(symbol)
+
+            available_bits -= length
+            remaining_bits -= length
+
+        # The last bits are decoded one symbol at a time, the padding after them must not be decoded
+        while remaining_bits > 0:
+
+            while available_bits < needed_bits:
+                chunk = data[position:position + 8]
+                accumulator = ((accumulator & ((1 << available_bits) - 1)) << 64) | \
+                    (int.from_bytes(chunk, 'big') << ((8 - len(chunk)) << 3))
+                available_bits += 64
+                position += 8
+
+            entry = entries[(accumulator >> (available_bits - table_bits)) & table_mask]
+            length = entry & 31
+
+            if length:
+                decoded.append(entry >> 5)
+            else:
+                symbol, length = self.__decode_long_code(accumulator, available_bits)
+                decoded.append(symbol)
+
+            available_bits -= length
+            remaining_bits -= length
+
+        if remaining_bits < 0:
+            raise IOError("The last code goes past the end of the compressed data.")
+
+        return decoded
+
+    def decode_symbols(self, data, start, end, count):
+        """ Decodes at most count symbols, stopping before a code which isn't entirely before end. Unlike decode, the
+        data may end in the middle of a code, so it can be used on data which is still being received.
+
+        Parameters
+        ----------
+        data
+            The encoded symbols, any object supporting slicing and the buffer protocol.
+
+        start : int
+            Position of the first bit to decode.
+
+        end : int
+            Position of the bit following the last available bit.
+
+        count : int
+            Maximum number of symbols to decode.
+
+        Returns
+        -------
+        tuple
+            The decoded symbols (a bytearray, or a list when some symbols are not bytes) and the position of the bit
+            following the last decoded code.
+        """
+
+        entries = self.entries
+        multi_symbols = self.multi_symbols
+        multi_bits = self.multi_bits
+        table_bits = self.table_bits
+        table_mask = (1 << table_bits) - 1
+        needed_bits = max(self.max_length, table_bits)
+
+        decoded = bytearray() if self.byte_symbols else []
+
+        if start >= end or not count:
+            return decoded, start
+
+        accumulator = data[start >> 3] & (0xff >> (start & 7))
+        available_bits = 8 - (start & 7)
+        position = (start >> 3) + 1
+        remaining_bits = end - start
+
+        while len(decoded) < count:
+
+            while available_bits < needed_bits:
+                chunk = data[position:position + 8]
+                accumulator = ((accumulator & ((1 << available_bits) - 1)) << 64) | \
+                    (int.from_bytes(chunk, 'big') << ((8 - len(chunk)) << 3))
+                available_bits += 64
+                position += 8
+
+            index = (accumulator >> (available_bits - table_bits)) & table_mask
+            length = multi_bits[index]
+
+            # Several symbols at once when they are all wanted and all available
+            if length and remaining_bits >= table_bits and count - len(decoded) >= len(multi_symbols[index]):
+                decoded += multi_symbols[index]
+            else:
+                length = entries[index] & 31
+
+                if length:
+                    symbol = entries[index] >> 5
+                else:
+                    symbol, length = self.__decode_long_code(accumulator, available_bits)
+
+                # The codes are complete, so the zeros read past the end can only be taken for the beginning of a code
+                if length > remaining_bits:
+                    break
+
+                decoded.append(symbol)
+
+            available_bits -= length
+            remaining_bits -= length
+
+        return decoded, end - remaining_bits
+
+
+# Longest code produced by code_lengths : codes always fit in 32 bits, and in the 6 bits write_code_lengths starts with
+MAX_CODE_LENGTH = 32
+
+
+class HuffmanTree(object):
+    """ Huffman tree stored in parallel lists of integers instead of node objects.
+
+    Parameters
+    ----------
+    frequencies : list
+        The frequency of each symbol, symbols with a frequency of 0 get no leaf.
+
+    Attributes
+    ----------
+    frequency : list
+        Frequency of each node.
+
+    left : list
+        Index of the left child of each node, -1 for the leaves.
+
+    right : list
+        Index of the right child of each node, -1 for the leaves.
+
+    symbol : list
+        Symbol of each leaf, -1 for the other nodes.
+
+    root : int
+        Index of the root node, -1 when there is no symbol.
+
+    Notes
+    -----
+    The leaves come first, ordered by symbol, then each merge appends a node. The heap holds (frequency, index) tuples,
+    so it only compares integers and ties are broken by index, which makes the tree deterministic. Children are always
+    created before their parent, so iterating over the nodes backwards visits every parent before its children and no
+    recursion is needed.
+    """
+
+    __slots__ = ("frequency", "left", "right", "symbol", "root")
+
+    def __init__(self, frequencies):
+        self.symbol = [symbol for symbol, frequency in enumerate(frequencies) if frequency]
+        self.frequency = [frequencies[symbol] for symbol in self.symbol]
+        self.left = [-1] * len(self.symbol)
+        self.right = [-1] * len(self.symbol)
+
+        heap = [(frequency, node) for node, frequency in enumerate(self.frequency)]
+        heapq.heapify(heap)
+
+        while len(heap) > 1:
+            frequency1, node1 = heapq.heappop(heap)
+            frequency2, node2 = heapq.heappop(heap)
+            heapq.heappush(heap, (frequency1 + frequency2, len(self.frequency)))
+            self.frequency.append(frequency1 + frequency2)
+            self.left.append(node1)
+            self.right.append(node2)
+            self.symbol.append(-1)
+
+        self.root = heap[0][1] if heap else -1
+
+    def depths(self):
+        """ Returns the depth of each node, the root is at depth 0. """
+
+        depths = [0] * len(self.frequency)
+
+        for node in range(len(self.frequency) - 1, -1, -1):
+            if self.left[node] >= 0:
+                depths[self.left[node]] = depths[self.right[node]] = depths[node] + 1
+
+        return depths
+
+    def code_lengths(self, count):
+        """ Returns the code length of each of the count symbols of the alphabet, 0 when the symbol has no leaf. """
+
+        lengths = [0] * count
+
+        for symbol, depth in zip(self.symbol, self.depths()):
+            if symbol >= 0:
+                lengths[symbol] = depth
+
+        return lengths
+
+
+def limited_code_lengths(frequencies, max_length):
+    """ Computes optimal code lengths which don't exceed a maximum, with the package-merge algorithm.
+
+    Parameters
+    ----------
+    frequencies : list
+        The frequency of each symbol, symbols with a frequency of 0 get no code.
+
+    max_length : int
+        Maximum code length, 2 ** max_length must be at least the number of used symbols.
+
+    Returns
+    -------
+    list
+        The code length of each symbol, 0 when the symbol has no code.
+
+    Notes
+    -----
+    Each used symbol is a coin of its frequency, available for each length from 1 to max_length. The coins of a length
+    are paired up by increasing weight into packages, which are merged with the coins of the previous length. The
+    2n - 2 lightest items of the last list are kept, and the code length of a symbol is the number of them holding
+    one of its coins.
+    """
+
+    symbols = sorted((frequency, symbol) for symbol, frequency in enumerate(frequencies) if frequency)
+    lengths = [0] * len(frequencies)
+
+    if len(symbols) > 1 << max_length:
+        raise ValueError("{} symbols can't have codes of {} bits at most.".format(len(symbols), max_length))
+
+    if len(symbols) == 1:
+        lengths[symbols[0][1]] = 1
+        return lengths
+
+    coins = [(frequency, (symbol,)) for frequency, symbol in symbols]
+    items = coins
+
+    for _ in range(max_length - 1):
+        packages = [(items[index][0] + items[index + 1][0], items[index][1] + items[index + 1][1])
+                    for index in range(0, len(items) - 1, 2)]
+        items = list(heapq.merge(coins, packages, key=lambda item: item[0]))
+
+    for frequency, item_symbols in items[:2 * len(symbols) - 2]:
+        for symbol in item_symbols:
+            lengths[symbol] += 1
+
+    return lengths
+
+
+def code_lengths(frequencies, max_length=MAX_CODE_LENGTH):
+    """ Computes the lengths of the Huffman codes of symbols.
+
+    Parameters
+    ----------
+    frequencies : list
+        The frequency of each symbol, symbols with a frequency of 0 get no code.
+
+    max_length : int
+        Maximum code length. Huffman codes only get longer when the frequencies are extremely skewed (like a Fibonacci
+        sequence), limited_code_lengths is used then.
+
+    Returns
+    -------
+    list
+        The code length of each symbol, 0 when the symbol has no code. When a single symbol is used, its code is 1 bit
+        long.
+    """
+
+    tree = HuffmanTree(frequencies)
+    lengths = tree.code_lengths(len(frequencies))
+
+    if len(tree.symbol) == 1:
+        # The only symbol is the root of the tree
+        lengths[tree.symbol[0]] = 1
+
+    if max(lengths, default=0) > max_length:
+        return limited_code_lengths(frequencies, max_length)
+
+    return lengths
+
+
+def canonical_codes(lengths):
+    """ Derives the canonical prefix code from the code lengths.
+
+    Symbols are sorted by code length then by value, and each one gets the next available code of its length. Since
+    the codes only depend on the lengths, storing the lengths is enough to rebuild them.
+
+    Parameters
+    ----------
+    lengths : list
+        The code length of each symbol, 0 when the symbol has no code.
+
+    Returns
+    -------
+    dict
+        Association between symbols and their code, as a tuple made of the code and its bit length.
+    """
+
+    codes = {}
+    code = 0
+    previous_length = 0
+
+    for length, symbol in sorted((length, symbol) for symbol, length in enumerate(lengths) if length):
+        code <<= length - previous_length
+        codes[symbol] = (code, length)
+        code += 1
+        previous_length = length
+
+    return codes
+
+
+@lru_cache(maxsize=64)
+def canonical_decoding_table(lengths, table_bits=DecodingTable.DEFAULT_TABLE_BITS):
+    """ Same as DecodingTable(canonical_codes(lengths), table_bits), but tables are cached since identical lengths give
+    identical codes, which is common when compressing a lot of similar small payloads.
+
+    Parameters
+    ----------
+    lengths : tuple
+        The code length of each symbol, 0 when the symbol has no code.
+
+    table_bits : int
+        Maximum number of bits looked up at each step.
+
+    Returns
+    -------
+    DecodingTable
+        The table, it must not be modified.
+    """
+
+    return DecodingTable(canonical_codes(lengths), table_bits)
+
+
+def write_code_lengths(writer, lengths):
+    """ Writes code lengths compactly, like bzip2 does.
+
+    A bitmap tells which groups of 16 symbols are used, then a 16 bits mask is written for each used group. Finally the
+    lengths of the used symbols are written as differences with the previous length : "10" adds one, "11" removes one
+    and "0" moves to the next symbol. Lengths of successive symbols are usually close, so it takes about 2 bits each.
+
+    Parameters
+    ----------
+    writer : BitWriter
+        Where the lengths are written.
+
+    lengths : list
+        The code length of each symbol, 0 when the symbol has no code. The same number of lengths must be given to
+        read_code_lengths.
+    """
+
+    groups = [lengths[index:index + 16] for index in range(0, len(lengths), 16)]
+
+    for group in groups:
+        writer.write(any(group), 1)
+
+    for group in groups:
+        if any(group):
+            for length in group:
+                writer.write(length > 0, 1)
+
+    used_lengths = [length for length in lengths if length]
+    current_length = used_lengths[0]
+    writer.write(current_length, 6)
+
+    for length in used_lengths:
+        while current_length < length:
+            writer.write(0b10, 2)
+            current_length += 1
+
+        while current_length > length:
+            writer.write(0b11, 2)
+            current_length -= 1
+
+        writer.write(0, 1)
+
+
+def read_code_lengths(reader, count):
+    """ Reads code lengths written by write_code_lengths.
+
+    Parameters
+    ----------
+    reader : BitReader
+        Where the lengths are read from.
+
+    count : int
+        Number of symbols of the alphabet.
+
+    Returns
+    -------
+    list
+        The code length of each symbol, 0 when the symbol has no code.
+    """
+
+    used_groups = [reader.read(1) for _ in range(0, count, 16)]
+    used_symbols = []
+
+    for group, used in enumerate(used_groups):
+        if used:
+            for symbol in range(group * 16, min(group * 16 + 16, count)):
+                if reader.read(1):
+                    used_symbols.append(symbol)
+
+    if not used_symbols:
+        raise IOError("Invalid code lengths, no symbol is used.")
+
+    lengths = [0] * count
+    current_length = reader.read(6)
+
+    for symbol in used_symbols:
+        while reader.read(1):
+            current_length += -1 if reader.read(1) else 1
+
+        if current_length <= 0:
+            raise IOError("Invalid code length {} for symbol {}.".format(current_length, symbol))
+
+        lengths[symbol] = current_length
+
+    return lengths
@@ -0,0 +1,219 @@
+# coding: utf-8
+
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, the peak RSS is not reported there
+    resource = None
+
+
+def peak_rss():
+    """ Returns the peak resident set size of the process in bytes, or None when it is not known.
+
+    Notes
+    -----
+    This is the peak since the process started, not since a given call, the operating system doesn't provide more.
+    """
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux gives kibibytes, macOS gives bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Stats(object):
+    """ What happened during a single compression or decompression.
+
+    Attributes
+    ----------
+    algorithm : str
+        Name of the algorithm.
+
+    operation : str
+        "compress" or "decompress".
+
+    bytes_in : int
+        Number of bytes given to the algorithm.
+
+    bytes_out : int
+        Number of bytes it produced.
+
+    phases : OrderedDict
+        Wall time in seconds spent in each phase (like "histogram", "tree" or "encode"), in the order they started.
+        Time spent outside of any phase is not listed.
+
+    wall_time : float
+        Total wall time in seconds.
+
+    tracemalloc_peak : int
+        Peak of the memory allocated by Python during the call in bytes, on top of what was allocated before. It is only
+        measured when the codec has trace_memory set since tracing slows everything down, it is None otherwise.
+
+    peak_rss : int
+        Peak resident set size of the process in bytes when the call returned, None when it is not known.
+    """
+
+    def __init__(self, algorithm, operation, bytes_in=0):
+        self.algorithm = algorithm
+        self.operation = operation
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.phases = OrderedDict()
+        self.wall_time = 0
+        self.tracemalloc_peak = None
+        self.peak_rss = None
+
+    @contextmanager
+    def phase(self, name):
+        """ Measures the time spent in the with block, it is added to the phase if it already has a time.
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase.
+        """
+
+        begin = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - begin
+
+    def as_dict(self):
+        """ Returns the statistics as a dict of plain values, ready to be exported (to JSON for instance). """
+
+        return {
+            "algorithm": self.algorithm,
+            "operation": self.operation,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "phases": dict(self.phases),
+            "wall_time": self.wall_time,
+            "tracemalloc_peak": self.tracemalloc_peak,
+            "peak_rss": self.peak_rss,
+        }
+
+    def __str__(self):
+        phases = ", ".join("{} {:.3f}s".format(name, duration) for name, duration in self.phases.items())
+        return "{} {} : {} bytes -> {} bytes in {:.3f}s ({})".format(
+            self.algorithm, self.operation, self.bytes_in, self.bytes_out, self.wall_time, phases)
+
+
+class Instrumented(object):
+    """ Mixin recording Stats for each compression and decompression, and calling hooks with them.
+
+    Attributes
+    ----------
+    stats : Stats
+        Statistics of the last call, or of the current one while it runs.
+
+    trace_memory : bool
+        Whether the memory allocated by Python is traced with tracemalloc. Set it on an instance or on a class.
+
+    hooks : tuple
+        Functions called with the Stats at the end of each call, see add_hook.
+    """
+
+    stats = None
+    trace_memory = False
+    hooks = ()
+
+    # Number of measure blocks being run, so compress_file calling compress_block produces a single Stats
+    __depth = 0
+
+    def add_hook(self, hook):
+        """ Calls hook with the Stats of each following call, to export them to a metrics system for instance.
+
+        Parameters
+        ----------
+        hook : callable
+            Function taking a Stats. Exceptions it raises are not caught.
+        """
+
+        self.hooks = self.hooks + (hook,)
+
+    def remove_hook(self, hook):
+        """ Stops calling a hook added by add_hook. """
+
+        self.hooks = tuple(registered for registered in self.hooks if registered != hook)
+
+    def phase(self, name):
+        """ Shortcut to measure a phase of the current call, see Stats.phase. Nothing is measured outside of a call.
+        """
+
+        if not self.__depth:
+            return nullcontext()
+
+        return self.stats.phase(name)
+
+    @contextmanager
+    def measure(self, operation, bytes_in):
+        """ Records the Stats of the with block, the caller sets bytes_out. When a measure is already running, like
+        compress_block called by compress_file, its Stats are used instead.
+
+        Parameters
+        ----------
+        operation : str
+            "compress" or "decompress".
+
+        bytes_in : int
+            Number of bytes given to the algorithm.
+
+        Yields
+        ------
+        Stats
+            The statistics being recorded.
+        """
+
+        if self.__depth:
+            self.__depth += 1
+
+            try:
+                yield self.stats
+            finally:
+                self.__depth -= 1
+
+            return
+
+        stats = self.stats = Stats(self.name, operation, bytes_in)
+
+        if self.trace_memory:
+            # Only imported when needed, it takes longer to import than to compress a small file
+            import tracemalloc
+
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+
+        if started_tracing:
+            tracemalloc.start()
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        self.__depth = 1
+        begin = time.perf_counter()
+
+        try:
+            yield stats
+        finally:
+            self.__depth = 0
+            stats.wall_time = time.perf_counter() - begin
+
+            if self.trace_memory:
+                stats.tracemalloc_peak = tracemalloc.get_traced_memory()[1] - baseline
+
+            if started_tracing:
+                tracemalloc.stop()
+
+            stats.peak_rss = peak_rss()
+
+        for hook in self.hooks:
+            hook(stats)
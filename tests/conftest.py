@@ -0,0 +1,46 @@
+# coding: utf-8
+
+import multiprocessing
+import random
+
+import pytest
+
+from compress.benchmark import generate_text
+
+# Small blocks, so the largest sample is split into several of them
+BLOCK_SIZE = 4096
+
+SAMPLES = {
+    "empty": b"",
+    "one-byte": b"x",
+    "repetitive": b"abcabcabd" * 300,
+    "random": random.Random(1).getrandbits(8 * 3000).to_bytes(3000, "little"),
+    "larger-than-a-block": generate_text(5 * BLOCK_SIZE + 123, random.Random(0)),
+}
+
+
+@pytest.fixture(params=sorted(SAMPLES))
+def sample(request):
+    """ Every kind of data the codecs must round trip : empty, a single byte, repetitive, random and larger than a
+    block. """
+
+    return SAMPLES[request.param]
+
+
+@pytest.fixture
+def block_size():
+    return BLOCK_SIZE
+
+
+@pytest.fixture(params=["fork", "spawn"])
+def start_method(request):
+    """ Runs the test with each way of starting the workers : spawn sends them the codec pickled, it is the default on
+    macOS and Windows. """
+
+    if request.param not in multiprocessing.get_all_start_methods():
+        pytest.skip("{} isn't available on this platform".format(request.param))
+
+    previous = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method(request.param, force=True)
+    yield request.param
+    multiprocessing.set_start_method(previous, force=True)
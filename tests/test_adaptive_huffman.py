@@ -0,0 +1,50 @@
+# coding: utf-8
+
+import io
+
+import pytest
+
+import compress
+from compress.algorithms.adaptive_huffman import AdaptiveHuffman
+from compress.cli import main
+
+DATA = b"The decompressed file must be the same as the original one.\n" * 2000
+
+
+@pytest.mark.parametrize("max_interval_bits", [8, 15])
+def test_compress(sample, max_interval_bits):
+    codec = AdaptiveHuffman(max_interval_bits=max_interval_bits)
+    compressed = codec.compress(sample)
+
+    assert codec.decompress(compressed) == sample
+    assert compress.decompress(compressed) == sample
+
+
+def test_stream(sample):
+    codec = AdaptiveHuffman()
+    compressed = io.BytesIO()
+    codec.compress_stream(io.BytesIO(sample), compressed)
+    decompressed = io.BytesIO()
+    codec.decompress_stream(io.BytesIO(compressed.getvalue()), decompressed)
+
+    assert decompressed.getvalue() == sample
+
+
+def test_truncated_stream():
+    compressed = io.BytesIO()
+    AdaptiveHuffman().compress_stream(io.BytesIO(DATA), compressed)
+
+    with pytest.raises(IOError):
+        AdaptiveHuffman().decompress_stream(io.BytesIO(compressed.getvalue()[:-10]), io.BytesIO())
+
+
+# Adaptive Huffman writes its own format with a single job and a container with several jobs
+@pytest.mark.parametrize("compress_args", [[], ["-j", "2"]])
+@pytest.mark.parametrize("decompress_args", [[], ["-s"], ["-j", "2"]])
+def test_cli(tmp_path, monkeypatch, compress_args, decompress_args):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "original.txt").write_bytes(DATA)
+
+    assert main(["-a", "adaptive-huffman", "-o", "compressed.tor", "original.txt"] + compress_args) == 0
+    assert main(["-a", "adaptive-huffman", "-d", "-o", "decompressed.txt", "compressed.tor"] + decompress_args) == 0
+    assert (tmp_path / "decompressed.txt").read_bytes() == DATA
@@ -0,0 +1,153 @@
+# coding: utf-8
+
+import asyncio
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import random
+
+import pytest
+
+import compress
+from compress.aio import AsyncCompressor, AsyncDecompressor
+from compress.algorithms.huffman import Huffman
+from compress.algorithms.lzw import LZW
+from compress.benchmark import generate_text
+from compress.stream import StreamCompressor, StreamDecompressor
+from conftest import SAMPLES
+
+
+class RecordingExecutor(Executor):
+    """ Keeps the futures of what it is given, so the tests can see how many blocks are in flight and whether they are
+    cancelled. When held, nothing is run. """
+
+    def __init__(self, held=False):
+        self.held = held
+        self.futures = []
+
+    def submit(self, function, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+
+        if not self.held:
+            future.set_result(function(*args, **kwargs))
+
+        return future
+
+
+def stream_reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def chunks(data, chunk_size, pulled=None):
+    for start in range(0, len(data), chunk_size):
+        if pulled is not None:
+            pulled.append(start)
+
+        yield data[start:start + chunk_size]
+
+
+async def collect(pieces):
+    return b"".join([piece async for piece in pieces])
+
+
+def test_stream_reader(sample, block_size):
+
+    async def run():
+        container = await collect(AsyncCompressor(LZW(), block_size).compress(stream_reader(sample)))
+
+        assert b"".join(StreamDecompressor().decompress(container)) == sample
+        assert await collect(AsyncDecompressor().decompress(stream_reader(container))) == sample
+
+    asyncio.run(run())
+
+
+def test_async_iterator(sample, block_size):
+
+    async def run():
+        # Chunks of an odd size, which never match the blocks
+        container = await collect(AsyncCompressor(Huffman(), block_size).compress(chunks(sample, 1000)))
+
+        assert container == b"".join(StreamCompressor(Huffman(), block_size).compress(sample))
+        assert await collect(AsyncDecompressor().decompress(chunks(container, 777))) == sample
+
+    asyncio.run(run())
+
+
+def test_threads(block_size):
+    dictionary = compress.train_dictionary([generate_text(200, random.Random(seed)) for seed in range(20)])
+    data = SAMPLES["larger-than-a-block"] * 4
+
+    async def run():
+        with ThreadPoolExecutor(4) as executor:
+            for codec in (LZW(), LZW(dictionary=dictionary)):
+                container = await collect(AsyncCompressor(codec, block_size, executor, window=4).compress(
+                    chunks(data, block_size)))
+                decompressor = AsyncDecompressor(executor, window=4)
+
+                assert await collect(decompressor.decompress(chunks(container, block_size))) == data
+                assert decompressor.bytes_out == len(data)
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("window", [1, 2, 3])
+def test_window(window, block_size):
+    data = SAMPLES["larger-than-a-block"]
+    container = b"".join(StreamCompressor(LZW(), block_size).compress(data))
+
+    async def run():
+        # The source is only read when a block leaves the window
+        pulled = []
+        executor = RecordingExecutor()
+        pieces = AsyncCompressor(LZW(), block_size, executor, window).compress(chunks(data, block_size, pulled))
+        await pieces.__anext__()
+        await pieces.__anext__()
+
+        assert len(pulled) == len(executor.futures) == window
+        await pieces.aclose()
+
+        executor = RecordingExecutor()
+        blocks = AsyncDecompressor(executor, window).decompress(chunks(container, 100))
+        await blocks.__anext__()
+
+        assert len(executor.futures) == window
+        await blocks.aclose()
+
+    asyncio.run(run())
+
+    with pytest.raises(ValueError):
+        AsyncCompressor(LZW(), window=0)
+
+    with pytest.raises(ValueError):
+        AsyncDecompressor(window=0)
+
+
+def test_cancellation(block_size):
+    data = SAMPLES["larger-than-a-block"]
+    container = b"".join(StreamCompressor(LZW(), block_size).compress(data))
+
+    async def consume(pieces, executor, window):
+        task = asyncio.ensure_future(collect(pieces))
+
+        while len(executor.futures) < window:
+            await asyncio.sleep(0)
+
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # No more than the window was handed to the executor, and none of it is left running
+        assert len(executor.futures) == window
+        assert all(future.cancelled() for future in executor.futures)
+
+    async def run():
+        executor = RecordingExecutor(held=True)
+        await consume(AsyncCompressor(LZW(), block_size, executor, window=3).compress(chunks(data, 1000)), executor, 3)
+
+        executor = RecordingExecutor(held=True)
+        await consume(AsyncDecompressor(executor, window=3).decompress(chunks(container, 1000)), executor, 3)
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+# coding: utf-8
+
+import random
+import threading
+
+import pytest
+
+import compress
+from compress.algorithms import ALGORITHMS
+from compress.api import get_codec
+from compress.benchmark import CONFIGURATIONS, generate_text
+
+
+@pytest.mark.parametrize("algorithm", sorted(ALGORITHMS))
+def test_compress(sample, algorithm):
+    assert compress.decompress(compress.compress(sample, algorithm=algorithm)) == sample
+
+
+def test_buffer_protocol():
+    data = generate_text(1000, random.Random(0))
+
+    assert compress.decompress(memoryview(compress.compress(bytearray(data)))) == data
+
+
+def test_invalid_data():
+    with pytest.raises(IOError):
+        compress.decompress(b"")
+
+    with pytest.raises(IOError):
+        compress.decompress(b"\xfe")
+
+
+def test_get_codec():
+    assert get_codec("huffman") is get_codec("huffman")
+    assert isinstance(get_codec(ALGORITHMS["lzw"].algorithm_id), ALGORITHMS["lzw"])
+
+    with pytest.raises(ValueError):
+        get_codec("unknown")
+
+
+@pytest.mark.parametrize("algorithm", ["lzss", "range", "lz-huffman", "adaptive-huffman"])
+def test_dictionary_unsupported(algorithm):
+    dictionary = compress.train_dictionary([generate_text(200, random.Random(seed)) for seed in range(10)])
+
+    with pytest.raises(ValueError, match="doesn't support dictionaries"):
+        compress.compress(b"some text", algorithm=algorithm, dictionary=dictionary)
+
+
+@pytest.mark.parametrize("name", sorted(CONFIGURATIONS))
+def test_decompress_is_locked(name):
+    codec = CONFIGURATIONS[name]()
+    data = b"abcabcabd" * 300
+    compressed = codec.compress(data)
+    results = []
+
+    # An instance keeps its state while it decompresses, the calls of several threads must wait for each other
+    with codec._Codec__lock:
+        thread = threading.Thread(target=lambda: results.append(codec.decompress(compressed)))
+        thread.start()
+        thread.join(0.2)
+
+        assert thread.is_alive()
+
+    thread.join()
+    assert results == [data]
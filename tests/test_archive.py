@@ -0,0 +1,112 @@
+# coding: utf-8
+
+import os
+
+import pytest
+
+from compress.archive import ArchiveCompressor, ArchiveReader, is_archive, list_files
+from compress.benchmark import CONFIGURATIONS
+from compress.cli import main
+from conftest import SAMPLES
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+
+    for name, data in SAMPLES.items():
+        (source / name).write_bytes(data)
+
+    (source / "nested" / "copy").write_bytes(SAMPLES["repetitive"])
+    return source
+
+
+def write_archive(tmp_path, paths, algorithm, block_size, jobs=1):
+    archive_path = tmp_path / "archive.tor"
+
+    with open(archive_path, "wb") as output_file:
+        members = ArchiveCompressor(algorithm, block_size, jobs=jobs).compress([str(path) for path in paths],
+                                                                            output_file)
+
+    return archive_path, members
+
+
+@pytest.mark.parametrize("name", sorted(CONFIGURATIONS))
+def test_extract(tmp_path, source, block_size, name):
+    archive_path, members = write_archive(tmp_path, [source], CONFIGURATIONS[name](), block_size)
+
+    assert len(members) == len(SAMPLES) + 1
+    assert is_archive(str(archive_path))
+
+    with ArchiveReader(str(archive_path)) as reader:
+        assert reader.read("source/nested/copy") == SAMPLES["repetitive"]
+
+        reader.extractall(str(tmp_path / "extracted"))
+
+    for name, data in SAMPLES.items():
+        assert (tmp_path / "extracted" / "source" / name).read_bytes() == data
+
+    assert (tmp_path / "extracted" / "source" / "nested" / "copy").read_bytes() == SAMPLES["repetitive"]
+
+
+def test_several_jobs(tmp_path, source, block_size):
+    archive_path, _ = write_archive(tmp_path, [source], CONFIGURATIONS["huffman"](), block_size, jobs=2)
+
+    with ArchiveReader(str(archive_path)) as reader:
+        for name, data in SAMPLES.items():
+            assert reader.read("source/" + name) == data
+
+
+def test_list_files(tmp_path, source):
+    files = list_files([str(source), str(source / "nested" / "copy")], exclude=[str(source / "empty")])
+    names = [name for _, name in files]
+
+    # Sorted, relative to the parent of the given paths, the excluded file left out
+    assert names == ["source/" + name for name in sorted(SAMPLES) if name != "empty"] + ["source/nested/copy", "copy"]
+
+
+def test_metadata(tmp_path, source, block_size):
+    path = source / "repetitive"
+    os.chmod(str(path), 0o640)
+    os.utime(str(path), ns=(1234567890123456789, 1234567890123456789))
+    archive_path, _ = write_archive(tmp_path, [path], CONFIGURATIONS["lzw"](), block_size)
+
+    with ArchiveReader(str(archive_path)) as reader:
+        assert reader.names() == ["repetitive"]
+
+        with pytest.raises(KeyError):
+            reader.get_member("missing")
+
+        extracted = reader.extract("repetitive", str(tmp_path / "extracted"))
+
+    assert os.stat(extracted).st_mode & 0o7777 == 0o640
+    assert os.stat(extracted).st_mtime_ns == 1234567890123456789
+
+
+def test_special_bits(tmp_path, source, block_size):
+    path = source / "repetitive"
+    os.chmod(str(path), 0o6755)
+
+    if os.stat(str(path)).st_mode & 0o7777 != 0o6755:
+        pytest.skip("The setuid and setgid bits can't be set here")
+
+    archive_path, _ = write_archive(tmp_path, [path], CONFIGURATIONS["lzw"](), block_size)
+
+    # They are recorded, but extracting an archive doesn't make setuid programs
+    with ArchiveReader(str(archive_path)) as reader:
+        assert reader.get_member("repetitive").mode == 0o6755
+
+        extracted = reader.extract("repetitive", str(tmp_path / "extracted"))
+
+    assert os.stat(extracted).st_mode & 0o7777 == 0o755
+
+
+def test_cli(tmp_path, source, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    assert main(["-j", "1", "source", "-o", "archive.tor"]) == 0
+    assert main(["-d", "archive.tor", "-o", "extracted"]) == 0
+
+    for name, data in SAMPLES.items():
+        assert (tmp_path / "extracted" / "source" / name).read_bytes() == data
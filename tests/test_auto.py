@@ -0,0 +1,51 @@
+# coding: utf-8
+
+import random
+
+import compress
+from compress.algorithms.auto import Auto
+from compress.algorithms.codec import METHOD_STORED
+from compress.algorithms.huffman import Huffman
+from compress.algorithms.lzw import LZW
+from compress.benchmark import generate_text
+
+RANDOM = random.Random(1).getrandbits(8 * 10000).to_bytes(10000, "little")
+
+
+def test_compress(sample):
+    codec = Auto()
+    compressed = codec.compress(sample)
+
+    assert codec.decompress(compressed) == sample
+    assert compress.decompress(compressed) == sample
+
+
+def test_random_data_is_stored():
+    codec = Auto()
+    method, payload = codec.compress_method(RANDOM)
+
+    assert method == METHOD_STORED and payload == RANDOM
+    assert codec.choices[METHOD_STORED] == 1
+
+
+def test_repetitive_data_uses_lzw():
+    codec = Auto()
+
+    assert codec.compress_method(b"abcabcabd" * 1000)[0] == LZW.algorithm_id
+
+
+def test_without_trial_lzw_is_never_used():
+    codec = Auto(trial=False)
+
+    assert codec.compress_method(b"abcabcabd" * 1000)[0] == Huffman.algorithm_id
+    assert codec.choices[LZW.algorithm_id] == 0
+
+
+def test_blocks():
+    codec = Auto(sample_size=1000)
+
+    for block in (RANDOM, b"abcabcabd" * 1000, generate_text(20000, random.Random(0))):
+        compressed = codec.compress_block(block)
+
+        # The method is part of the payload, any instance decompresses it
+        assert Auto().decompress_block(compressed) == block
@@ -0,0 +1,86 @@
+# coding: utf-8
+
+import random
+
+import pytest
+
+from compress.utils.backends import NUMPY_AVAILABLE, NumpyBackend, PythonBackend, get_backend
+from compress.utils.bitio import BitWriter
+from compress.utils.prefix_codes import canonical_codes, code_lengths
+from conftest import SAMPLES
+
+pytestmark = pytest.mark.skipif(not NUMPY_AVAILABLE, reason="NumPy isn't installed")
+
+MIN_SIZE = NumpyBackend.MIN_SIZE
+
+# Around the size where NumPy takes over, and big enough for several chunks
+SIZES = [MIN_SIZE - 1, MIN_SIZE, MIN_SIZE + 1, 3 * MIN_SIZE + 7]
+
+
+def skewed_data(size, alphabet=256):
+    generator = random.Random(size)
+    return bytes(min(int(generator.expovariate(0.05)), alphabet - 1) for _ in range(size))
+
+
+def prefix_code(data, symbols=256):
+    frequencies = PythonBackend.byte_histogram(data) + [1] * (symbols - 256)
+    lengths = code_lengths(frequencies)
+    codes = [0] * symbols
+
+    for symbol, (code, length) in canonical_codes(lengths).items():
+        codes[symbol] = code
+
+    return codes, lengths
+
+
+def encode(backend, data, codes, lengths, leading_bits):
+    writer = BitWriter()
+
+    # The codes don't start on a byte boundary when the writer has pending bits
+    if leading_bits:
+        writer.write(0b1011011 & ((1 << leading_bits) - 1), leading_bits)
+
+    backend.encode(data, codes, lengths, writer)
+    writer.write(0b101, 3)
+    return writer.bits_written, writer.getvalue()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_byte_histogram(size):
+    data = skewed_data(size)
+
+    assert NumpyBackend.byte_histogram(data) == PythonBackend.byte_histogram(data)
+    assert NumpyBackend.byte_histogram(memoryview(data)) == PythonBackend.byte_histogram(data)
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("leading_bits", [0, 3, 7])
+def test_encode(size, leading_bits):
+    data = skewed_data(size)
+    codes, lengths = prefix_code(data)
+
+    assert encode(NumpyBackend, data, codes, lengths, leading_bits) == encode(PythonBackend, data, codes, lengths,
+                                                                              leading_bits)
+
+
+@pytest.mark.parametrize("chunk_bits", [8, 61, 1000])
+@pytest.mark.parametrize("leading_bits", [0, 5])
+def test_chunks(chunk_bits, leading_bits, monkeypatch):
+    # Small chunks, so the codes of a chunk rarely end on a byte boundary and their bits are carried to the next one
+    monkeypatch.setattr(NumpyBackend, "CHUNK_BITS", chunk_bits)
+    data = SAMPLES["larger-than-a-block"]
+
+    # More codes than bytes, like the alphabet of LZ-Huffman, and codes longer than the chunks
+    for symbols in (256, 284):
+        codes, lengths = prefix_code(data, symbols)
+
+        assert encode(NumpyBackend, data, codes, lengths, leading_bits) == encode(PythonBackend, data, codes,
+                                                                                  lengths, leading_bits)
+
+
+def test_get_backend():
+    assert get_backend() is NumpyBackend
+    assert get_backend("python") is PythonBackend
+
+    with pytest.raises(ValueError):
+        get_backend("fortran")
@@ -0,0 +1,57 @@
+# coding: utf-8
+
+from compress.benchmark import MAX_TOLERANCE, compare_results, run_benchmark, summarize_durations
+
+
+def make_result(**fields):
+    result = {"corpus": "text", "kind": "text", "codec": "huffman", "size": 1000, "compressed_size": 500,
+              "ratio": 0.5, "compress_mb_s": 10.0, "decompress_mb_s": 10.0, "compress_peak_kib": 100.0,
+              "decompress_peak_kib": 100.0, "compress_noise": 0.0, "decompress_noise": 0.0}
+    result.update(fields)
+    return result
+
+
+def test_noise_ignores_a_single_disturbed_run():
+    shortest, noise = summarize_durations([1.0, 1.02, 0.98, 1.01, 5.0])
+
+    assert shortest == 0.98
+    assert noise < 0.03
+
+
+def test_throughput_within_the_noise_is_not_a_regression():
+    # 10% plus 3 times 5% of noise
+    baseline = [make_result(compress_noise=0.03)]
+
+    assert compare_results(baseline, [make_result(compress_mb_s=7.7, compress_noise=0.02)]) == []
+    assert len(compare_results(baseline, [make_result(compress_mb_s=7.3, compress_noise=0.02)])) == 1
+
+
+def test_large_drop_with_high_noise_is_a_regression():
+    baseline = [make_result(compress_noise=0.85, decompress_noise=0.5)]
+    results = [make_result(compress_mb_s=0.1, decompress_mb_s=10.0 * (1 - MAX_TOLERANCE) - 0.1, compress_noise=0.9,
+                           decompress_noise=0.7)]
+
+    assert len(compare_results(baseline, results)) == 2
+
+
+def test_ratio_and_memory_ignore_the_noise():
+    baseline = [make_result(compress_noise=1.0, decompress_noise=1.0)]
+
+    assert len(compare_results(baseline, [make_result(ratio=0.6)])) == 1
+    assert len(compare_results(baseline, [make_result(decompress_peak_kib=120.0)])) == 1
+    assert compare_results(baseline, [make_result(ratio=0.54)]) == []
+
+
+def test_results_without_noise():
+    baseline = [make_result()]
+    del baseline[0]["compress_noise"], baseline[0]["decompress_noise"]
+
+    assert len(compare_results(baseline, [make_result(decompress_mb_s=8.0)])) == 1
+
+
+def test_run_benchmark():
+    results = run_benchmark([("text", "text", b"some text, some more text " * 20)], ["huffman", "lzss-1"], warmups=0,
+                            repeats=2)
+
+    assert [result["codec"] for result in results] == ["huffman", "lzss-1"]
+    assert all(result["compress_noise"] >= 0 and result["ratio"] < 1 for result in results)
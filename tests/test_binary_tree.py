@@ -0,0 +1,124 @@
+# coding: utf-8
+
+import random
+
+import pytest
+
+from compress.utils.binary_tree import BinaryTree, Node
+
+
+def recursive_preorder(node):
+    if node is None:
+        return []
+
+    return [node.value] + recursive_preorder(node.left) + recursive_preorder(node.right)
+
+
+def recursive_inorder(node):
+    if node is None:
+        return []
+
+    return recursive_inorder(node.left) + [node.value] + recursive_inorder(node.right)
+
+
+def recursive_postorder(node):
+    if node is None:
+        return []
+
+    return recursive_postorder(node.left) + recursive_postorder(node.right) + [node.value]
+
+
+def skewed(count, side):
+    root = node = Node(0)
+
+    for value in range(1, count):
+        setattr(node, side, Node(value))
+        node = getattr(node, side)
+
+    return root
+
+
+def zigzag(count):
+    # Each node only has a child, alternately on the left and on the right
+    root = node = Node(0)
+
+    for value in range(1, count):
+        child = Node(value)
+
+        if value % 2:
+            node.left = child
+        else:
+            node.right = child
+
+        node = child
+
+    return root
+
+
+def balanced(depth, values):
+    node = Node(next(values))
+
+    if depth:
+        node.left = balanced(depth - 1, values)
+        node.right = balanced(depth - 1, values)
+
+    return node
+
+
+def random_tree(count, generator):
+    # Nodes are inserted at random free places, so some have a single child and the depths vary
+    root = Node(0)
+    nodes = [root]
+
+    for value in range(1, count):
+        parent = generator.choice(nodes)
+        side = generator.choice([side for side in ("left", "right") if getattr(parent, side) is None] or [None])
+
+        if side is None:
+            continue
+
+        setattr(parent, side, Node(value))
+        nodes.append(getattr(parent, side))
+
+    return root
+
+
+TREES = {
+    "empty": lambda: None,
+    "single": lambda: Node(0),
+    "left": lambda: skewed(50, "left"),
+    "right": lambda: skewed(50, "right"),
+    "zigzag": lambda: zigzag(50),
+    "balanced": lambda: balanced(5, iter(range(100))),
+    "random": lambda: random_tree(200, random.Random(0)),
+}
+
+
+@pytest.mark.parametrize("name", sorted(TREES))
+def test_traversals(name):
+    tree = BinaryTree()
+    tree.root_node = TREES[name]()
+
+    assert [node.value for node in tree.preorder()] == recursive_preorder(tree.root_node)
+    assert [node.value for node in tree.inorder()] == recursive_inorder(tree.root_node)
+    assert [node.value for node in tree.postorder()] == recursive_postorder(tree.root_node)
+
+
+@pytest.mark.parametrize("side", ["left", "right"])
+def test_deep_trees(side):
+    # Deeper than the recursion limit
+    tree = BinaryTree()
+    tree.root_node = skewed(10000, side)
+    values = list(range(10000))
+
+    assert [node.value for node in tree.preorder()] == values
+    assert [node.value for node in tree.postorder()] == values[::-1]
+    assert [node.value for node in tree.inorder()] == (values[::-1] if side == "left" else values)
+
+
+def test_early_stop():
+    tree = BinaryTree()
+    tree.root_node = balanced(3, iter(range(100)))
+    preorder = tree.preorder()
+
+    assert [next(preorder).value for _ in range(3)] == recursive_preorder(tree.root_node)[:3]
@@ -0,0 +1,108 @@
+# coding: utf-8
+
+import pickle
+
+from compress.algorithms.huffman import Huffman
+from compress.algorithms.lzw import LZW
+from compress.cache import CompressionCache
+from compress.parallel import ParallelCompressor
+from compress.stream import StreamDecompressor
+from conftest import SAMPLES
+
+
+def test_hits_and_misses():
+    cache = CompressionCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b"payload"
+
+    assert cache.lookup(b"data", ("lzw",), compute) == b"payload"
+    assert cache.lookup(b"data", ("lzw",), compute) == b"payload"
+
+    # The parameters are part of the key
+    assert cache.lookup(b"data", ("huffman",), compute) == b"payload"
+
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses, cache.disk_hits) == (1, 2, 0)
+    assert cache.get("unknown") is None and cache.misses == 3
+
+
+def test_eviction_by_size():
+    cache = CompressionCache(max_size=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")  # b is now the least recently used
+    cache.put("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert (cache.size, len(cache), cache.evictions) == (8, 2, 1)
+
+    # Replacing a payload counts its new size only, payloads bigger than the cache are never kept
+    cache.put("a", b"12")
+    cache.put("d", b"12345678901")
+
+    assert (cache.size, len(cache), cache.evictions) == (6, 2, 1)
+    assert cache.get("d") is None
+
+
+def test_disk_store(tmp_path):
+    first = CompressionCache(directory=str(tmp_path))
+    first.put("0123456789", b"payload")
+
+    assert (tmp_path / "01" / "23456789").read_bytes() == b"payload"
+
+    # Another process, or the next run, finds it on disk and keeps it in memory
+    second = CompressionCache(directory=str(tmp_path))
+
+    assert second.get("0123456789") == b"payload"
+    assert second.get("0123456789") == b"payload"
+    assert (second.hits, second.disk_hits, len(second)) == (2, 1, 1)
+
+    second.clear()
+
+    assert (second.size, len(second)) == (0, 0)
+    assert second.get("0123456789") == b"payload" and second.disk_hits == 2
+
+
+def test_codec_cache():
+    codec = LZW()
+    codec.cache = CompressionCache()
+    data = SAMPLES["larger-than-a-block"]
+    compressed = codec.compress(data)
+
+    assert codec.compress(data) == compressed
+    assert codec.cache.hits == 1
+
+    # Other parameters give other payloads
+    codec.variable_width = False
+
+    assert LZW().decompress(codec.compress(data)) == data
+    assert codec.cache.hits == 1
+
+
+def test_pickle(tmp_path):
+    cache = CompressionCache(max_size=100, directory=str(tmp_path))
+    cache.put("0123456789", b"payload")
+    copy = pickle.loads(pickle.dumps(cache))
+
+    # The payloads in memory stay in the process, those on disk are shared
+    assert (copy.size, len(copy), copy.max_size) == (0, 0, 100)
+    assert copy.get("0123456789") == b"payload" and copy.disk_hits == 1
+
+    copy.put("abcdefghij", b"other")
+
+    assert cache.get("abcdefghij") == b"other"
+
+
+def test_workers(start_method, tmp_path, block_size):
+    codec = Huffman()
+    codec.cache = CompressionCache(directory=str(tmp_path))
+    data = SAMPLES["larger-than-a-block"]
+    container = b"".join(ParallelCompressor(codec, block_size, jobs=2).compress(data))
+
+    assert b"".join(StreamDecompressor().decompress(container)) == data
+    assert any(tmp_path.iterdir())
+    assert b"".join(ParallelCompressor(codec, block_size, jobs=2).compress(data)) == container
@@ -0,0 +1,57 @@
+# coding: utf-8
+
+import pytest
+
+from compress.cli import main
+
+DATA = b"The decompressed file must be the same as the original one.\n" * 2000
+
+
+@pytest.fixture
+def original(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "original.txt").write_bytes(DATA)
+    return tmp_path
+
+
+def round_trip(compress_args, decompress_args):
+    assert main(compress_args + ["-o", "compressed.tor", "original.txt"]) == 0
+    assert main(decompress_args + ["-d", "-o", "decompressed.txt", "compressed.tor"]) == 0
+
+    with open("decompressed.txt", "rb") as decompressed_file:
+        return decompressed_file.read()
+
+
+@pytest.mark.parametrize("algo", ["huffman", "lzw", "adaptive-huffman"])
+def test_file(original, algo):
+    assert round_trip(["-a", algo], ["-a", algo]) == DATA
+
+
+# The blocks of a container record their method, so neither --algo nor --stream are needed to decompress it
+@pytest.mark.parametrize("compress_args", [["-s"], ["-s", "-a", "huffman"], ["-j", "2"], ["-a", "lzss"],
+                                           ["-a", "lz-huffman"], ["-a", "range"], ["-a", "auto"]])
+@pytest.mark.parametrize("decompress_args", [[], ["-s"], ["-a", "huffman"], ["-j", "2"]])
+def test_container(original, compress_args, decompress_args):
+    assert round_trip(compress_args, decompress_args) == DATA
+
+
+def test_dictionary_unsupported(original, capsys):
+    assert main(["--train", "original.txt", "-o", "samples.tord"]) == 0
+
+    with pytest.raises(SystemExit):
+        main(["-a", "lzss", "-D", "samples.tord", "original.txt"])
+
+    assert "doesn't support dictionaries" in capsys.readouterr().err
+
+
+def test_range(original, capsysbinary):
+    assert main(["-s", "-b", "4096", "-o", "compressed.tor", "original.txt"]) == 0
+    capsysbinary.readouterr()
+
+    # Written to the standard output unless -o is given, like a range of a member of an archive
+    assert main(["-d", "-r", "10000:5000", "compressed.tor"]) == 0
+    assert capsysbinary.readouterr().out == DATA[10000:15000]
+
+    assert main(["-d", "-r", "10000:5000", "-o", "range.txt", "compressed.tor"]) == 0
+    assert (original / "range.txt").read_bytes() == DATA[10000:15000]
+    assert not (original / "compressed").exists()
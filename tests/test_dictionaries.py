@@ -0,0 +1,46 @@
+# coding: utf-8
+
+import random
+
+import pytest
+
+import compress
+from compress.benchmark import generate_text
+from compress.utils.dictionaries import Dictionary
+
+SAMPLES = [generate_text(200, random.Random(seed)) for seed in range(50)]
+MESSAGE = generate_text(150, random.Random(100))
+
+
+@pytest.fixture(scope="module")
+def dictionary():
+    return compress.train_dictionary(SAMPLES)
+
+
+def test_save_and_load(dictionary, tmp_path):
+    dictionary.save(str(tmp_path / "samples.tord"))
+    loaded = compress.load_dictionary(str(tmp_path / "samples.tord"))
+
+    assert loaded.dictionary_id == dictionary.dictionary_id
+    assert Dictionary.from_bytes(dictionary.to_bytes()).content == dictionary.content
+
+
+def test_corrupted(dictionary):
+    data = bytearray(dictionary.to_bytes())
+    data[-1] ^= 1
+
+    with pytest.raises(IOError):
+        Dictionary.from_bytes(bytes(data))
+
+    with pytest.raises(IOError):
+        Dictionary.from_bytes(data[:10])
+
+
+@pytest.mark.parametrize("algorithm", ["huffman", "lzw"])
+def test_compress(dictionary, algorithm):
+    compressed = compress.compress(MESSAGE, algorithm=algorithm, dictionary=dictionary)
+
+    assert compress.decompress(compressed) == MESSAGE
+
+    # Small payloads are what dictionaries are for
+    assert len(compressed) < len(compress.compress(MESSAGE, algorithm=algorithm))
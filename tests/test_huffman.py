@@ -0,0 +1,32 @@
+# coding: utf-8
+
+import pytest
+
+import compress
+from compress.algorithms.huffman import Huffman
+
+
+@pytest.mark.parametrize("canonical", [True, False])
+def test_compress(sample, canonical):
+    codec = Huffman(canonical=canonical)
+    compressed = codec.compress(sample)
+
+    assert codec.decompress(compressed) == sample
+    assert compress.decompress(compressed) == sample
+
+
+def test_canonical_header_is_smaller():
+    # Every byte value appears, the tree has 256 leaves
+    data = bytes(range(256)) * 4 + b"e" * 1000
+
+    assert len(Huffman(canonical=True).compress_block(data)) < len(Huffman(canonical=False).compress_block(data))
+
+
+@pytest.mark.parametrize("canonical", [True, False])
+def test_both_formats_are_read(sample, canonical):
+    if not sample:
+        pytest.skip("Blocks can't be empty")
+
+    # The first byte tells the formats apart, whatever the setting of the instance decompressing them
+    assert Huffman(canonical=not canonical).decompress_block(Huffman(canonical=canonical).compress_block(sample)) == \
+        sample
@@ -0,0 +1,32 @@
+# coding: utf-8
+
+import pytest
+
+import compress
+from compress.algorithms.lzss import LZSS
+from compress.utils.match_finder import LEVELS, MatchFinder, copy_match
+
+
+@pytest.mark.parametrize("level", sorted(LEVELS))
+def test_compress(sample, level):
+    codec = LZSS(level=level)
+    compressed = codec.compress(sample)
+
+    assert codec.decompress(compressed) == sample
+    assert compress.decompress(compressed) == sample
+
+
+def test_overlapping_matches():
+    data = b"a" * 1000 + b"ab" * 500
+
+    # A run is a match copying the bytes it produces
+    assert any(isinstance(token, tuple) and token[1] < token[0] for token in MatchFinder().parse(data))
+    assert LZSS().decompress_block(LZSS().compress_block(data)) == data
+
+
+def test_invalid_distance():
+    with pytest.raises(IOError):
+        copy_match(bytearray(b"abc"), 3, 4)
+
+    with pytest.raises(ValueError):
+        LZSS(level=10)
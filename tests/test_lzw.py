@@ -0,0 +1,54 @@
+# coding: utf-8
+
+import random
+import re
+
+import pytest
+
+import compress
+from compress.algorithms.lzw import LZW
+from compress.benchmark import generate_text
+from conftest import SAMPLES
+
+
+@pytest.mark.parametrize("variable_width", [True, False])
+def test_compress(sample, variable_width):
+    codec = LZW(variable_width=variable_width)
+    compressed = codec.compress(sample)
+
+    assert codec.decompress(compressed) == sample
+    assert compress.decompress(compressed) == sample
+
+
+@pytest.mark.parametrize("variable_width", [True, False])
+def test_both_formats_are_read(sample, variable_width):
+    if not sample:
+        pytest.skip("Blocks can't be empty")
+
+    # The first byte tells the formats apart, whatever the setting of the instance decompressing them
+    compressed = LZW(variable_width=variable_width).compress_block(sample)
+
+    assert LZW(variable_width=not variable_width).decompress_block(compressed) == sample
+
+
+@pytest.mark.parametrize("with_dictionary", [False, True])
+def test_resets(with_dictionary, capsys):
+    if with_dictionary:
+        dictionary = compress.train_dictionary([generate_text(200, random.Random(seed)) for seed in range(20)])
+    else:
+        dictionary = None
+
+    # 9 bits integers fill the dictionary every few hundred bytes, it is then cleared and primed again
+    data = SAMPLES["larger-than-a-block"]
+    codec = LZW(verbose=True, max_code_bits=9, dictionary=dictionary)
+    compressed = codec.compress(data)
+    resets = int(re.search(r"reset (\d+) times", capsys.readouterr().out).group(1))
+
+    assert resets >= 10
+    assert LZW().decompress(compressed) == data
+    assert compress.decompress(compressed) == data
+
+    codes = LZW(max_code_bits=9).encode_codes(data)
+
+    assert codes.count(LZW.CLEAR_CODE) >= 10 and max(codes) < 1 << 9
+    assert LZW(max_code_bits=9).decode_codes(codes) == data
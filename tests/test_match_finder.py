@@ -0,0 +1,18 @@
+# coding: utf-8
+
+import random
+
+import pytest
+
+from compress.algorithms.lzss import LZSS
+from compress.benchmark import GENERATORS
+from compress.utils.match_finder import LEVELS
+
+
+@pytest.mark.parametrize("kind", ["text", "repetitive"])
+def test_levels_are_monotonic(kind):
+    data = GENERATORS[kind](1 << 16, random.Random(0))
+    sizes = [len(LZSS(level=level).compress_block(data)) for level in sorted(LEVELS)]
+
+    # A level never compresses worse than the one below it
+    assert sizes == sorted(sizes, reverse=True)
@@ -0,0 +1,52 @@
+# coding: utf-8
+
+import pickle
+
+import pytest
+
+from compress.archive import ArchiveCompressor, ArchiveReader
+from compress.benchmark import CONFIGURATIONS
+from compress.cli import main
+from compress.parallel import ParallelCompressor, ParallelDecompressor
+from conftest import SAMPLES
+
+
+@pytest.mark.parametrize("name", sorted(CONFIGURATIONS))
+def test_codecs_are_picklable(name):
+    codec = CONFIGURATIONS[name]()
+    data = SAMPLES["larger-than-a-block"]
+    compressed = codec.compress(data)
+    copy = pickle.loads(pickle.dumps(codec))
+
+    assert copy.decompress(compressed) == data
+    assert copy.compress(data) == compressed
+
+
+def test_blocks(start_method, block_size):
+    data = SAMPLES["larger-than-a-block"]
+    container = b"".join(ParallelCompressor(CONFIGURATIONS["huffman"](), block_size, jobs=2).compress(data))
+
+    assert b"".join(ParallelDecompressor(jobs=2).decompress(container)) == data
+
+
+def test_archive(start_method, block_size, tmp_path):
+    for name, data in SAMPLES.items():
+        (tmp_path / name).write_bytes(data)
+
+    with open(tmp_path / "archive.tor", "wb") as output_file:
+        ArchiveCompressor(CONFIGURATIONS["lzw"](), block_size, jobs=2).compress(
+            [str(tmp_path / name) for name in SAMPLES], output_file)
+
+    with ArchiveReader(str(tmp_path / "archive.tor")) as reader:
+        for name, data in SAMPLES.items():
+            assert reader.read(name) == data
+
+
+def test_cli(start_method, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = SAMPLES["larger-than-a-block"] * 20
+    (tmp_path / "original.txt").write_bytes(data)
+
+    assert main(["-j", "2", "-b", "4096", "-o", "compressed.tor", "original.txt"]) == 0
+    assert main(["-d", "-j", "2", "-o", "decompressed.txt", "compressed.tor"]) == 0
+    assert (tmp_path / "decompressed.txt").read_bytes() == data
@@ -0,0 +1,45 @@
+# coding: utf-8
+
+import random
+
+import pytest
+
+import compress
+from compress.algorithms.lzss import LZSS
+from compress.algorithms.lzw import LZW
+from compress.algorithms.pipeline import LZHuffman
+from compress.benchmark import generate_repetitive, generate_text
+
+TEXT = generate_text(1 << 18, random.Random(0))
+
+
+@pytest.mark.parametrize("stage, max_code_bits", [("lz77", 16), ("lzw", 9), ("lzw", 16)])
+def test_compress(sample, stage, max_code_bits):
+    codec = LZHuffman(stage=stage, max_code_bits=max_code_bits)
+    compressed = codec.compress(sample)
+
+    assert codec.decompress(compressed) == sample
+    assert compress.decompress(compressed) == sample
+
+
+def test_large_alphabet():
+    # Enough patterns for the codes of the LZW stage to need more than 15 bits
+    codec = LZHuffman(stage="lzw", max_code_bits=16)
+
+    assert codec.decompress_block(codec.compress_block(TEXT)) == TEXT
+
+
+def test_smaller_than_the_dictionary_stage():
+    assert len(LZHuffman(stage="lz77").compress_block(TEXT)) < len(LZSS().compress_block(TEXT))
+
+    # The LZW stage only wins when patterns are reused soon after they are defined
+    repetitive = generate_repetitive(1 << 16, random.Random(0))
+    assert len(LZHuffman(stage="lzw").compress_block(repetitive)) < len(LZW().compress_block(repetitive))
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        LZHuffman(stage="unknown")
+
+    with pytest.raises(ValueError):
+        LZHuffman(max_code_bits=17)
@@ -0,0 +1,83 @@
+# coding: utf-8
+
+from fractions import Fraction
+from itertools import combinations_with_replacement
+import random
+
+import pytest
+
+from compress.utils.prefix_codes import HuffmanTree, code_lengths, limited_code_lengths
+
+
+def fibonacci(count):
+    frequencies = [1, 1]
+
+    while len(frequencies) < count:
+        frequencies.append(frequencies[-1] + frequencies[-2])
+
+    return frequencies[:count]
+
+
+def cost(frequencies, lengths):
+    return sum(frequency * length for frequency, length in zip(frequencies, lengths))
+
+
+def optimal_cost(frequencies, max_length):
+    # Every complete set of lengths, the most frequent symbols getting the shortest codes
+    frequencies = sorted(frequency for frequency in frequencies if frequency)[::-1]
+    return min(cost(frequencies, lengths)
+               for lengths in combinations_with_replacement(range(1, max_length + 1), len(frequencies))
+               if sum(1 << (max_length - length) for length in lengths) == 1 << max_length)
+
+
+def check(frequencies, max_length):
+    lengths = limited_code_lengths(frequencies, max_length)
+
+    # Complete prefix code : Kraft's sum is exactly 1
+    assert sum(Fraction(1, 1 << length) for length in lengths if length) == 1
+    assert max(lengths) <= max_length
+    assert all((length == 0) == (frequency == 0) for frequency, length in zip(frequencies, lengths))
+    return lengths
+
+
+@pytest.mark.parametrize("count", [5, 8, 10])
+def test_fibonacci(count):
+    # The Huffman tree of a Fibonacci sequence is as deep as there are symbols, the worst case for a length limit
+    frequencies = fibonacci(count)
+    huffman_lengths = HuffmanTree(frequencies).code_lengths(count)
+
+    assert max(huffman_lengths) == count - 1
+
+    for max_length in range((count - 1).bit_length(), count + 1):
+        lengths = check(frequencies, max_length)
+
+        assert cost(frequencies, lengths) == optimal_cost(frequencies, max_length)
+
+    # Without an effective limit, the lengths are as short as Huffman's
+    assert cost(frequencies, check(frequencies, count)) == cost(frequencies, huffman_lengths)
+
+
+def test_random():
+    generator = random.Random(0)
+
+    for _ in range(20):
+        frequencies = [generator.choice([0, 1, 2, 3, 50, 1000]) for _ in range(9)] + [1, 1]
+        used = sum(1 for frequency in frequencies if frequency)
+
+        for max_length in range((used - 1).bit_length(), 6):
+            assert cost(frequencies, check(frequencies, max_length)) == optimal_cost(frequencies, max_length)
+
+
+def test_limits():
+    # As many symbols as codes of the maximum length : all of them have that length
+    assert limited_code_lengths([1] * 16, 4) == [4] * 16
+    assert limited_code_lengths([0, 7, 0], 3) == [0, 1, 0]
+
+    with pytest.raises(ValueError):
+        limited_code_lengths([1] * 17, 4)
+
+    # code_lengths only falls back to package-merge when Huffman's codes are too long
+    frequencies = fibonacci(30)
+
+    assert max(code_lengths(frequencies, max_length=15)) == 15
+    assert code_lengths(frequencies, max_length=30) == HuffmanTree(frequencies).code_lengths(30)
@@ -0,0 +1,50 @@
+# coding: utf-8
+
+import random
+
+import pytest
+
+import compress
+from compress.algorithms.huffman import Huffman
+from compress.algorithms.range_coder import MAX_TOTAL, MODELS, RangeCoder, scale_frequencies
+from compress.benchmark import generate_text
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_compress(sample, model):
+    codec = RangeCoder(model=model)
+    compressed = codec.compress(sample)
+
+    assert codec.decompress(compressed) == sample
+    assert compress.decompress(compressed) == sample
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_skewed_data_is_smaller_than_huffman(model):
+    # Huffman spends at least a bit on each byte, even on a byte occurring 95% of the time
+    rng = random.Random(0)
+    data = bytes(97 if rng.random() < 0.95 else rng.randrange(256) for _ in range(20000))
+
+    assert len(RangeCoder(model=model).compress_block(data)) < len(Huffman().compress_block(data))
+
+
+def test_order1_is_smaller_on_text():
+    text = generate_text(50000, random.Random(0))
+
+    assert len(RangeCoder(model="order1").compress_block(text)) < len(RangeCoder(model="adaptive").compress_block(text))
+
+
+def test_scale_frequencies():
+    histogram = [0] * 256
+    histogram[0] = 10 ** 9
+    histogram[1:200] = [1] * 199
+    frequencies = scale_frequencies(histogram)
+
+    assert sum(frequencies) <= MAX_TOTAL
+    assert [bool(frequency) for frequency in frequencies] == [bool(count) for count in histogram]
+    assert scale_frequencies([3] * 256) == [3] * 256
+
+
+def test_invalid_model():
+    with pytest.raises(ValueError):
+        RangeCoder(model="order2")
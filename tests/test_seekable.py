@@ -0,0 +1,65 @@
+# coding: utf-8
+
+import random
+
+import pytest
+
+from compress.benchmark import CONFIGURATIONS
+from compress.seekable import SeekableContainer
+from compress.stream import FLAG_INDEX, HEADER, INDEX_TRAILER, StreamCompressor
+
+
+def without_index(container):
+    """ Removes the index of a container and its flag, like the containers written before the index existed. """
+
+    index_offset = INDEX_TRAILER.unpack(container[-INDEX_TRAILER.size:])[0]
+    data = bytearray(container[:index_offset])
+    data[HEADER.size - 5] &= ~FLAG_INDEX  # The flags are followed by the 32 bits block size
+    return bytes(data)
+
+
+def check_reads(seekable, data, block_size):
+    rng = random.Random(2)
+    assert seekable.size == len(data)
+
+    # Inside a block, across blocks, up to the end and beyond it
+    for offset, length in [(0, 10), (block_size - 5, 10), (block_size, 3 * block_size), (len(data) - 7, 100),
+                           (len(data), 5)] + [(rng.randrange(len(data)), rng.randrange(2 * block_size))
+                                              for _ in range(10)]:
+        assert seekable.read(offset, length) == data[offset:offset + length]
+
+    reader = seekable.open()
+    reader.seek(block_size + 1)
+    assert reader.read(20) == data[block_size + 1:block_size + 21]
+
+    reader.seek(-10, 2)
+    assert reader.read() == data[-10:]
+
+
+@pytest.mark.parametrize("name", sorted(CONFIGURATIONS))
+def test_read(name, block_size):
+    data = (b"Random access to the blocks of a container. " * 1000)[:5 * block_size + 123]
+    container = b"".join(StreamCompressor(CONFIGURATIONS[name](), block_size).compress(data))
+
+    with SeekableContainer(container) as seekable:
+        check_reads(seekable, data, block_size)
+
+
+def test_file_without_index(tmp_path, block_size):
+    data = bytes(random.Random(3).randrange(16) for _ in range(5 * block_size + 123))
+    container = b"".join(StreamCompressor(CONFIGURATIONS["huffman"](), block_size).compress(data))
+    (tmp_path / "data.tor").write_bytes(without_index(container))
+
+    with SeekableContainer(str(tmp_path / "data.tor")) as seekable:
+        check_reads(seekable, data, block_size)
+
+
+def test_invalid_reads(block_size):
+    container = b"".join(StreamCompressor(CONFIGURATIONS["lzw"](), block_size).compress(b"abc" * 100))
+
+    with SeekableContainer(container) as seekable:
+        with pytest.raises(ValueError):
+            seekable.read(-1, 10)
+
+        with pytest.raises(ValueError):
+            seekable.open().seek(-1)
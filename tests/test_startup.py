@@ -0,0 +1,54 @@
+# coding: utf-8
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+
+# Importing the command line takes about 40 ms here, a bare interpreter about 20 ms. The budget leaves room for slow
+# machines but not for NumPy or matplotlib, which take several times as long.
+IMPORT_BUDGET_US = 100000
+
+HEAVY_MODULES = ("numpy", "matplotlib")
+
+# Only needed by some modes, compressing and decompressing a file doesn't import them
+LAZY_MODULES = ("compress.archive", "compress.parallel", "compress.seekable", "compress.benchmark", "compress.cache")
+
+
+def run(script, *arguments):
+    return subprocess.run([sys.executable] + list(arguments) + ["-c", script], cwd=ROOT, capture_output=True,
+                          text=True, check=True)
+
+
+def test_cli_imports_quickly():
+    result = run("import compress.cli", "-X", "importtime")
+    times = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+
+    # The cumulative time of compress.cli includes the modules it imports, the compress package among them
+    elapsed = times["compress.cli"]
+
+    assert elapsed < IMPORT_BUDGET_US, "Importing the command line took {} ms.".format(elapsed // 1000)
+
+
+def test_cli_imports_only_what_it_uses(tmp_path):
+    (tmp_path / "original.txt").write_bytes(b"Only what it uses. " * 100)
+    script = """
+import sys
+from compress.cli import main
+
+main(["-o", {compressed!r}, {original!r}])
+main(["-d", "-o", {decompressed!r}, {compressed!r}])
+print("Imported :", ",".join(name for name in {modules!r} if name in sys.modules))
+""".format(original=str(tmp_path / "original.txt"), compressed=str(tmp_path / "compressed.tor"),
+           decompressed=str(tmp_path / "decompressed.txt"), modules=HEAVY_MODULES + LAZY_MODULES)
+
+    assert run(script).stdout.splitlines()[-1] == "Imported : "
+    assert (tmp_path / "decompressed.txt").read_bytes() == (tmp_path / "original.txt").read_bytes()
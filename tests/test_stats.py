@@ -0,0 +1,125 @@
+# coding: utf-8
+
+import json
+import tracemalloc
+
+import pytest
+
+from compress.algorithms.huffman import Huffman
+from compress.utils.stats import Stats
+from conftest import SAMPLES
+
+
+def test_phases():
+    stats = Stats("huffman", "compress", 10)
+
+    with stats.phase("histogram"):
+        pass
+
+    with stats.phase("encode"):
+        pass
+
+    # Time spent again in a phase is added to it, the order is the one they started in
+    with stats.phase("histogram"):
+        pass
+
+    assert list(stats.phases) == ["histogram", "encode"]
+    assert all(duration >= 0 for duration in stats.phases.values())
+    assert json.loads(json.dumps(stats.as_dict()))["phases"] == dict(stats.phases)
+
+
+def test_block():
+    codec = Huffman()
+    data = SAMPLES["larger-than-a-block"]
+    payload = codec.compress_block(data)
+    stats = codec.stats
+
+    assert (stats.algorithm, stats.operation, stats.bytes_in, stats.bytes_out) == ("huffman", "compress", len(data),
+                                                                                   len(payload))
+    assert list(stats.phases) == ["histogram", "tree", "code", "header", "encode"]
+    assert stats.wall_time >= sum(stats.phases.values())
+    assert stats.tracemalloc_peak is None
+
+    assert codec.decompress_block(payload) == data
+    assert (codec.stats.operation, codec.stats.bytes_in, codec.stats.bytes_out) == ("decompress", len(payload),
+                                                                                    len(data))
+    assert {"header", "table", "decode"} <= set(codec.stats.phases)
+
+
+def test_nested(tmp_path, capsys):
+    data = SAMPLES["larger-than-a-block"]
+    (tmp_path / "input").write_bytes(data)
+    codec = Huffman()
+    recorded = []
+    codec.add_hook(recorded.append)
+
+    # compress_file calls compress_block, their phases are in the Stats of compress_file
+    codec.compress_file(str(tmp_path / "input"), str(tmp_path / "input.tor"))
+
+    assert len(recorded) == 1 and recorded[0] is codec.stats
+    assert (codec.stats.bytes_in, codec.stats.bytes_out) == (len(data), (tmp_path / "input.tor").stat().st_size)
+    assert {"histogram", "encode", "write"} <= set(codec.stats.phases)
+
+    codec.decompress_file(str(tmp_path / "input.tor"), str(tmp_path / "output"))
+
+    assert len(recorded) == 2 and recorded[1].operation == "decompress"
+    assert (tmp_path / "output").read_bytes() == data
+
+
+def test_phase_outside_of_a_call():
+    codec = Huffman()
+
+    with codec.phase("histogram"):
+        pass
+
+    assert codec.stats is None
+
+
+def test_failure():
+    codec = Huffman()
+
+    with pytest.raises(IOError):
+        codec.decompress_block(b"\xff")
+
+    # The failed call doesn't count as a running one for the next calls
+    codec.compress_block(b"abc")
+
+    assert codec.stats.operation == "compress" and codec.stats.bytes_in == 3
+
+
+def test_trace_memory():
+    codec = Huffman()
+    codec.trace_memory = True
+    data = SAMPLES["larger-than-a-block"]
+    codec.compress_block(data)
+
+    assert codec.stats.tracemalloc_peak > 0
+    assert not tracemalloc.is_tracing()
+
+    # Tracing started by the caller is left as it is
+    tracemalloc.start()
+
+    try:
+        codec.compress_block(data)
+
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+    assert codec.stats.tracemalloc_peak > 0
+
+
+def test_hooks():
+    codec = Huffman()
+    first, second = [], []
+    codec.add_hook(first.append)
+    codec.add_hook(second.append)
+    codec.compress_block(b"abcabc")
+    codec.remove_hook(first.append)
+    codec.remove_hook(first.append)
+    codec.compress_block(b"abcabc")
+
+    assert (len(first), len(second)) == (1, 2)
+
+    # Hooks are added to the instance only
+    assert Huffman.hooks == () and Huffman().hooks == ()
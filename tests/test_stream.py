@@ -0,0 +1,33 @@
+# coding: utf-8
+
+import io
+
+import pytest
+
+from compress.benchmark import CONFIGURATIONS
+from compress.stream import StreamCompressor, StreamDecompressor
+
+
+# Every algorithm with its default settings, and the other settings the benchmark measures
+@pytest.fixture(params=sorted(CONFIGURATIONS))
+def codec(request):
+    return CONFIGURATIONS[request.param]()
+
+
+def test_container(codec, sample, block_size):
+    container = b"".join(StreamCompressor(codec, block_size).compress(sample))
+
+    assert b"".join(StreamDecompressor().decompress(container)) == sample
+
+    # Pieces of any size, like a socket would return them
+    chunks = (container[start:start + 1000] for start in range(0, len(container), 1000))
+    assert b"".join(StreamDecompressor().decompress(chunks)) == sample
+
+
+def test_files(codec, sample, block_size):
+    compressed = io.BytesIO()
+    StreamCompressor(codec, block_size).compress_stream(io.BytesIO(sample), compressed)
+    decompressed = io.BytesIO()
+    StreamDecompressor().decompress_stream(io.BytesIO(compressed.getvalue()), decompressed)
+
+    assert decompressed.getvalue() == sample